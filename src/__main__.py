@@ -1,15 +1,15 @@
 """ Entry point. """
 
-import sys, os, multiprocessing, time, distutils.spawn
+import sys, os, time, distutils.spawn
 
 from stdout import new_line, log, error, warning, info
 import lib, iolib, options, flags
-import test_case, test_context
 import context as ctxt
 import binary as bina
-import os
-import testexec, testset, binary
-import execution, breakdown
+import job, result, executor, schedule, shard, distrib, cache, traces
+import index, build, procs, spawner, warm, differential
+import subsume, columns
+import testexec
 
 max_log = flags.max_log_lvl()
 
@@ -26,6 +26,9 @@ def init():
   flags.print_flags(max_log)
   new_line(max_log)
 
+  # Workers get their jobs from the coordinator.
+  if flags.worker() != None: return []
+
   # Only keeping files that actually exist.
   def file_exists(path):
     if iolib.is_path_a_file(path): return True
@@ -94,38 +97,105 @@ def init():
   return files
 
 def get_contexts(files):
-  """Creates and returns the test contexts from some files."""
+  """Creates and returns the test contexts from some files and runs their
+  setups. Also returns the test sets loaded along with the contexts
+  when using the index, by absolute path."""
 
   test_contexts = []
+  testsets = {}
+  entries = None
+  if flags.index(): entries = index.load( flags.cache_dir() )
+  updated = False
 
   for fil3 in files:
-    log("Parsing test context from \"{}\"".format(fil3))
-    context = ctxt.of_file(fil3)
-    log("Done parsing \"{}\":".format(fil3))
+    if entries == None:
+      log("Parsing test context from \"{}\"".format(fil3))
+      context = ctxt.of_file(fil3)
+      log("Done parsing \"{}\":".format(fil3))
+    else:
+      k3y = iolib.abs_path(fil3)
+      if k3y in entries and index.is_fresh( entries[k3y] ):
+        log("Loaded test context \"{}\" from index:".format(fil3))
+      else:
+        log("Parsing test context from \"{}\"".format(fil3))
+        entries[k3y] = index.of_file(fil3)
+        updated = True
+        log("Done parsing \"{}\":".format(fil3))
+      context = index.context( entries[k3y] )
+      testsets.update( index.testsets( entries[k3y] ) )
     ctxt.pprint("  ", context)
     new_line()
     # Don't load the testcase itself, we do that right before running the
     # test itself.
     test_contexts.append(context)
 
-  return test_contexts
-
-def load_testcase(test_execution):
-  """ Loads the test case from the test case file. """
-  # Only loading if necessary.
-  testcase = test_execution["testcase"]
-  if "inputs" not in testcase:
-    testcase_path = testcase["file"]
-    (input_seq, length) = test_case.of_file(testcase_path)
-    testcase["inputs"] = input_seq
-    testcase["length"] = length
-    test_case.print_test_case(input_seq, max_log)
+  if updated:
+    try: index.save( flags.cache_dir(), entries )
+    except (iolib.IOLibError, IOError, OSError) as e:
+      warning( "could not update the index: {}".format(e) )
+      new_line(1)
+
+  try: build.run_all(
+    test_contexts, flags.cache_dir(),
+    iolib.join_path(flags.out_dir(), "setup"), flags.setup_jobs()
+  )
+  except iolib.IOLibError as e:
+    error("while running setups:")
+    error("> {}".format(e.msg))
+    new_line(0)
+    sys.exit(1)
+
+  return (test_contexts, testsets)
+
+def merge_shards(files):
+  """Merges the partial result files of shards and prints the summary of the
+  run they make up."""
+  log( "Merging {} partial result file(s).".format(len(files)) )
+  new_line()
+  try: (keys, results) = shard.merge(files)
+  except ValueError as e:
+    error("while merging shards:")
+    error("> {}".format(e))
+    new_line(0)
+    sys.exit(1)
+  result.pprint_summaries(results, keys)
+
+def _flatten(results):
+  """Yields the results of jobs, groups of jobs yielding several of them."""
+  for res in results:
+    if isinstance(res, list):
+      for r3s in res: yield r3s
+    else: yield res
+
+def run_jobs(jobs):
+  """Runs some jobs locally, or through workers if this run is distributed.
+  Yields results in completion order."""
+  if flags.coordinator() != None:
+    log( "Distributing {} jobs.".format(len(jobs)) )
     new_line(max_log)
+    for res in _flatten( distrib.coordinate(
+      distrib.of_string(flags.coordinator()), jobs
+    ) ): yield res
+    return
 
-def run_test(test_execution):
-  """ Runs a test. """
-  ok = execution.run(test_execution)
-  return ok
+  ex3cutor = executor.mk( flags.backend(), flags.max_proc() )
+
+  if executor.pool(ex3cutor) == None:
+    log( "Sequential run, {} jobs.".format(len(jobs)) )
+  else:
+    log(
+      "Running {} jobs in parallel with {} {} workers.".format(
+        len(jobs), flags.max_proc(), flags.backend()
+      )
+    )
+  new_line(max_log)
+
+  try:
+    for res in _flatten(
+      executor.imap_unordered(ex3cutor, job.run, jobs)
+    ): yield res
+  finally:
+    executor.close(ex3cutor)
 
 # Safety thing for parallelism.
 if __name__ == "__main__":
@@ -133,92 +203,185 @@ if __name__ == "__main__":
   # Handling command-line arguments, getting existing test context files.
   files = init()
 
+  # Forking the spawner while the heap is small.
+  if flags.spawner() and not flags.merge():
+    try: spawner.start()
+    except (IOError, OSError) as e:
+      warning( "could not start the spawner: {}".format(e) )
+      new_line(1)
+
   out_dir = flags.out_dir()
 
-  # Creating test execution structures, creating log directory.
-  # test_executions = get_test_executions(files)
-  test_contexts = get_contexts(files)
-  # job_count = len(test_executions)
+  if flags.worker() != None:
+    log( "Working for coordinator {}.".format(flags.worker()) )
+    count = distrib.work(
+      distrib.of_string(flags.worker()), flags.max_proc()
+    )
+    warm.clear()
+    log( "Done, ran {} job(s).".format(count) )
+    new_line(1)
+    sys.exit(0)
 
-  original_dir = os.getcwd()
+  if flags.merge():
+    merge_shards(files)
+    log("Done.")
+    new_line(1)
+    sys.exit(0)
 
+  # Creating test contexts and the jobs for all of them.
+  (test_contexts, testsets) = get_contexts(files)
+
+  jobs = []
   for test_context in test_contexts:
+    log( "Creating jobs for system {}".format(
+        ctxt.system(test_context)
+    ) )
+    log( "  {} test set(s)".format(len(ctxt.tests(test_context))) )
+    log( "  on {} binary(ies)".format(len(ctxt.bins(test_context))) )
+    for bin4ry in ctxt.bins(test_context):
+      bina.pprint("    ", bin4ry)
+    new_line()
+    jobs.extend( job.of_context(test_context, out_dir, testsets) )
 
-    log( "changing to dir {}".format(ctxt.wdir(test_context)) )
+  # Summaries are printed in job order.
+  keys = []
+  for j0b in jobs:
+    if job.key(j0b) not in keys: keys.append( job.key(j0b) )
 
-    os.chdir( ctxt.wdir(test_context) )
+  if flags.run_tests():
 
-    for bin4ry in ctxt.bins(test_context):
-      log( "Running tests for system {}".format(
-          ctxt.system(test_context)
+    try: iolib.mkdir(flags.cache_dir())
+    except iolib.IOLibError as e:
+      error("while creating cache directory:")
+      error("> {}".format(e.msg))
+      new_line(0)
+      sys.exit(1)
+
+    history_path = schedule.history_path(flags.cache_dir())
+    history = schedule.load_history(history_path)
+
+    if flags.shard() != None:
+      # Not using the history, nodes might not share it.
+      parts = shard.partition(
+        jobs, schedule.estimate(jobs, {}), flags.shard()[1]
+      )
+      jobs = parts[ flags.shard()[0] - 1 ]
+      log( "Running shard {}/{}, {} job(s).".format(
+        flags.shard()[0], flags.shard()[1], len(jobs)
+      ) )
+      new_line()
+
+    if flags.lpt():
+      log( "Ordering jobs longest first." )
+      jobs = schedule.lpt( jobs, schedule.estimate(jobs, history) )
+      new_line()
+
+    results = []
+    total_jobs = len(jobs)
+
+    if flags.clear_cache():
+      log( "Clearing result cache." )
+      cache.clear(flags.cache_dir())
+
+    # File hashes, shared by result cache and trace keys.
+    memo = {}
+
+    if flags.values_cache():
+      # Created once before jobs run, see ``columns.build``.
+      iolib.mkdir( columns.dir_of( iolib.abs_path(flags.cache_dir()) ) )
+
+    if flags.store_traces() or flags.recheck():
+      cache_dir = iolib.abs_path( flags.cache_dir() )
+      iolib.mkdir( traces.dir_of(cache_dir) )
+      for j0b in jobs:
+        try: k3y = traces.key(j0b, memo)
+        except (IOError, OSError): continue
+        testexec.set_trace( job.execution(j0b), traces.path(cache_dir, k3y) )
+
+    # Cache keys of the jobs to run, by job identifier.
+    cache_keys = {}
+    if flags.result_cache():
+      to_run = []
+      for j0b in jobs:
+        try: k3y = cache.key(j0b, memo)
+        except (IOError, OSError): k3y = None
+        if k3y == None: res = None
+        else: res = cache.lookup(flags.cache_dir(), k3y, j0b)
+        if res == None:
+          cache_keys[ job.ident(j0b) ] = k3y
+          to_run.append(j0b)
+        else: results.append(res)
+      log( "{} cached result(s), {} job(s) to run.".format(
+        len(results), len(to_run)
       ) )
       new_line()
-      log( "  {} test set(s)".format(len(ctxt.tests(test_context))) )
-      log( "  on binary" )
-      binary.pprint("    ", bin4ry)
+      jobs = to_run
+
+    # Jobs covered by each maximal job, by job identifier.
+    covered = {}
+    if flags.subsume():
+      log( "Looking for test cases subsumed by longer ones." )
+      total = len(jobs)
+      (jobs, covered) = subsume.maximal(jobs)
+      log( "> {} maximal job(s), saving {} of {} execution(s).".format(
+        len(jobs), total - len(jobs), total
+      ) )
       new_line()
 
-      oracle = ctxt.oracle(test_context)
+    if flags.differential():
+      total = len(jobs)
+      jobs = job.groups(jobs)
+      log( "Grouped {} job(s) into {} differential job(s).".format(
+        total, len(jobs)
+      ) )
+      new_line()
 
-      def run_test(test_case):
-        test_exec = testexec.mk(bin4ry, oracle, out_dir, test_case)
-        return testexec.run(test_exec)
+    start = time.time()
+    for res in run_jobs(jobs):
+      for r3s in [res] + subsume.derive(covered, res):
+        results.append(r3s)
+        k3y = cache_keys.get( result.ident(r3s) )
+        if k3y != None: cache.store(flags.cache_dir(), k3y, r3s)
+      log( "  [{}/{}] {} {}".format(
+        len(results), total_jobs, result.testcase(res),
+        "ok" if result.ok(res) else "failed"
+      ), max_log )
+    makespan = time.time() - start
+    warm.clear()
+
+    if flags.result_cache():
+      evicted = cache.evict(flags.cache_dir(), flags.cache_size())
+      if evicted > 0:
+        log( "Evicted {} result(s) from the cache.".format(evicted) )
+        new_line()
 
-      for test_set in ctxt.tests(test_context):
-        log( "  Loading test set {}".format(test_set) )
-        ts = testset.of_file(test_set)
-        log("  Done.")
+    if flags.store_traces():
+      evicted = traces.evict(
+        iolib.abs_path( flags.cache_dir() ), flags.cache_size()
+      )
+      if evicted > 0:
+        log( "Evicted {} trace(s) from the cache.".format(evicted) )
         new_line()
 
-        job_count = len( testset.tests(ts) )
-
-        if flags.run_tests():
-
-          if flags.sequential_run():
-            log(
-              "  Sequential run on \"{}\", {} jobs.".format(
-                test_set, job_count
-              )
-            )
-            res_list = map(run_test, testset.tests(ts))
-            total = len(res_list)
-            successes = len( [ok for ok in res_list if ok] )
-            failures = total - successes
-            width = len(str(total))
-            log("  Done on {} test(s):".format(total))
-            log("  > \033[32m{0:>{width}} test(s) passed\033[0m".format(
-              successes, width=width)
-            )
-            if failures > 0:
-              log("  > \033[31m{0:>{width}} test(s) failed\033[0m".format(
-                failures, width=width)
-              )
-
-          else:
-            new_line()
-            log(
-              "  Running {} jobs in parallel with {} workers on \"{}\"".format(
-                job_count, flags.max_proc(), test_set
-              )
-            )
-            new_line(max_log)
-            p00l = multiprocessing.Pool(flags.max_proc())
-            res_list = p00l.map(run_test, testset.tests(ts))
-            total = len(res_list)
-            successes = len( [ok for ok in res_list if ok] )
-            failures = total - successes
-            width = len(str(total))
-            log("  Done on {} tests:".format(total))
-            log("  > \033[32m{0:>{width}} test(s) passed\033[0m".format(
-              successes, width=width)
-            )
-            if failures > 0:
-              log("  > \033[31m{0:>{width}} test(s) failed\033[0m".format(
-                failures, width=width)
-              )
-          new_line()
-
-    os.chdir( original_dir )
+    new_line()
+    result.pprint_summaries(results, keys)
+    differential.pprint(results)
+    # The number of workers of a distributed run is not known.
+    if flags.coordinator() == None and len(jobs) > 0:
+      schedule.pprint_makespan( "", results, makespan, flags.max_proc() )
+      new_line()
+    if len(jobs) > 0:
+      procs.pprint( "", map(result.procs, results) )
+      new_line()
+
+    schedule.update_history(history, results)
+    schedule.save_history(history_path, history)
+
+    if flags.shard() != None:
+      shard_path = shard.path(out_dir, flags.shard())
+      shard.write(shard_path, flags.shard(), parts, keys, results)
+      log( "Partial result file written to \"{}\".".format(shard_path) )
+      new_line()
 
   log("Done.")
   new_line(1)
@@ -1,10 +1,15 @@
 """
 A binary contains
 - ``"name"``: the name of the binary,
-- ``"cmd"``: the command to run the binary.
+- ``"cmd"``: the command to run the binary,
+- ``"setup"``: the setup building the binary, ``None`` if there is none, see
+  ``build``,
+- ``"reuse"``: how the binary runs several test cases in a row, ``None`` if
+  it cannot, see ``warm``.
 """
 
-import lib, iolib
+import os
+import lib, iolib, build, warm
 
 from stdout import log
 
@@ -16,6 +21,14 @@ def cmd(t):
   """The command of the binary."""
   return t["cmd"]
 
+def setup(t):
+  """The setup of the binary, ``None`` if there is none."""
+  return t["setup"]
+
+def reuse(t):
+  """The reuse of the binary, ``None`` if it cannot be reused."""
+  return t["reuse"]
+
 def cmd_joined(t):
   """The command of the binary as a string."""
   return lib.string_join(cmd(t))
@@ -25,21 +38,27 @@ def pprint(prefix, t, lvl=2):
   log( "{}{}".format(prefix, name(t)), lvl )
   log( "{}> {}".format(prefix, cmd_joined(t)), lvl )
 
-def mk(name, cmd):
+def mk(name, cmd, setup=None, reuse=None):
   """Creates a binary."""
   return {
     "name": name,
-    "cmd": iolib.split_cmd(cmd)
+    "cmd": iolib.split_cmd(cmd),
+    "setup": setup,
+    "reuse": reuse
   }
 
 def of_xml(tree):
-  """Creates a binary from an xml tree."""
+  """Creates a binary from an xml tree. The setup, if any, is not run, see
+  ``build.run_all``. It builds the executable of the command by default.
+  The binary can be reused if it has a ``reset`` attribute, see
+  ``warm.of_xml``."""
   name = tree.attrib["name"]
   cmd = tree.text
-  setup = lib.run_setup_if_any(
-    tree, "binary \"{}\"".format(name)
+  exe = iolib.split_cmd(cmd)[0]
+  return mk(
+    name, cmd, build.of_xml( tree, exe if os.sep in exe else None ),
+    warm.of_xml(tree)
   )
-  return mk(name, cmd)
 
 def dummy():
   """Creates a dummy binary."""
@@ -0,0 +1,189 @@
+"""
+Setup builds. A setup contains
+- ``"cmd"``: the command building something, e.g. a binary or an oracle,
+- ``"inputs"``: the files and directories the command builds from, relative
+  to the directory of the context, ``None`` if they are not declared,
+- ``"output"``: the file the command builds, ``None`` if unknown.
+
+The setups of all the contexts are gathered first, deduplicated by directory
+and command, and run concurrently. The output of each command goes to its own
+log file in the ``setup`` sub-directory of the output directory.
+
+A setup declaring its inputs is skipped if they hash to the stamp stored for
+it in the ``builds`` sub-directory of the cache directory, and if its output
+still exists. The stamp is updated after each successful run.
+"""
+
+import hashlib, json, os, re, subprocess
+
+from stdout import log, error, new_line
+import context as ctxt
+import executor
+import cache
+import iolib
+
+# Number of lines of the log of a failed setup shown to the user.
+_tail = 20
+
+def cmd(t):
+  """The command of a setup."""
+  return t["cmd"]
+
+def inputs(t):
+  """The inputs of a setup, ``None`` if not declared."""
+  return t["inputs"]
+
+def output(t):
+  """The output of a setup, ``None`` if unknown."""
+  return t["output"]
+
+def mk(cmd, inputs=None, output=None):
+  """Creates a setup."""
+  return { "cmd": cmd, "inputs": inputs, "output": output }
+
+def of_xml(tree, default_output=None):
+  """Creates the setup of an xml tree from its ``setup``, ``setup_inputs``
+  (whitespace-separated paths) and ``setup_output`` attributes. The output
+  defaults to ``default_output``. Returns ``None`` if there is no ``setup``
+  attribute."""
+  if "setup" not in tree.attrib.keys(): return None
+  inputs = None
+  if "setup_inputs" in tree.attrib.keys():
+    inputs = tree.attrib["setup_inputs"].split()
+  return mk(
+    tree.attrib["setup"], inputs,
+    tree.attrib.get("setup_output", default_output)
+  )
+
+def gather(contexts):
+  """The setups of some contexts as triples of an absolute directory, a setup
+  and a description, without duplicate directory and command pairs."""
+  res = []
+  seen = {}
+  for context in contexts:
+    wdir = iolib.abs_path( ctxt.wdir(context) )
+    for (setup, desc) in ctxt.setups(context):
+      k3y = (wdir, cmd(setup))
+      if k3y in seen:
+        log( "  Setup for {} is the same as for {}".format(desc, seen[k3y]) )
+      else:
+        seen[k3y] = desc
+        res.append( (wdir, setup, desc) )
+  return res
+
+def inputs_hash(wdir, setup, memo):
+  """Hashes the content of the inputs of a setup, recursively for
+  directories. ``memo`` memoizes file hashes, see ``cache.file_hash``."""
+  sha = hashlib.sha1()
+  for inpu7 in inputs(setup):
+    path = iolib.join_path(wdir, inpu7)
+    files = []
+    if os.path.isdir(path):
+      for (d1r, dirs, names) in os.walk(path):
+        dirs.sort()
+        for name in sorted(names): files.append( os.path.join(d1r, name) )
+    elif iolib.is_path_a_file(path): files.append(path)
+    else: sha.update( "missing {}\n".format(inpu7) )
+    for fil3 in files:
+      sha.update( "{}\n".format( os.path.relpath(fil3, wdir) ) )
+      sha.update( cache.file_hash(fil3, memo) )
+  return sha.hexdigest()
+
+def _key(wdir, setup):
+  """Identifies a setup by its directory and command."""
+  return hashlib.sha1( "{}\n{}".format(wdir, cmd(setup)) ).hexdigest()
+
+def dir_of(cache_dir):
+  """The directory of the stamps in a cache directory."""
+  return iolib.join_path(cache_dir, "builds")
+
+def stamp_path(cache_dir, wdir, setup):
+  """The path of the stamp of a setup."""
+  return iolib.join_path( dir_of(cache_dir), _key(wdir, setup) )
+
+def _read_stamp(path):
+  """The inputs hash stored in a stamp, ``None`` if there is none."""
+  if not iolib.is_path_a_file(path): return None
+  fil3 = open(path, "r")
+  try: return json.load(fil3)["inputs"]
+  except (ValueError, KeyError, TypeError): return None
+  finally: fil3.close()
+
+def _write_stamp(path, digest):
+  """Stores the inputs hash of a setup."""
+  tmp = iolib.tmp_path(path)
+  fil3 = open(tmp, "w")
+  try: json.dump( { "inputs": digest }, fil3 )
+  finally: fil3.close()
+  os.rename(tmp, path)
+
+def log_path(log_dir, wdir, setup, desc):
+  """The log file of a setup."""
+  name = re.sub( "[^A-Za-z0-9_.-]+", "_", desc ).strip("_")
+  return iolib.join_path(
+    log_dir, "{}_{}.log".format(name, _key(wdir, setup)[:8])
+  )
+
+def _run(task):
+  """Runs a setup unless it is up to date. Returns its description, whether
+  it ran, and its exit code. Meant to run in a thread pool."""
+  (wdir, setup, desc, cache_dir, log_dir) = task
+  stamp = stamp_path(cache_dir, wdir, setup)
+  # Hashes are computed before running, sources edited during the build will
+  # trigger a new one.
+  digest = None
+  if inputs(setup) != None:
+    digest = inputs_hash(wdir, setup, {})
+    out = output(setup)
+    if _read_stamp(stamp) == digest and (
+      out == None or iolib.is_path_a_file( iolib.join_path(wdir, out) )
+    ): return (desc, False, 0, None)
+  fil3 = open( log_path(log_dir, wdir, setup, desc), "w" )
+  try:
+    fil3.write( "# {}\n# > {}\n".format(desc, cmd(setup)) )
+    fil3.flush()
+    code = subprocess.Popen(
+      iolib.split_cmd( cmd(setup) ), stdout=fil3, stderr=subprocess.STDOUT,
+      cwd=wdir
+    ).wait()
+  except OSError as e:
+    fil3.write( "{}\n".format(e) )
+    code = 127
+  finally:
+    fil3.close()
+  if code == 0 and digest != None: _write_stamp(stamp, digest)
+  return (desc, True, code, log_path(log_dir, wdir, setup, desc))
+
+def run_all(contexts, cache_dir, log_dir, jobs):
+  """Runs the setups of some contexts with at most ``jobs`` of them at a time.
+  Returns the number of setups that failed."""
+  setups = gather(contexts)
+  if len(setups) == 0: return 0
+  iolib.mkdir(log_dir)
+  iolib.mkdir(cache_dir)
+  iolib.mkdir( dir_of(cache_dir) )
+  jobs = min( jobs, len(setups) )
+  log( "Running {} setup(s), {} at a time.".format(len(setups), jobs) )
+  ex3cutor = executor.mk("thread", jobs)
+  failed = 0
+  try:
+    for (desc, ran, code, fil3_log) in executor.imap_unordered(
+      ex3cutor, _run, [
+        (wdir, setup, desc, cache_dir, log_dir)
+        for (wdir, setup, desc) in setups
+      ]
+    ):
+      if not ran: log( "  Setup for {} is up to date".format(desc) )
+      elif code == 0: log( "  Ran setup for {}".format(desc) )
+      else:
+        failed += 1
+        error( "  Failed to run setup for {} ({})".format(desc, code) )
+        fil3 = open(fil3_log, "r")
+        try: lines = fil3.read().splitlines()
+        finally: fil3.close()
+        for line in lines[-_tail:]: error( "  | {}".format(line) )
+        error( "  full log in {}".format(fil3_log) )
+  finally:
+    executor.close(ex3cutor)
+  new_line()
+  return failed
@@ -0,0 +1,137 @@
+"""
+Result cache. The result of a job is stored under a key hashing the content
+of the files of its binary command, of its oracles, and of its test case. A job
+the key of which is in the cache is not executed, its result is the cached
+one. Editing a test case or rebuilding a binary thus only re-runs the jobs it
+affects.
+
+Entries live in the ``results`` sub-directory of the cache directory, one
+file per key. Looking an entry up refreshes its modification time, eviction
+removes the least recently used entries first.
+"""
+
+import hashlib, json, os, shutil, distutils.spawn
+
+import binary as b
+import oracle as o
+import testcase as tc
+import testexec as te
+import job as j
+import result as r
+import failure as f
+import iolib
+import flags
+
+def dir_of(cache_dir):
+  """The directory of the result cache in a cache directory."""
+  return iolib.join_path(cache_dir, "results")
+
+def file_hash(path, memo):
+  """The sha1 of the content of a file, memoized in ``memo`` along with the
+  size and modification time of the file."""
+  stat = os.stat(path)
+  stamp = (stat.st_size, stat.st_mtime)
+  if path in memo and memo[path][0] == stamp: return memo[path][1]
+  sha = hashlib.sha1()
+  fil3 = open(path, "rb")
+  try:
+    while True:
+      chunk = fil3.read(1 << 16)
+      if chunk == "": break
+      sha.update(chunk)
+  finally:
+    fil3.close()
+  memo[path] = (stamp, sha.hexdigest())
+  return memo[path][1]
+
+def command_files(cmd, wdir):
+  """The files a command mentions: its executable, looked up in the path if
+  necessary, and any argument that is an existing file, e.g. a script."""
+  files = []
+  exe = iolib.join_path(wdir, cmd[0])
+  if not iolib.is_path_a_file(exe):
+    exe = distutils.spawn.find_executable(cmd[0])
+  if exe != None: files.append(exe)
+  for arg in cmd[1:]:
+    path = iolib.join_path(wdir, arg)
+    if iolib.is_path_a_file(path): files.append(path)
+  return files
+
+def key(job, memo):
+  """The key of a job, ``memo`` memoizes file hashes across jobs."""
+  execution = j.execution(job)
+  wdir = te.wdir(execution)
+  if wdir == None: wdir = os.getcwd()
+  cmd = b.cmd( te.binary(execution) )
+  sha = hashlib.sha1()
+  sha.update( repr(cmd) )
+  for path in command_files(cmd, wdir):
+    sha.update( file_hash(path, memo) )
+  oracles = te.oracles(execution)
+  for orcl in oracles:
+    # The path of a python oracle hashes its expressions.
+    if o.kind(orcl) == "python": sha.update( o.path(orcl) )
+    else:
+      sha.update( file_hash( iolib.join_path(wdir, o.path(orcl)), memo ) )
+  # A single oracle is keyed as before oracles could be combined.
+  if len(oracles) > 1: sha.update( repr( map(o.is_global, oracles) ) )
+  test_case = te.testcase(execution)
+  sha.update( file_hash( tc.path(test_case), memo ) )
+  # Expected outputs, see ``golden``.
+  if len(oracles) == 0:
+    sha.update( repr( flags.real_tolerance() ) )
+    expected = tc.expected(test_case)
+    if expected != None and iolib.is_path_a_file(expected):
+      sha.update( file_hash(expected, memo) )
+  return sha.hexdigest()
+
+def lookup(cache_dir, k3y, job):
+  """The cached result of a job, ``None`` if there is none."""
+  path = iolib.join_path( dir_of(cache_dir), k3y )
+  if not iolib.is_path_a_file(path): return None
+  fil3 = open(path, "r")
+  try: failure = json.load(fil3)["failure"]
+  except ValueError: return None
+  finally: fil3.close()
+  # Refreshing the entry for eviction.
+  os.utime(path, None)
+  execution = j.execution(job)
+  if failure != None: failure["testcase"] = te.testcase(execution)
+  (system, binary, testset, testcase) = j.ident(job)
+  return r.mk(system, binary, testset, testcase, failure, 0.0, cached=True)
+
+def store(cache_dir, k3y, res):
+  """Stores a result in the cache. Timeouts are not stored, they depend on
+  the load of the machine more than on the files of the key."""
+  if not r.ok(res) and f.timeout( r.failure(res) ) != None: return
+  iolib.mkdir( dir_of(cache_dir) )
+  path = iolib.join_path( dir_of(cache_dir), k3y )
+  tmp = iolib.tmp_path(path)
+  fil3 = open(tmp, "w")
+  try: json.dump( { "failure": r.failure(res) }, fil3 )
+  finally: fil3.close()
+  os.rename(tmp, path)
+
+def clear(cache_dir):
+  """Removes all the entries of the cache."""
+  if os.path.isdir( dir_of(cache_dir) ): shutil.rmtree( dir_of(cache_dir) )
+
+def evict(cache_dir, max_entries):
+  """Removes the least recently used entries until there are at most
+  ``max_entries`` of them. Returns the number of entries removed."""
+  return evict_dir( dir_of(cache_dir), max_entries )
+
+def evict_dir(d1r, max_entries):
+  """Removes the least recently modified files of a directory until there
+  are at most ``max_entries`` of them, temporary files aside. Returns the
+  number of files removed."""
+  if not os.path.isdir(d1r): return 0
+  entries = [
+    iolib.join_path(d1r, name) for name in os.listdir(d1r)
+    if not name.endswith(".tmp")
+  ]
+  if len(entries) <= max_entries: return 0
+  entries.sort( key=(lambda path: os.stat(path).st_mtime) )
+  evicted = entries[:len(entries) - max_entries]
+  for path in evicted: os.remove(path)
+  return len(evicted)
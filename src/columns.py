@@ -0,0 +1,297 @@
+"""
+Compiled columnar cache for the values of csv test cases. Each csv file gets a
+cache file storing its values as typed columns:
+- ``bool`` columns are bit-packed, value ``k`` is bit ``k % 8`` of byte
+  ``k / 8``,
+- ``int`` columns are little-endian int64 arrays,
+- ``real`` and ``float`` columns are little-endian float64 arrays,
+- any other column, or a column the values of which would not print back to
+  the exact same strings, is stored as newline-separated strings,
+- unless some of its values contain a line break, the column is then stored
+  as the little-endian int64 sizes of its values followed by the values.
+
+The columns are followed by the input lines of the vectors of values, encoded
+once when the file is built, and by their offsets, see ``encoded``. Executions
+take their encoded inputs straight from the cache file, see ``inputs``, and
+values are split back from the lines unless some value contains a separator,
+in which case the typed columns are decoded.
+
+A cache file starts with a magic string, the size of a json header and the
+header itself. The header records the size, modification time and sha1 of the
+csv file it was built from, and the signature and layout of the columns and
+of the lines. Sections follow, aligned on 8 bytes. Cache files are
+memory-mapped read-only, and are only rebuilt when the csv file changes. A
+process keeps the last few ones mapped, a mapping holds a file descriptor.
+"""
+
+import array, collections, hashlib, json, mmap, os, struct, csv, threading
+
+import values as v
+import encoded as enc
+import iolib
+
+_magic = "TEASCOL2"
+_align = 8
+
+# Size in bytes of the offsets of the lines.
+_word = array.array("l").itemsize
+
+# Number of cache files a process keeps mapped.
+_mapped_size = 16
+
+# Cache files mapped by this process, by path, along with their header, least
+# recently used first.
+_mapped = collections.OrderedDict()
+
+# Protects ``_mapped``, shared by the threads of the thread backend and of
+# workers.
+_lock = threading.Lock()
+
+# The values of the eight bits of each byte, for decoding bool columns.
+_bits = [
+  tuple( "true" if (byte >> k) & 1 else "false" for k in range(0, 8) )
+  for byte in range(0, 256)
+]
+
+def dir_of(cache_dir):
+  """The directory of the columnar cache in a cache directory."""
+  return iolib.join_path(cache_dir, "values")
+
+def path(cache_dir, csv_path):
+  """The path of the cache file of a csv file."""
+  name = hashlib.sha1( iolib.abs_path(csv_path) ).hexdigest()
+  return iolib.join_path( dir_of(cache_dir), "{}.cols".format(name) )
+
+def _sha1(csv_path):
+  """The sha1 of the content of a file."""
+  fil3 = open(csv_path, "rb")
+  try: return hashlib.sha1( fil3.read() ).hexdigest()
+  finally: fil3.close()
+
+def _bool_str(b):
+  """Prints a boolean value."""
+  if b: return "true"
+  else: return "false"
+
+def _encode(typ3, vals):
+  """Encodes a column, returns its kind and its bytes."""
+  try:
+    if typ3 == "bool":
+      bools = map(iolib.bool_of_str, vals)
+      if map(_bool_str, bools) == vals:
+        packed = bytearray( (len(bools) + 7) / 8 )
+        for k in range(0, len(bools)):
+          if bools[k]: packed[k / 8] |= 1 << (k % 8)
+        return ("bool", str(packed))
+    elif typ3 == "int":
+      ints = map(int, vals)
+      if map(str, ints) == vals:
+        return ("int", struct.pack("<{}q".format(len(ints)), *ints))
+    elif typ3 in ["real", "float"]:
+      floats = map(float, vals)
+      if map(repr, floats) == vals:
+        return ("float", struct.pack("<{}d".format(len(floats)), *floats))
+  except (TypeError, ValueError, struct.error): ()
+  if any( "\n" in val for val in vals ):
+    sizes = struct.pack( "<{}q".format(len(vals)), *map(len, vals) )
+    return ("sized", sizes + "".join(vals))
+  return ("str", "\n".join(vals))
+
+def _decode(kind, data, length):
+  """Decodes a column to the strings it was built from."""
+  if kind == "bool":
+    decoded = []
+    for byte in bytearray(data): decoded.extend( _bits[byte] )
+    return decoded[:length]
+  elif kind == "int":
+    return map( str, struct.unpack("<{}q".format(length), data) )
+  elif kind == "float":
+    return map( repr, struct.unpack("<{}d".format(length), data) )
+  elif kind == "sized":
+    decoded = []
+    offset = 8 * length
+    for size in struct.unpack_from("<{}q".format(length), data):
+      decoded.append( data[offset:offset + size] )
+      offset += size
+    return decoded
+  elif length == 0: return []
+  else: return data.split("\n")
+
+def build(csv_path, cache_path):
+  """Compiles a csv file to a cache file."""
+  stat = os.stat(csv_path)
+  fil3 = open(csv_path, "rb")
+  try: rows = map( lambda row: row, csv.reader(fil3, delimiter=",") )
+  finally: fil3.close()
+  length = len(rows[0]) - 2
+  for row in rows:
+    if len(row) - 2 != length: raise Exception(
+      "file \"{}\" is ill-formed: value sequences are inconsistent".format(
+        csv_path
+      )
+    )
+
+  blobs = []
+  def section(data):
+    offset = sum( map(len, blobs) )
+    blobs.append( data + "\0" * ( (- len(data)) % _align ) )
+    return { "offset": offset, "size": len(data) }
+
+  columns = []
+  for row in rows:
+    (kind, data) = _encode(row[1], row[2:])
+    columns.append( dict( section(data), kind=kind ) )
+  # Same layout as ``values.of_csv``.
+  seq = zip( *[ row[2:] for row in rows ] )[:length - 1]
+  lines = enc.of_steps(seq)
+
+  _write( cache_path, {
+    "size": stat.st_size, "mtime": stat.st_mtime, "sha1": _sha1(csv_path),
+    "length": length,
+    "ids": map( lambda row: row[0], rows ),
+    "types": map( lambda row: row[1], rows ),
+    "columns": columns,
+    "lines": section( enc.blob(lines) ),
+    "offsets": section( enc.offsets(lines).tostring() ),
+    "word": _word,
+    "split": not any(
+      ", " in value or "\n" in value for row in rows for value in row[2:]
+    ),
+  }, blobs )
+
+def _write(cache_path, header, blobs):
+  """Writes a cache file from its header and the blobs of its columns."""
+  header = json.dumps(header)
+  padding = (- len(_magic) - 4 - len(header)) % _align
+  header = header + " " * padding
+
+  # Creating the cache directory if necessary, workers may not have one.
+  iolib.mkdir( os.path.dirname( os.path.dirname(cache_path) ) )
+  iolib.mkdir( os.path.dirname(cache_path) )
+  tmp = iolib.tmp_path(cache_path)
+  fil3 = open(tmp, "wb")
+  try:
+    fil3.write( _magic )
+    fil3.write( struct.pack("<I", len(header)) )
+    fil3.write( header )
+    for blob in blobs: fil3.write(blob)
+  finally:
+    fil3.close()
+  os.rename(tmp, cache_path)
+
+def _map(cache_path):
+  """Maps a cache file read-only, returns the mapping and the header and
+  the offset of the columns, ``None`` if the file is ill-formed."""
+  fil3 = open(cache_path, "rb")
+  try:
+    if os.fstat( fil3.fileno() ).st_size < len(_magic) + 4: return None
+    mapping = mmap.mmap( fil3.fileno(), 0, access=mmap.ACCESS_READ )
+  finally:
+    fil3.close()
+  if mapping[:len(_magic)] != _magic:
+    mapping.close()
+    return None
+  (size,) = struct.unpack_from("<I", mapping, len(_magic))
+  start = len(_magic) + 4
+  try: header = json.loads( mapping[start:start + size] )
+  except ValueError:
+    mapping.close()
+    return None
+  # Json strings are unicode, csv values are not.
+  header["ids"] = map( str, header["ids"] )
+  header["types"] = map( str, header["types"] )
+  return (mapping, header, start + size)
+
+def _up_to_date(cache_path, mapped, csv_path):
+  """The mapping of a cache file if it was built from the current version of
+  a csv file, ``None`` otherwise, in which case the mapping is closed. The
+  modification time of a csv file touched but not changed is recorded in the
+  cache file, so that later loads do not hash it again."""
+  (mapping, header, _) = mapped
+  stat = os.stat(csv_path)
+  if header.get("word") == _word and header["size"] == stat.st_size:
+    if header["mtime"] == stat.st_mtime: return mapped
+    if header["sha1"] == _sha1(csv_path):
+      return _restamp(cache_path, mapped, stat)
+  mapping.close()
+  return None
+
+def _restamp(cache_path, mapped, stat):
+  """Rewrites a mapped cache file with the modification time ``stat`` of its
+  csv file, the content of which did not change. Sections are copied as is.
+  Closes the mapping and returns the new one."""
+  (mapping, header, start) = mapped
+  header = dict(header)
+  header["mtime"] = stat.st_mtime
+  _write( cache_path, header, [ mapping[start:] ] )
+  mapping.close()
+  return _map(cache_path)
+
+def _acquire(csv_path, cache_path):
+  """The mapping of the cache file of a csv file, built if it does not exist
+  or is not up to date. The caller owns the mapping until it gives it back
+  with ``_release``, so that no other thread unmaps it meanwhile."""
+  with _lock: mapped = _mapped.pop(cache_path, None)
+  if mapped != None: mapped = _up_to_date(cache_path, mapped, csv_path)
+  if mapped == None and iolib.is_path_a_file(cache_path):
+    mapped = _map(cache_path)
+    if mapped != None: mapped = _up_to_date(cache_path, mapped, csv_path)
+  if mapped == None:
+    build(csv_path, cache_path)
+    mapped = _map(cache_path)
+  return mapped
+
+def _release(cache_path, mapped):
+  """Gives back the mapping of a cache file, see ``_acquire``. Unmaps the
+  least recently used cache files beyond ``_mapped_size``."""
+  with _lock:
+    unmapped = [ _mapped.pop(cache_path, None) ]
+    _mapped[cache_path] = mapped
+    while len(_mapped) > _mapped_size:
+      unmapped.append( _mapped.popitem(last=False)[1] )
+  for old in unmapped:
+    if old != None: old[0].close()
+
+def _section(mapped, section):
+  """The bytes of a section of a mapped cache file."""
+  (mapping, _, start) = mapped
+  start += section["offset"]
+  return mapping[ start:start + section["size"] ]
+
+def load(csv_path, cache_path):
+  """Loads the values of a csv file from its cache file, building the latter
+  if it does not exist or is not up to date."""
+  mapped = _acquire(csv_path, cache_path)
+  try:
+    header = mapped[1]
+    length = header["length"]
+    if header["split"]:
+      lines = _section( mapped, header["lines"] ).split("\n")
+      seq = [ line.split(", ") for line in lines[:len(lines) - 1] ]
+    else:
+      cols = [
+        _decode( col["kind"], _section(mapped, col), length )
+        for col in header["columns"]
+      ]
+      # Same layout as ``values.of_csv``.
+      seq = map( list, zip(*cols)[:length - 1] )
+  finally:
+    _release(cache_path, mapped)
+  return v.mk(
+    len( header["ids"] ), length, list(header["ids"]),
+    list(header["types"]), seq
+  )
+
+def inputs(csv_path, cache_path):
+  """The encoded input lines of the steps of a csv file, read from its cache
+  file, see ``encoded``. The steps are all the vectors of values but the last
+  one, see ``testexec.steps``."""
+  mapped = _acquire(csv_path, cache_path)
+  try:
+    offs = array.array("l")
+    offs.fromstring( _section( mapped, mapped[1]["offsets"] ) )
+    if len(offs) > 1: offs.pop()
+    blob = _section( mapped, mapped[1]["lines"] )[:offs[-1]]
+  finally:
+    _release(cache_path, mapped)
+  return enc.mk(blob, offs)
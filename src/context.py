@@ -1,7 +1,9 @@
 """
 Module for the context of test execution for a system. A context contains
 - ``"system"``: the name of the original system,
-- ``"oracle"``: the oracle for that system,
+- ``"oracles"``: the oracles for that system, see ``oracle``, none to check
+  the outputs of the binaries against the expected outputs of the test cases,
+  see ``golden``,
 - ``"tests"``: a sequence of paths to the test sets for that system.
 """
 
@@ -17,9 +19,13 @@ def system(t):
   """The system of a context."""
   return t["system"]
 
+def oracles(t):
+  """The oracles of a context."""
+  return t["oracles"]
+
 def oracle(t):
-  """The oracle of a context."""
-  return t["oracle"]
+  """The first oracle of a context."""
+  return oracles(t)[0]
 
 def tests(t):
   """The test sets of a context."""
@@ -36,8 +42,11 @@ def wdir(t):
 def pprint(prefix, t, lvl=2):
   """Prints a context."""
   log( "{}system \"{}\"".format(prefix, system(t)), lvl )
-  log( "{}  oracle:".format(prefix), lvl )
-  oracl3.pprint("{}    ".format(prefix), oracle(t), lvl)
+  log( "{}  oracles:".format(prefix), lvl )
+  if len( oracles(t) ) == 0:
+    log( "{}    none, expected outputs".format(prefix), lvl )
+  for orcl in oracles(t):
+    oracl3.pprint("{}    ".format(prefix), orcl, lvl)
   log( "{}  test sets:".format(prefix), lvl )
   for test in tests(t):
     log( "{}    {}".format(prefix, test), lvl )
@@ -45,11 +54,11 @@ def pprint(prefix, t, lvl=2):
   for binar in bins(t):
     b.pprint("{}    ".format(prefix), binar, lvl )
 
-def mk(wdir, system, oracle, tests, bins):
+def mk(wdir, system, oracles, tests, bins):
   """Creates a context."""
   return {
     "wdir": wdir,
-    "system": system, "oracle": oracle, "tests": tests, "bins": bins
+    "system": system, "oracles": oracles, "tests": tests, "bins": bins
   }
 
 
@@ -62,7 +71,14 @@ def of_xml(wdir, tree):
   log( "changing to dir {}".format(wdir) )
   os.chdir( wdir )
   system = tree.attrib["system"]
-  oracle = oracl3.of_xml(tree)
+  # Without oracles, test cases are checked against their expected outputs,
+  # see ``golden``.
+  oracles = oracl3.all_of_xml(tree)
+  if len( set( map(oracl3.kind, oracles) ) ) > 1: raise Exception(
+    "illegal test file: python and process oracles for system \"{}\"".format(
+      system
+    )
+  )
   test_sets = map(
     (lambda t: t.text),
     tree.findall("tests")
@@ -72,16 +88,35 @@ def of_xml(wdir, tree):
     tree.findall("binary")
   )
   os.chdir( original_dir )
-  return mk(wdir, system, oracle, test_sets, bins)
+  return mk(wdir, system, oracles, test_sets, bins)
 
 def of_file(path):
   """Creates a context from an xml file."""
   xml_tree = xet.parse(path)
   root = xml_tree.getroot()
   wdir = os.path.split(path)[0]
+  if wdir == "": wdir = os.curdir
   log( "dir: {}".format(dir) )
   return of_xml(wdir, root)
 
+def setups(t):
+  """The setups of the oracles and of the binaries of a context, as pairs of a
+  setup and a description of what it builds."""
+  res = []
+  for orcl in oracles(t):
+    if oracl3.setup(orcl) != None: res.append( (
+      oracl3.setup(orcl), "oracle \"{}\" of system \"{}\"".format(
+        oracl3.path(orcl), system(t)
+      )
+    ) )
+  for bin4ry in bins(t):
+    if b.setup(bin4ry) != None: res.append( (
+      b.setup(bin4ry), "binary \"{}\" of system \"{}\"".format(
+        b.name(bin4ry), system(t)
+      )
+    ) )
+  return res
+
 def testset_num(t, i):
   """Loads and returns the ``i``th test set in the context."""
   return ts.of_file( tests(t)[i] )
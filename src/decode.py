@@ -0,0 +1,122 @@
+"""
+Incremental decoding of the outputs of binaries and oracles. Processes write
+records, either lines of comma separated values (format ``csv``) or tuples of
+comma separated values between parens (format ``tuple``, as in ``(a, b) (c,
+d)``), which are read from their pipes in chunks that can end anywhere in a
+record. A decoder contains
+- ``"fd"``: the file descriptor it reads from, ``None`` if it is fed chunks,
+  see ``feed``,
+- ``"format"``: the format of the records,
+- ``"buf"``: the bytes read and not consumed yet, after ``"pos"``,
+- ``"pos"``: the offset of the first byte not consumed,
+- ``"scan"``: the offset from which the buffer is searched for the end of the
+  next record, the bytes before it belong to complete records or to the
+  current partial one,
+- ``"eof"``: true iff the end of the output was reached.
+
+Each byte is searched once for the end of its record, and the buffer is
+compacted in place once its consumed prefix is larger than the rest, so that
+decoding is linear in the size of the output even when records are long and
+arrive piecewise.
+"""
+
+import errno, os, select, time
+
+# Size in bytes of the reads of decoders.
+_read_size = 1 << 16
+
+# Byte ending a record of each format.
+_ends = { "csv": "\n", "tuple": ")" }
+
+def mk(fd, form4t="csv"):
+  """Creates a decoder of the records of format ``form4t`` read from file
+  descriptor ``fd``, fed chunks if ``None``."""
+  return {
+    "fd": fd, "format": form4t, "buf": bytearray(), "pos": 0, "scan": 0,
+    "eof": False
+  }
+
+def of_file(fil3, form4t="csv"):
+  """Creates a decoder on a pipe. Reading records through a decoder instead
+  of the pipe itself allows to wait for them with a deadline."""
+  return mk( fil3.fileno(), form4t )
+
+def feed(t, data):
+  """Appends a chunk of output to a decoder, the empty string marks the end
+  of the output."""
+  if data == "":
+    t["eof"] = True
+    return
+  buf = t["buf"]
+  if t["pos"] > 0 and 2 * t["pos"] >= len(buf):
+    del buf[ :t["pos"] ]
+    t["scan"] -= t["pos"]
+    t["pos"] = 0
+  buf.extend(data)
+
+def _fill(t, deadline):
+  """Reads a chunk from the file descriptor of a decoder, waiting at most
+  until time ``deadline``, forever if ``None``. Returns false on timeout."""
+  while deadline != None:
+    remaining = deadline - time.time()
+    if remaining <= 0: return False
+    try: ready = select.select( [ t["fd"] ], [], [], remaining )[0]
+    except select.error as e:
+      if e.args[0] == errno.EINTR: continue
+      raise
+    if len(ready) == 0: return False
+    break
+  feed( t, os.read(t["fd"], _read_size) )
+  return True
+
+def _take(t, end):
+  """Consumes the bytes of a decoder up to offset ``end``, excluded."""
+  record = str( t["buf"][ t["pos"]:end ] )
+  t["pos"] = end
+  if t["scan"] < end: t["scan"] = end
+  return record
+
+def read(t, deadline=None):
+  """Reads a record from a decoder, waiting at most until time ``deadline``,
+  forever if ``None``. Returns the record with its end, what is left without
+  end on end of output, ``None`` on timeout."""
+  end_byte = _ends[ t["format"] ]
+  while True:
+    end = t["buf"].find( end_byte, t["scan"] )
+    if end != -1: return _take(t, end + 1)
+    t["scan"] = len( t["buf"] )
+    if t["eof"]: return _take( t, len(t["buf"]) )
+    if t["fd"] == None or not _fill(t, deadline): return None
+
+def complete(t):
+  """The number of complete records a decoder already read."""
+  return t["buf"].count( _ends[ t["format"] ], t["pos"] )
+
+def take(t, n):
+  """Takes ``n`` complete records a decoder already read, without their
+  ends, see ``complete``."""
+  end_byte = _ends[ t["format"] ]
+  records = []
+  for _ in range(n):
+    end = t["buf"].index( end_byte, t["pos"] )
+    records.append( _take(t, end + 1)[:-1] )
+  return records
+
+def fields(record, form4t="csv"):
+  """The values of a record, without spaces around them."""
+  if form4t == "tuple":
+    record = record.strip().lstrip("(")
+    if record.endswith(")"): record = record[:-1]
+  return [ value.strip() for value in record.split(",") ]
+
+def typed(record, parsers, form4t="csv"):
+  """The values of a record converted by their respective ``parsers``.
+  Raises a ``ValueError`` if the record does not have a value per parser or
+  if a parser fails."""
+  values = fields(record, form4t)
+  if len(values) != len(parsers): raise ValueError(
+    "expected {} values but found {} in \"{}\"".format(
+      len(parsers), len(values), record.strip()
+    )
+  )
+  return [ parser(value) for (parser, value) in zip(parsers, values) ]
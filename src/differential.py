@@ -0,0 +1,51 @@
+"""
+Differential execution. In differential mode, the jobs running the binaries
+of a context on the same test case are grouped and run one after the other by
+the same worker, see ``job.run_group``. The input steps of the test case are
+loaded once for all of them and each binary gets its own oracle. The output
+traces of the binaries are then compared step by step, so that the first
+divergence is reported even if every oracle accepts every trace.
+
+A divergence is a pair of the step at which the outputs of the binaries first
+differ, and of a map from the names of the binaries to their output line at
+that step. Only the steps all the binaries reached are compared, a binary
+stopping early on a failure does not diverge. Values are compared after
+stripping spaces.
+"""
+
+from stdout import log, new_line
+import result as r
+import decode
+
+def _values(line):
+  """The values of an output line."""
+  return tuple( decode.fields(line) )
+
+def first(traces):
+  """The first divergence of some output traces given as pairs of a binary
+  name and a list of output lines, ``None`` if they agree on all the steps
+  they reached."""
+  if len(traces) < 2: return None
+  length = min( len(lines) for (_, lines) in traces )
+  for k in range(0, length):
+    if len( set( _values(lines[k]) for (_, lines) in traces ) ) > 1:
+      return ( k, dict( (name, lines[k]) for (name, lines) in traces ) )
+  return None
+
+def pprint(results, lvl=2):
+  """Prints the divergences of some results, once per test case, in test case
+  order."""
+  seen = set()
+  for res in sorted(results, key=r.ident):
+    divergence = r.divergence(res)
+    k3y = ( r.system(res), r.testset(res), r.testcase(res) )
+    if divergence == None or k3y in seen: continue
+    if len(seen) == 0: log( "Divergences:", lvl )
+    seen.add(k3y)
+    (k, outputs) = divergence
+    log( "  system \"{}\", test set {}, test case \"{}\", at step {}:".format(
+      k3y[0], k3y[1], k3y[2], k
+    ), lvl )
+    for name in sorted( outputs.keys() ):
+      log( "  | {}: {}".format(name, outputs[name]), lvl )
+  if len(seen) > 0: new_line(lvl)
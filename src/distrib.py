@@ -0,0 +1,175 @@
+"""
+Distributed runs. A coordinator holds the jobs of a run and serves them to
+workers connecting over TCP (``host:port``) or a Unix socket
+(``unix:path``). Workers pull jobs one at a time, run them locally and send
+the results back. If the connection to a worker is lost, the job it was
+running goes back to the front of the queue for another worker to pick up.
+
+Workers run jobs as they are, so the paths of the contexts and test cases
+must be the same for the coordinator and the workers, e.g. on a shared file
+system. Connections are authenticated with the key in environment variable
+``TEAS_AUTHKEY``. Messages are pickles, which can run arbitrary code when
+loaded, so TCP addresses require a key: anyone reaching the port could run
+code on the coordinator or the workers otherwise. Unix sockets, protected by
+the permissions of their file, default to key ``teas``.
+
+Messages are tuples. A worker sends ``("ready",)`` when it connects, then
+``("result", i, result)`` or ``("error", i, message)`` after running job
+``i``. The coordinator answers each of them with ``("job", i, job,
+settings)`` or ``("done",)`` once all the results are in. The settings are
+the flags of the coordinator test executions depend on, see
+``flags.execution_settings``.
+"""
+
+import collections, os, socket, threading, time, Queue
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+from stdout import log, warning
+from excs import ExecError
+import job as j
+import lib, flags
+
+max_reconnect = 20
+
+def of_string(s):
+  """Parses an address, raises a ``ValueError`` in case of failure. Returns
+  the address and its multiprocessing family."""
+  if s.startswith("unix:"): return (s[5:], "AF_UNIX")
+  split = s.rsplit(":", 1)
+  if len(split) != 2 or split[0] == "": raise ValueError(
+    "expected \"host:port\" or \"unix:path\" but found \"{}\"".format(s)
+  )
+  return ( (split[0], lib.int_of_string(split[1])), "AF_INET" )
+
+def authkey(address):
+  """The key authenticating connections to an address, raises a
+  ``ValueError`` if the address is a TCP one and there is no key."""
+  (addr, family) = address
+  key = os.environ.get("TEAS_AUTHKEY")
+  if key != None and key != "": return key
+  if family == "AF_UNIX": return "teas"
+  raise ValueError(
+    "TCP address \"{}:{}\" requires a key in environment variable "
+    "TEAS_AUTHKEY, connections exchange pickles".format(addr[0], addr[1])
+  )
+
+def coordinate(address, jobs):
+  """Serves some jobs to the workers connecting to ``address``. Yields the
+  results in completion order, raises an ``ExecError`` if a job crashes on a
+  worker."""
+  (addr, family) = address
+  settings = flags.execution_settings()
+  lock = threading.Condition()
+  queue = collections.deque( enumerate(jobs) )
+  done = set()
+  results = Queue.Queue()
+
+  def next_job():
+    """Waits for a job to run, ``None`` if all results are in."""
+    with lock:
+      while len(queue) == 0 and len(done) < len(jobs): lock.wait(1.0)
+      if len(queue) == 0: return None
+      else: return queue.popleft()
+
+  def serve(conn):
+    """Serves jobs to a worker until all results are in or the connection is
+    lost."""
+    current = None
+    try:
+      while True:
+        msg = conn.recv()
+        if msg[0] in ["result", "error"]:
+          with lock:
+            if msg[1] not in done:
+              done.add( msg[1] )
+              results.put( msg )
+            current = None
+            lock.notify_all()
+        current = next_job()
+        if current == None:
+          conn.send( ("done",) )
+          return
+        conn.send( ("job",) + current + (settings,) )
+    except (EOFError, IOError, OSError):
+      if current != None:
+        warning( "lost worker, re-queueing job {}".format(current[0]) )
+        with lock:
+          if current[0] not in done: queue.appendleft(current)
+          lock.notify_all()
+    finally:
+      conn.close()
+
+  def accept(listener):
+    """Accepts workers and serves each of them in its own thread."""
+    while True:
+      try: conn = listener.accept()
+      except AuthenticationError:
+        warning( "rejected worker, authentication failed" )
+        continue
+      except (IOError, OSError): return
+      server = threading.Thread(target=serve, args=(conn,))
+      server.daemon = True
+      server.start()
+
+  listener = Listener(addr, family, authkey=authkey(address))
+  try:
+    log( "Waiting for workers on {}.".format(listener.address) )
+    acceptor = threading.Thread(target=accept, args=(listener,))
+    acceptor.daemon = True
+    acceptor.start()
+    for _ in range(0, len(jobs)):
+      # Blocking without a timeout would ignore keyboard interrupts.
+      while True:
+        try:
+          msg = results.get(True, 1.0)
+          break
+        except Queue.Empty: ()
+      if msg[0] == "error":
+        job = jobs[ msg[1] ]
+        raise ExecError( msg[2], j.key(job)[1], j.ident(job)[3] )
+      yield msg[2]
+  finally:
+    listener.close()
+
+def _connect(address):
+  """Connects to a coordinator, retrying for a while if it is not there
+  yet."""
+  (addr, family) = address
+  for attempt in range(0, max_reconnect):
+    try: return Client(addr, family, authkey=authkey(address))
+    except (socket.error, IOError, OSError):
+      if attempt + 1 == max_reconnect: raise
+      time.sleep(0.5)
+
+def work(address, threads):
+  """Pulls jobs from the coordinator at ``address`` and runs them with
+  ``threads`` jobs at a time until the coordinator is done. Returns the
+  number of jobs ran."""
+  counts = []
+
+  def loop():
+    conn = _connect(address)
+    count = 0
+    try:
+      conn.send( ("ready",) )
+      while True:
+        msg = conn.recv()
+        if msg[0] == "done": break
+        (_, i, job, settings) = msg
+        flags.set_execution_settings(settings)
+        try: res = ("result", i, j.run(job))
+        except Exception as e: res = ("error", i, "{}".format(e))
+        conn.send(res)
+        count += 1
+    except (EOFError, IOError, OSError):
+      warning( "lost connection to coordinator" )
+    finally:
+      conn.close()
+      counts.append(count)
+
+  workers = [
+    threading.Thread(target=loop) for _ in range(0, max(threads, 1))
+  ]
+  for worker in workers: worker.start()
+  for worker in workers: worker.join()
+  return sum(counts)
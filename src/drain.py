@@ -0,0 +1,99 @@
+"""
+Stderr drains. A drain reads the stderr of a process from its own thread as
+it is written, so that a process writing a lot on stderr never blocks on a
+full pipe. A drain contains
+- ``"proc"``: the process drained,
+- ``"path"``: the file the overflow of the buffer is spilled to,
+- ``"chunks"``: the chunks of stderr in the buffer, oldest first,
+- ``"size"``: the size of the buffer in bytes,
+- ``"spilled"``: true iff the buffer overflowed,
+- ``"spill"``: the spill file once opened, ``None`` before,
+- ``"lock"``: protects the buffer and the spill file,
+- ``"thread"``: the thread reading stderr.
+
+The buffer is a ring keeping the last ``capacity`` bytes of stderr. Older
+chunks are written to the spill file, which is only created if the buffer
+overflows. The drain closes the stderr pipe of the process when it reaches
+the end of it. A drain can be moved to another spill file when its process
+starts working on something else, see ``rebind``.
+"""
+
+import collections, os, threading
+
+# Size in bytes of the buffer of a drain.
+capacity = 1 << 16
+
+# Size in bytes of the reads on the stderr of a process.
+_chunk_size = 1 << 12
+
+def proc(t):
+  """The process of a drain."""
+  return t["proc"]
+
+def path(t):
+  """The spill file of a drain."""
+  return t["path"]
+
+def spilled(t):
+  """True iff the buffer of a drain overflowed to its spill file."""
+  return t["spilled"]
+
+def mk(process, spill_path):
+  """Creates a drain for a process and starts it."""
+  t = {
+    "proc": process, "path": spill_path,
+    "chunks": collections.deque(), "size": 0, "spilled": False,
+    "spill": None, "lock": threading.Lock(), "thread": None
+  }
+  t["thread"] = threading.Thread( target=_drain, args=(t,) )
+  t["thread"].daemon = True
+  t["thread"].start()
+  return t
+
+def _drain(t):
+  """Reads the stderr of the process of a drain until its end."""
+  stderr = proc(t).stderr
+  try:
+    while True:
+      try: data = os.read( stderr.fileno(), _chunk_size )
+      except OSError: break
+      if data == "": break
+      with t["lock"]:
+        t["chunks"].append(data)
+        t["size"] += len(data)
+        while t["size"] > capacity:
+          old = t["chunks"].popleft()
+          t["size"] -= len(old)
+          if t["spill"] == None:
+            t["spill"] = open( path(t), "wb" )
+            t["spilled"] = True
+          t["spill"].write(old)
+  except (IOError, OSError): ()
+  finally:
+    with t["lock"]:
+      if t["spill"] != None: t["spill"].close()
+      t["spill"] = None
+    stderr.close()
+
+def rebind(t, spill_path):
+  """Forgets what a drain read so far and moves it to another spill file."""
+  with t["lock"]:
+    if t["spill"] != None: t["spill"].close()
+    t["spill"] = None
+    t["chunks"].clear()
+    t["size"] = 0
+    t["spilled"] = False
+    t["path"] = spill_path
+
+def wait(t, timeout):
+  """Waits at most ``timeout`` seconds for the process of a drain to close
+  its stderr. Returns true iff it did."""
+  t["thread"].join(timeout)
+  return not t["thread"].is_alive()
+
+def tail(t, count):
+  """The last ``count`` lines in the buffer of a drain."""
+  with t["lock"]:
+    content = "".join( t["chunks"] )
+  lines = content.splitlines()
+  return lines[ max(len(lines) - count, 0): ]
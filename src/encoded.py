@@ -0,0 +1,80 @@
+"""
+Encoded inputs. The input steps of a test case are encoded once into the
+input lines of all its steps, stored back to back in a single string. Encoded
+inputs contain
+- ``"blob"``: the input lines of the steps, each ending with a line break,
+- ``"offsets"``: the offset of the line of each step in the blob, followed by
+  the size of the blob.
+
+The input line of a step, and the lines of consecutive steps, are slices of
+the blob: a step is written to a process in one write in lockstep mode, and
+whole chunks of steps in one write in the other modes, see ``chunks``. The
+lines fed to the oracles are the input lines of the steps followed by the
+output lines of the binary.
+
+The binaries running on the same test case in differential mode share its
+encoded inputs, see ``job.run_group``. With the values cache, test cases are
+encoded once when their cache file is built and read back already encoded by
+all the workers, see ``of_testcase``.
+"""
+
+import array, bisect
+
+import testcase as tc
+
+def blob(t):
+  """The input lines of encoded inputs."""
+  return t["blob"]
+
+def offsets(t):
+  """The offsets of the input lines of encoded inputs."""
+  return t["offsets"]
+
+def count(t):
+  """The number of steps of encoded inputs."""
+  return len( offsets(t) ) - 1
+
+def line(t, k):
+  """The input line of step ``k``, without line break."""
+  return blob(t)[ offsets(t)[k]:offsets(t)[k + 1] - 1 ]
+
+def chunk(t, start, stop):
+  """The input lines of the steps from ``start`` to ``stop`` excluded, with
+  their line breaks."""
+  return blob(t)[ offsets(t)[start]:offsets(t)[stop] ]
+
+def chunks(t, size):
+  """The bounds of consecutive slices of the steps of encoded inputs covering
+  all of them. Each slice is the shortest one spanning at least ``size``
+  bytes, but the last which can be shorter."""
+  offs = offsets(t)
+  start = 0
+  while start < count(t):
+    stop = bisect.bisect_left( offs, offs[start] + size, start + 1 )
+    stop = min( stop, count(t) )
+    yield (start, stop)
+    start = stop
+
+def mk(blob, offsets):
+  """Creates encoded inputs."""
+  return { "blob": blob, "offsets": offsets }
+
+def of_steps(steps):
+  """Encodes some input steps given as lists of values, possibly lazily."""
+  lines = []
+  offs = array.array("l", [0])
+  size = 0
+  for values in steps:
+    lin3 = ", ".join(values) + "\n"
+    lines.append(lin3)
+    size += len(lin3)
+    offs.append(size)
+  return mk( "".join(lines), offs )
+
+def of_testcase(test_case, steps):
+  """The encoded inputs of a test case, where ``steps`` produces its input
+  steps, possibly lazily. Read from the values cache instead if it is
+  enabled, see ``testcase.load_inputs``."""
+  res = tc.load_inputs(test_case)
+  if res != None: return res
+  return of_steps(steps)
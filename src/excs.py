@@ -4,10 +4,12 @@ Exception module.
 
 class IOLibError(Exception):
     def __init__(self,msg):
+        # Passing the message on so that workers can pickle the error.
+        Exception.__init__(self, msg)
         self.msg = msg
 
     def __str__(self):
-        return "[IOLib] {}".format(msg)
+        return "[IOLib] {}".format(self.msg)
 
 class InputSeqError(Exception):
     def __init__(self, msg, fil3, line, form4t):
@@ -34,6 +36,8 @@ class TestCtxtError(Exception):
 
 class ExecError(Exception):
     def __init__(self, msg, bin_name, test_name):
+        # Passing the arguments on so that workers can pickle the error.
+        Exception.__init__(self, msg, bin_name, test_name)
         self.msg = msg
         self.bin_name = bin_name
         self.test_name = test_name
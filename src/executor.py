@@ -0,0 +1,53 @@
+"""
+An executor runs jobs in parallel and yields their results as they complete.
+An executor contains
+- ``"backend"``: the backend running the jobs, see ``backends``,
+- ``"workers"``: the number of jobs running at the same time,
+- ``"pool"``: the underlying pool, ``None`` when running sequentially.
+
+Jobs spend most of their time waiting on the pipes of the binary and the
+oracle, so the ``thread`` backend scales about as well as the ``process`` one
+without forking the python interpreter.
+"""
+
+import multiprocessing, multiprocessing.pool
+
+_backends = ["process", "thread"]
+
+def backends():
+  """The legal backends."""
+  return _backends
+
+def backend(t):
+  """The backend of an executor."""
+  return t["backend"]
+
+def workers(t):
+  """The number of workers of an executor."""
+  return t["workers"]
+
+def pool(t):
+  """The pool of an executor."""
+  return t["pool"]
+
+def mk(backend, workers):
+  """Creates an executor. Runs jobs sequentially if ``workers <= 1``."""
+  if backend not in _backends: raise ValueError(
+    "unknown backend \"{}\"".format(backend)
+  )
+  if workers <= 1: p00l = None
+  elif backend == "process": p00l = multiprocessing.Pool(workers)
+  else: p00l = multiprocessing.pool.ThreadPool(workers)
+  return { "backend": backend, "workers": workers, "pool": p00l }
+
+def imap_unordered(t, fun, jobs):
+  """Applies ``fun`` to the jobs, yields results in completion order. Jobs
+  are started in the order they are given."""
+  if pool(t) == None: return ( fun(job) for job in jobs )
+  else: return pool(t).imap_unordered(fun, jobs)
+
+def close(t):
+  """Waits for the workers of an executor to finish and releases them."""
+  if pool(t) == None: return
+  pool(t).close()
+  pool(t).join()
@@ -11,7 +11,15 @@ A failure necessarily contains
 As a failure is propagated upward from ``check_values`` in the ``oracle``
 module to the top level, it will be augmented with
 - ``"at"``: the step in the test case where the failure occured,
-- ``"testcase"``: the test case on which the failure occured.
+- ``"testcase"``: the test case on which the failure occured,
+- ``"stderr"``: the last lines the binary and the oracle wrote on stderr, by
+  process name, along with the file older lines were spilled to if any,
+- ``"oracles"``: the paths of the oracles that rejected the step, when there
+  are several, see ``merge``.
+
+A timeout is a failure with no falsified contract and a ``"timeout"`` field,
+see ``mk_timeout``. So is a mismatch with the expected outputs of a test case
+with a ``"mismatch"`` field, see ``mk_mismatch``.
 """
 
 from stdout import log
@@ -42,9 +50,50 @@ def testcase(t):
   """The testcase on which the failure occured."""
   return t["testcase"]
 
+def timeout(t):
+  """For a timeout, the process that did not answer in time along with the
+  limit exceeded and its value in seconds. ``None`` for other failures."""
+  return t.get("timeout")
+
+def mismatch(t):
+  """For a mismatch, the output that differs from its expected value (``None``
+  if the whole step does) along with the expected and actual values.
+  ``None`` for other failures."""
+  return t.get("mismatch")
+
+def stderr(t):
+  """The last lines of stderr of the processes of the failed execution, as a
+  map from process names to pairs of lines and spill file (``None`` if
+  nothing was spilled). Empty if not recorded."""
+  return t.get("stderr", {})
+
+def oracles(t):
+  """The paths of the oracles that rejected the step when there are several,
+  empty otherwise."""
+  return t.get("oracles", [])
+
 def pprint(prefix, t, lvl=2):
   """Prints a failure."""
-  if at(t) != None:
+  if timeout(t) != None:
+    (name, limit, seconds) = timeout(t)
+    log(
+      "{}Timeout at {}, no answer from the {} within the {} limit ({}s)".format(
+        prefix, at(t), name, limit, seconds
+      ), lvl
+    )
+  elif mismatch(t) != None:
+    (signal, expected, found) = mismatch(t)
+    if signal == None: log(
+      "{}Mismatch at {}: expected {}, found \"{}\"".format(
+        prefix, at(t), "nothing" if expected == None else expected, found
+      ), lvl
+    )
+    else: log(
+      "{}Mismatch at {}, output {}: expected {}, found {}".format(
+        prefix, at(t), signal, expected, found
+      ), lvl
+    )
+  elif at(t) != None:
     log( "{}Failure at {}".format(prefix, at(t)), lvl )
   else:
     log( "{}Failure".format(prefix), lvl )
@@ -56,9 +105,17 @@ def pprint(prefix, t, lvl=2):
     log( "{}| mode_reqs:   {}".format(prefix, mode_reqs(t)), lvl )
   if len(global_reqs(t)) > 0:
     log( "{}| global_reqs: {}".format(prefix, global_reqs(t)), lvl )
+  if len(oracles(t)) > 0:
+    log( "{}| oracles:     {}".format(prefix, oracles(t)), lvl )
   if testcase(t) != None:
     log( "{}| for testcase:".format(prefix), lvl )
     tc.pprint( "{}| | ".format(prefix), testcase(t), lvl )
+  for (name, (lines, spill)) in sorted( stderr(t).items() ):
+    log( "{}| {} stderr:".format(prefix, name), lvl )
+    if spill != None:
+      log( "{}| | ... (earlier output in {})".format(prefix, spill), lvl )
+    for line in lines:
+      log( "{}| | {}".format(prefix, line), lvl )
 
 def mk(modes, glob4ls, mode_reqs, glob4l_reqs):
   """Creates a failure with no ``at`` nor ``testcase`` field."""
@@ -71,6 +128,36 @@ def mk(modes, glob4ls, mode_reqs, glob4l_reqs):
     "mode_reqs": mode_reqs, "global_reqs": glob4l_reqs
   }
 
+def merge(failures, paths):
+  """Merges the failures of several oracles at the same step, with no ``at``
+  nor ``testcase`` field. ``paths`` are the paths of the oracles."""
+  return {
+    "modes": [ out for t in failures for out in modes(t) ],
+    "globals": [ out for t in failures for out in globals(t) ],
+    "mode_reqs": all( map(mode_reqs, failures) ),
+    "global_reqs": [ out for t in failures for out in global_reqs(t) ],
+    "oracles": paths
+  }
+
+def mk_timeout(name, limit, seconds):
+  """Creates a timeout of process ``name``, ``binary`` or ``oracle``, for
+  limit ``step`` or ``execution`` of ``seconds`` seconds, with no ``at`` nor
+  ``testcase`` field."""
+  return {
+    "modes": [], "globals": [], "mode_reqs": True, "global_reqs": [],
+    "timeout": (name, limit, seconds)
+  }
+
+def mk_mismatch(signal, expected, found):
+  """Creates a mismatch of output ``signal`` with its expected value, with no
+  ``at`` nor ``testcase`` field. ``signal`` is ``None`` if the whole output
+  line of the step mismatches, ``expected`` is then the expected line if
+  any."""
+  return {
+    "modes": [], "globals": [], "mode_reqs": True, "global_reqs": [],
+    "mismatch": (signal, expected, found)
+  }
+
 def add_at(t, k):
   """Adds a ``"at"`` field to a failure."""
   if "at" in t.keys():
@@ -80,6 +167,12 @@ def add_at(t, k):
     )
   t["at"] = k
 
+def add_stderr(t, name, lines, spill):
+  """Records the last lines a process wrote on stderr in a failure, and the
+  file earlier lines were spilled to if any."""
+  if "stderr" not in t.keys(): t["stderr"] = {}
+  t["stderr"][name] = (lines, spill)
+
 def add_testcase(t, test_case):
   """Adds a ``"testcase"`` field to a failure."""
   if "testcase" in t.keys(): raise Exception(
@@ -18,6 +18,8 @@ line arguments. The convention is
 
 """
 
+import os
+
 # Log things.
 
 _log_lvl_default = 2
@@ -143,7 +145,435 @@ def out_dir_default():
     """ Returns the default value for the out directory. """
     return _out_dir_default
 
+_cache_dir_default = None
+_cache_dir = _cache_dir_default
+
+def cache_dir():
+    """ Returns the directory where teas keeps data across runs, defaults
+    to ``.teas`` in the out directory. """
+    if _cache_dir == None: return os.path.join(_out_dir, ".teas")
+    else: return _cache_dir
+
+def set_cache_dir(value):
+    """ Sets the value of the cache directory. """
+    global _cache_dir
+    _cache_dir = value
+
+def cache_dir_default():
+    """ Returns the default value for the cache directory. """
+    return "<out directory>/.teas"
+
+_result_cache_default = False
+_result_cache = _result_cache_default
+
+def result_cache():
+    """ Returns true if results should be looked up in and stored to the
+    result cache. """
+    return _result_cache
+
+def set_result_cache(value):
+    """ Sets the value of the result cache flag. """
+    global _result_cache
+    _result_cache = value
+
+def result_cache_default():
+    """ Returns the default value of the result cache flag. """
+    return _result_cache_default
+
+_cache_size_default = 100000
+_cache_size = _cache_size_default
+
+def cache_size():
+    """ Returns the maximum number of entries in the result cache, and of
+    traces in the trace store. """
+    return _cache_size
+
+def set_cache_size(value):
+    """ Sets the value of the cache size flag. """
+    global _cache_size
+    _cache_size = value
+
+def cache_size_default():
+    """ Returns the default value of the cache size flag. """
+    return _cache_size_default
+
+_clear_cache_default = False
+_clear_cache = _clear_cache_default
+
+def clear_cache():
+    """ Returns true if the result cache should be cleared before running.
+    """
+    return _clear_cache
+
+def set_clear_cache(value):
+    """ Sets the value of the clear cache flag. """
+    global _clear_cache
+    _clear_cache = value
+
+def clear_cache_default():
+    """ Returns the default value of the clear cache flag. """
+    return _clear_cache_default
+
+_subsume_default = False
+_subsume = _subsume_default
+
+def subsume():
+    """ Returns true if only the test cases the inputs of which are not a
+    prefix of another test case's should run, see the ``subsume`` module. """
+    return _subsume
+
+def set_subsume(value):
+    """ Sets the value of the subsume flag. """
+    global _subsume
+    _subsume = value
+
+def subsume_default():
+    """ Returns the default value of the subsume flag. """
+    return _subsume_default
+
+_lpt_default = True
+_lpt = _lpt_default
+
+def lpt():
+    """ Returns true if jobs should run longest first, based on the wall
+    time of previous runs or on the length of the test cases. """
+    return _lpt
+
+def set_lpt(value):
+    """ Sets the value of the lpt flag. """
+    global _lpt
+    _lpt = value
+
+def lpt_default():
+    """ Returns the default value of the lpt flag. """
+    return _lpt_default
+
+_shard_default = None
+_shard = _shard_default
+
+def shard():
+    """ Returns the shard ``(i, n)`` this node runs, ``None`` to run all
+    jobs. """
+    return _shard
+
+def set_shard(value):
+    """ Sets the value of the shard flag. """
+    global _shard
+    _shard = value
+
+def shard_default():
+    """ Returns the default value of the shard flag. """
+    return _shard_default
+
+_merge_default = False
+_merge = _merge_default
+
+def merge():
+    """ Returns true if the input files are partial result files of shards
+    to merge, instead of test contexts. """
+    return _merge
+
+def set_merge(value):
+    """ Sets the value of the merge flag. """
+    global _merge
+    _merge = value
+
+def merge_default():
+    """ Returns the default value of the merge flag. """
+    return _merge_default
+
+_coordinator_default = None
+_coordinator = _coordinator_default
+
+def coordinator():
+    """ Returns the address workers connect to if this run is distributed,
+    ``None`` to run all jobs locally. """
+    return _coordinator
+
+def set_coordinator(value):
+    """ Sets the value of the coordinator flag. """
+    global _coordinator
+    _coordinator = value
+
+def coordinator_default():
+    """ Returns the default value of the coordinator flag. """
+    return _coordinator_default
+
+_worker_default = None
+_worker = _worker_default
+
+def worker():
+    """ Returns the address of the coordinator to pull jobs from if this
+    process is a worker, ``None`` otherwise. """
+    return _worker
+
+def set_worker(value):
+    """ Sets the value of the worker flag. """
+    global _worker
+    _worker = value
+
+def worker_default():
+    """ Returns the default value of the worker flag. """
+    return _worker_default
+
+_exec_modes = ["lockstep", "streaming"]
+_exec_mode_default = "lockstep"
+_exec_mode = _exec_mode_default
+
+def exec_mode():
+    """ Returns the execution mode. In ``lockstep`` mode, each input is fed
+    to the binary and its output to the oracle before the next input is
+    sent. In ``streaming`` mode, the whole input trace is written to the
+    binary up front and its outputs are forwarded to the oracle as they
+    arrive. """
+    return _exec_mode
+
+def set_exec_mode(value):
+    """ Sets the value of the execution mode, raises a ``ValueError`` if
+    the mode is unknown. """
+    global _exec_mode
+    if value not in _exec_modes: raise ValueError(
+        "expected one of {} but found \"{}\"".format(_exec_modes, value)
+    )
+    _exec_mode = value
+
+def exec_modes():
+    """ Returns the legal execution modes. """
+    return _exec_modes
+
+def exec_mode_default():
+    """ Returns the default value of the execution mode. """
+    return _exec_mode_default
+
+_backend_default = "process"
+_backend = _backend_default
+
+def backend():
+    """ Returns the backend running jobs in parallel, see the ``executor``
+    module. """
+    return _backend
+
+def set_backend(value):
+    """ Sets the value of the backend flag. """
+    global _backend
+    _backend = value
+
+def backend_default():
+    """ Returns the default value of the backend flag. """
+    return _backend_default
+
+
+_store_traces_default = False
+_store_traces = _store_traces_default
+
+def store_traces():
+    """ Returns true if the outputs of the binaries should be stored in the
+    trace store of the cache directory. """
+    return _store_traces
+
+def set_store_traces(value):
+    """ Sets the value of the store traces flag. """
+    global _store_traces
+    _store_traces = value
+
+def store_traces_default():
+    """ Returns the default value of the store traces flag. """
+    return _store_traces_default
+
+_recheck_default = False
+_recheck = _recheck_default
+
+def recheck():
+    """ Returns true if stored binary outputs should be replayed into the
+    oracle instead of running the binary, when they exist. """
+    return _recheck
+
+def set_recheck(value):
+    """ Sets the value of the recheck flag. """
+    global _recheck
+    _recheck = value
+
+def recheck_default():
+    """ Returns the default value of the recheck flag. """
+    return _recheck_default
+
+_values_cache_default = False
+_values_cache = _values_cache_default
+
+def values_cache():
+    """ Returns true if the values of test cases should be loaded from
+    compiled columnar files in the cache directory. """
+    return _values_cache
+
+def set_values_cache(value):
+    """ Sets the value of the values cache flag. """
+    global _values_cache
+    _values_cache = value
+
+def values_cache_default():
+    """ Returns the default value of the values cache flag. """
+    return _values_cache_default
+
+_index_default = False
+_index = _index_default
+
+def index():
+    """ Returns true if parsed test contexts and test sets should be stored
+    in and loaded from the index of the cache directory. """
+    return _index
+
+def set_index(value):
+    """ Sets the value of the index flag. """
+    global _index
+    _index = value
+
+def index_default():
+    """ Returns the default value of the index flag. """
+    return _index_default
+
+_setup_jobs_default = 4
+_setup_jobs = _setup_jobs_default
+
+def setup_jobs():
+    """ Returns the maximum number of setup commands running at the same
+    time. """
+    return _setup_jobs
+
+def set_setup_jobs(value):
+    """ Sets the value of the setup jobs flag. """
+    global _setup_jobs
+    _setup_jobs = value
+
+def setup_jobs_default():
+    """ Returns the default value of the setup jobs flag. """
+    return _setup_jobs_default
+
+_step_timeout_default = None
+_step_timeout = _step_timeout_default
+
+def step_timeout():
+    """ Returns the number of seconds the binary and the oracle have to
+    answer a step, ``None`` for no limit. """
+    return _step_timeout
+
+def set_step_timeout(value):
+    """ Sets the value of the step timeout flag. """
+    global _step_timeout
+    _step_timeout = value
+
+def step_timeout_default():
+    """ Returns the default value of the step timeout flag. """
+    return _step_timeout_default
+
+_exec_timeout_default = None
+_exec_timeout = _exec_timeout_default
+
+def exec_timeout():
+    """ Returns the number of seconds a test execution has to complete,
+    ``None`` for no limit. """
+    return _exec_timeout
+
+def set_exec_timeout(value):
+    """ Sets the value of the execution timeout flag. """
+    global _exec_timeout
+    _exec_timeout = value
+
+def exec_timeout_default():
+    """ Returns the default value of the execution timeout flag. """
+    return _exec_timeout_default
+
+_spawner_default = False
+_spawner = _spawner_default
+
+def spawner():
+    """ Returns true iff the binaries and oracles are launched by a small
+    process forked at startup, see the ``spawner`` module. """
+    return _spawner
+
+def set_spawner(value):
+    """ Sets the value of the spawner flag. """
+    global _spawner
+    _spawner = value
+
+def spawner_default():
+    """ Returns the default value of the spawner flag. """
+    return _spawner_default
+
+_differential_default = False
+_differential = _differential_default
+
+def differential():
+    """ Returns true iff the binaries of a context run together on each test
+    case and their outputs are compared, see the ``differential`` module. """
+    return _differential
+
+def set_differential(value):
+    """ Sets the value of the differential flag. """
+    global _differential
+    _differential = value
+
+def differential_default():
+    """ Returns the default value of the differential flag. """
+    return _differential_default
+_run_ahead_default = 0
+_run_ahead = _run_ahead_default
+
+def run_ahead():
+    """ Returns the number of steps the binary can answer ahead of the
+    oracles in lockstep mode, ``0`` to wait for the oracles at each step. """
+    return _run_ahead
+
+def set_run_ahead(value):
+    """ Sets the value of the run ahead flag. """
+    global _run_ahead
+    _run_ahead = value
+
+def run_ahead_default():
+    """ Returns the default value of the run ahead flag. """
+    return _run_ahead_default
+_real_tolerance_default = 1e-6
+_real_tolerance = _real_tolerance_default
+
+def real_tolerance():
+    """ Returns the relative tolerance of the comparison of real outputs to
+    their expected values, see the ``golden`` module. """
+    return _real_tolerance
+
+def set_real_tolerance(value):
+    """ Sets the value of the real tolerance flag. """
+    global _real_tolerance
+    _real_tolerance = value
+
+def real_tolerance_default():
+    """ Returns the default value of the real tolerance flag. """
+    return _real_tolerance_default
+
+
+# Flags test executions depend on, as triples of a name, a getter and a
+# setter.
+_execution_flags = [
+    ("exec_mode", exec_mode, set_exec_mode),
+    ("run_ahead", run_ahead, set_run_ahead),
+    ("real_tolerance", real_tolerance, set_real_tolerance),
+    ("store_traces", store_traces, set_store_traces),
+    ("recheck", recheck, set_recheck),
+    ("values_cache", values_cache, set_values_cache),
+    ("step_timeout", step_timeout, set_step_timeout),
+    ("exec_timeout", exec_timeout, set_exec_timeout),
+]
+
+def execution_settings():
+    """ Returns the values of the flags test executions depend on, so that
+    they can be sent to distributed workers. """
+    settings = {}
+    for (name, get, _) in _execution_flags: settings[name] = get()
+    return settings
 
+def set_execution_settings(settings):
+    """ Sets the flags test executions depend on from some settings, see
+    ``execution_settings``. """
+    for (name, _, set) in _execution_flags:
+        if name in settings: set(settings[name])
 
 
 _flags = [
@@ -153,7 +583,30 @@ _flags = [
     ("Test execution flags", None),
     ("run tests", run_tests),
     ("max proc count", max_proc),
+    ("backend", backend),
     ("out directory", out_dir),
+    ("cache directory", cache_dir),
+    ("result cache", result_cache),
+    ("cache size", cache_size),
+    ("clear result cache", clear_cache),
+    ("prefix subsumption", subsume),
+    ("longest jobs first", lpt),
+    ("shard", shard),
+    ("merge shards", merge),
+    ("coordinator address", coordinator),
+    ("worker of", worker),
+    ("execution mode", exec_mode),
+    ("lockstep run ahead", run_ahead),
+    ("real tolerance", real_tolerance),
+    ("store traces", store_traces),
+    ("oracle-only recheck", recheck),
+    ("compiled values cache", values_cache),
+    ("context index", index),
+    ("parallel setups", setup_jobs),
+    ("step timeout", step_timeout),
+    ("execution timeout", exec_timeout),
+    ("spawner", spawner),
+    ("differential", differential),
 ]
 
 
@@ -0,0 +1,106 @@
+"""
+Golden outputs. A context without oracles checks the outputs of its binaries
+against the expected outputs of its test cases instead, without spawning any
+process but the binary. The expected outputs of a test case are in the csv
+file of its ``expected`` attribute, in the format of test cases: a row per
+output with its name, its type and its value at each step.
+
+    <testcase path="tc_0.csv" expected="tc_0.out.csv" format="csv">
+      ...
+    </testcase>
+
+Values are compared as strings first, and only parsed when they differ as
+strings: ``bool`` and ``int`` values are equal iff they parse to the same
+value, ``real`` values iff they are within the relative tolerance of the
+``real_tolerance`` flag, and values of other types iff they are the same
+string. The mismatches of a batch of steps are gathered as bitsets, see
+``verdicts``, and the first mismatch is reported with its step and output.
+"""
+
+import csv
+
+import lib
+import decode
+import verdicts
+
+_parsers = {
+  "bool": lib.bool_of_string, "int": int, "real": lib.real_of_string
+}
+
+def ids(t):
+  """The names of the outputs of some expected outputs."""
+  return t["ids"]
+
+def types(t):
+  """The types of the outputs of some expected outputs."""
+  return t["types"]
+
+def columns(t):
+  """The expected values of each output, step by step."""
+  return t["cols"]
+
+def length(t):
+  """The number of steps of some expected outputs."""
+  if len( columns(t) ) == 0: return 0
+  return len( columns(t)[0] )
+
+def mk(ids, types, cols):
+  """Creates expected outputs."""
+  return { "ids": ids, "types": types, "cols": cols }
+
+def load(path):
+  """Loads expected outputs from a csv file."""
+  fil3 = open(path, "rb")
+  try: rows = [ row for row in csv.reader(fil3, delimiter=",") if len(row) > 0 ]
+  finally: fil3.close()
+  cols = [ map(str.strip, row[2:]) for row in rows ]
+  for col in cols:
+    if len(col) != len(cols[0]): raise Exception(
+      "file \"{}\" is ill-formed: value sequences are inconsistent".format(
+        path
+      )
+    )
+  return mk(
+    [ row[0].strip() for row in rows ], [ row[1].strip() for row in rows ],
+    cols
+  )
+
+def equal(typ3, expected, found, tolerance):
+  """True iff a value of type ``typ3`` is equal to the expected one, reals
+  up to a relative ``tolerance``."""
+  if expected == found: return True
+  parser = _parsers.get(typ3)
+  if parser == None: return False
+  try:
+    (exp, fnd) = ( parser(expected), parser(found) )
+  except ValueError: return False
+  if typ3 == "real":
+    return abs(exp - fnd) <= tolerance * max( 1, abs(exp), abs(fnd) )
+  return exp == fnd
+
+def mismatch(t, k, lines, tolerance):
+  """The first mismatch of the output lines of a binary at the steps from
+  ``k`` on, ``None`` if there is none. A mismatch is a triple of the step,
+  the index of the output and the expected value. The index is ``None`` if
+  the line has the wrong number of values, or if there is no expected value
+  at that step. The lines before a line mismatching as a whole are compared
+  first, so that the mismatch reported is the first one."""
+  width = len( ids(t) )
+  rows = []
+  # First line mismatching as a whole, if any.
+  bad = None
+  for (j, line) in enumerate(lines):
+    if k + j >= length(t): bad = (k + j, None, None)
+    else:
+      values = decode.fields(line)
+      if len(values) != width: bad = (k + j, None, None)
+    if bad != None: break
+    rows.append( "".join(
+      "0" if equal(typ3, col[k + j], value, tolerance) else "1"
+      for (typ3, col, value) in zip( types(t), columns(t), values )
+    ) )
+  bits = verdicts.pack(rows)
+  j = verdicts.first( reduce( lambda acc, col: acc | col, bits, 0 ) )
+  if j == None: return bad
+  i = [ (col >> j) & 1 for col in bits ].index(1)
+  return (k + j, i, columns(t)[i][k + j])
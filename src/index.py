@@ -0,0 +1,92 @@
+"""
+Compiled index of test contexts. Parsing the xml files of the contexts and of
+their test sets takes a while when there are many test cases, so the parsed
+contexts and test sets are stored pickled in file ``index`` of the cache
+directory.
+
+Entries are indexed by the absolute path of a context file. An entry records
+the modification time and size of the context file and of the files of its
+test sets, and is rebuilt as soon as one of them changes. Setups are not run
+when parsing, see ``build.run_all``.
+"""
+
+import os
+
+try: import cPickle as pickle
+except ImportError: import pickle
+
+import context as ctxt
+import testset as ts
+import iolib
+
+# Bumped when the layout of the records changes.
+_version = 6
+
+def path(cache_dir):
+  """The path of the index in a cache directory."""
+  return iolib.join_path(cache_dir, "index")
+
+def _stamp(fil3):
+  """The modification time and size of a file."""
+  stat = os.stat(fil3)
+  return (stat.st_mtime, stat.st_size)
+
+def testset_paths(context):
+  """The absolute paths of the test set files of a context."""
+  wdir = iolib.abs_path( ctxt.wdir(context) )
+  return map( lambda test: iolib.join_path(wdir, test), ctxt.tests(context) )
+
+def load(cache_dir):
+  """The entries of the index of a cache directory, empty if there is no
+  index or if it is ill-formed or outdated."""
+  fil3_path = path(cache_dir)
+  if not iolib.is_path_a_file(fil3_path): return {}
+  fil3 = open(fil3_path, "rb")
+  try: content = pickle.load(fil3)
+  except Exception: return {}
+  finally: fil3.close()
+  if not isinstance(content, dict) or content.get("version") != _version:
+    return {}
+  return content["entries"]
+
+def save(cache_dir, entries):
+  """Stores some entries as the index of a cache directory."""
+  iolib.mkdir(cache_dir)
+  fil3_path = path(cache_dir)
+  tmp = iolib.tmp_path(fil3_path)
+  fil3 = open(tmp, "wb")
+  try:
+    pickle.dump(
+      { "version": _version, "entries": entries }, fil3,
+      pickle.HIGHEST_PROTOCOL
+    )
+  finally:
+    fil3.close()
+  os.rename(tmp, fil3_path)
+
+def is_fresh(entry):
+  """True iff none of the source files of an entry changed."""
+  try:
+    for (fil3, stamp) in entry["sources"].items():
+      if _stamp(fil3) != stamp: return False
+    return True
+  except OSError: return False
+
+def of_file(context_path):
+  """Parses a context file and its test set files into an entry."""
+  context_path = iolib.abs_path(context_path)
+  context = ctxt.of_file(context_path)
+  sources = { context_path: _stamp(context_path) }
+  testsets = {}
+  for testset_path in testset_paths(context):
+    sources[testset_path] = _stamp(testset_path)
+    testsets[testset_path] = ts.of_file(testset_path)
+  return { "sources": sources, "context": context, "testsets": testsets }
+
+def context(entry):
+  """The context of an entry."""
+  return entry["context"]
+
+def testsets(entry):
+  """The test sets of the context of an entry, by absolute path."""
+  return entry["testsets"]
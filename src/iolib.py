@@ -1,9 +1,10 @@
 """ Common io functions. """
 
 import shlex
-import os, sys
+import errno, fcntl, os, sys, threading
 
 import flags
+import decode
 from excs import IOLibError
 from stdout import log, new_line
 
@@ -21,6 +22,18 @@ def abs_path(path):
     """ Returns the absolute path of a path. """
     return os.path.abspath(path)
 
+def tmp_path(path):
+    """ Returns a temporary path to write a file to before renaming it to
+    ``path``, distinct for each process and thread. """
+    return "{}.{}.{}.tmp".format(
+        path, os.getpid(), threading.current_thread().ident
+    )
+
+def cloexec(fd):
+    """ Keeps processes spawned later from inheriting a file descriptor. """
+    flags = fcntl.fcntl(fd, fcntl.F_GETFD)
+    fcntl.fcntl(fd, fcntl.F_SETFD, flags | fcntl.FD_CLOEXEC)
+
 def is_path_a_file(path):
     """ Checks if a path leads to an existing file. """
     if os.path.isfile(path): return True
@@ -50,13 +63,20 @@ def is_legal_dir_path(path, if_there_do=None, if_not_there_do=None):
     else:
         if if_there_do != None: if_there_do()
 
+def _mkdir_racing(path):
+    """ Creates a directory, unless another process or thread created it in
+    the meantime. """
+    try: os.mkdir(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST or not os.path.isdir(path): raise
+
 def mkdir(path):
     """ Creates a directory if necessary. Fails with ``IOLibError`` if path
     denotes a file, or path does does not exist and parent is not an existing
-    directory. """
+    directory. Several jobs can create the same directory concurrently. """
     try: is_legal_dir_path(
         path,
-        if_not_there_do=(lambda: os.mkdir(path))
+        if_not_there_do=(lambda: _mkdir_racing(path))
     )
 
     except IOLibError as e:
@@ -108,26 +128,24 @@ def file_to_output_sequences(
 ):
     """ Reads the output sequences as comma separated values between parens,
     separated by newlines. Returns when enough tuples of values specified
-    by ``output_sequence`` have been read.
+    by ``output_sequence`` have been read. The tuples are read from ``fil3``,
+    or from the chunks of ``data`` if any, through a decoder, see ``decode``.
     Closes the file when done if the flag says to do so. """
+    if data == None: decoder = decode.of_file(fil3, "tuple")
+    else:
+        decoder = decode.mk(None, "tuple")
+        chunks = iter(data)
     tuple_count = 0
-    def update(tuple):
-        index = 0
-        while index < len(tuple):
-            outputs[index]["seq"].append(tuple[index])
-            index += 1
-    def update_of_string(s):
-        update(s.replace("(","").split(","))
-    data.reverse()
-    def r(): return data.pop()
-    out = ""
     while tuple_count < length:
-        out = out + r()
-        temp = "".join(out.split()).split(")")
-        # Temp cannot be empty, this is safe.
-        out = temp.pop()
-        map( update_of_string, temp )
-        tuple_count += len(temp)
+        record = decode.read(decoder)
+        if record == None:
+            decode.feed( decoder, next(chunks, "") )
+            continue
+        if not record.endswith(")"): break
+        values = decode.fields(record, "tuple")
+        for index in range( len(values) ):
+            outputs[index]["seq"].append(values[index])
+        tuple_count += 1
     if close_when_done: fil3.close()
 
 # Parsing stuff.
@@ -0,0 +1,137 @@
+"""
+A job is a test execution along with where it comes from. A job contains
+- ``"system"``: the system of the context the job comes from,
+- ``"testset"``: the test set the test case comes from,
+- ``"exec"``: the test execution to run.
+
+A group of jobs contains
+- ``"group"``: jobs running different binaries on the same test case, run
+  together in differential mode, see ``differential``.
+
+Groups are jobs too, their system, test set, key and identifier are those of
+their first job.
+"""
+
+import time
+
+from stdout import log, new_line
+import context as ctxt
+import binary as b
+import testcase as tc
+import testset as ts
+import testexec as te
+import result as r
+import differential
+import encoded as enc
+import procs
+import iolib
+
+def is_group(t):
+  """True iff a job is a group of jobs."""
+  return "group" in t
+
+def members(t):
+  """The jobs of a group."""
+  return t["group"]
+
+def _head(t):
+  """A job itself, or the first job of a group."""
+  return members(t)[0] if is_group(t) else t
+
+def system(t):
+  """The system of the context a job comes from."""
+  return _head(t)["system"]
+
+def testset(t):
+  """The test set a job comes from."""
+  return _head(t)["testset"]
+
+def execution(t):
+  """The test execution of a job."""
+  return _head(t)["exec"]
+
+def key(t):
+  """The system, binary and test set of a job, see ``result.key``."""
+  return (system(t), b.name(te.binary(execution(t))), testset(t))
+
+def ident(t):
+  """Identifies a job by its system, binary, test set and test case."""
+  return key(t) + ( tc.name(te.testcase(execution(t))), )
+
+def mk(system, testset, execution):
+  """Creates a job."""
+  return { "system": system, "testset": testset, "exec": execution }
+
+def mk_group(jobs):
+  """Creates a group of jobs."""
+  return { "group": jobs }
+
+def groups(jobs):
+  """Groups the jobs running the same test case of the same test set of a
+  system, in the order of their first job."""
+  res = []
+  index = {}
+  for job in jobs:
+    k3y = (
+      system(job), testset(job), tc.path( te.testcase(execution(job)) )
+    )
+    if k3y not in index:
+      index[k3y] = len(res)
+      res.append( [] )
+    res[ index[k3y] ].append(job)
+  return map(mk_group, res)
+
+def of_context(context, out_dir, testsets={}):
+  """Creates the jobs for all the binaries, test sets and test cases of a
+  context. Each test set is loaded once for all binaries, unless it is in
+  ``testsets`` which maps absolute paths to test sets already loaded."""
+  wdir = iolib.abs_path( ctxt.wdir(context) )
+  out_dir = iolib.abs_path( out_dir )
+  oracles = ctxt.oracles(context)
+  jobs = []
+  for test_set in ctxt.tests(context):
+    testset_path = iolib.join_path(wdir, test_set)
+    if testset_path in testsets:
+      test_cases = ts.tests( testsets[testset_path] )
+    else:
+      log( "  Loading test set {}".format(test_set) )
+      test_cases = ts.tests( ts.of_file(testset_path) )
+      log( "  Done, {} test case(s).".format(len(test_cases)) )
+    for bin4ry in ctxt.bins(context):
+      for test_case in test_cases:
+        jobs.append( mk(
+          ctxt.system(context), test_set,
+          te.mk(bin4ry, oracles, out_dir, test_case, wdir)
+        ) )
+  new_line()
+  return jobs
+
+def run(t, inputs=None, outputs=None):
+  """Runs a job and returns its result, see ``testexec.execute`` for
+  ``inputs`` and ``outputs``. Runs a group with ``run_group``, returning a list
+  of results. Lives at module level so that process pools can pickle it."""
+  if is_group(t): return run_group(t)
+  job_exec = execution(t)
+  start = time.time()
+  failure = te.execute(job_exec, inputs, outputs)
+  return r.mk(
+    system(t), b.name(te.binary(job_exec)), testset(t),
+    tc.name(te.testcase(job_exec)), failure, time.time() - start,
+    procs=procs.snapshot()
+  )
+
+def run_group(t):
+  """Runs the jobs of a group one after the other on input steps encoded
+  once. Returns their results, along with the first divergence of the outputs
+  of their binaries."""
+  test_case = te.testcase( execution(t) )
+  inputs = enc.of_testcase( test_case, te.iter_steps( execution(t) ) )
+  results = []
+  traces = []
+  for job in members(t):
+    outputs = []
+    results.append( run(job, inputs, outputs) )
+    traces.append( ( b.name(te.binary(execution(job))), outputs ) )
+  divergence = differential.first(traces)
+  for res in results: r.set_divergence(res, divergence)
+  return results
@@ -1,6 +1,7 @@
 """ Basic helper things. """
 
 import os, string, shlex, subprocess
+from fractions import Fraction
 from stdout import log, error
 
 def bool_of_string(s):
@@ -20,6 +21,24 @@ def int_of_string(s):
         "xpected integer but found \"{}\"".format(s)
     )
 
+def float_of_string(s):
+    """ Converts a string to a float, raises a ``ValueError`` in case of
+    failure. """
+    try: return float(s)
+    except ValueError: raise ValueError(
+        "expected float but found \"{}\"".format(s)
+    )
+
+def real_of_string(s):
+    """ Converts a string to a real, either a decimal or a fraction, raises a
+    ``ValueError`` in case of failure. """
+    try:
+        if "/" in s: return Fraction(s)
+        return float(s)
+    except (ValueError, ZeroDivisionError): raise ValueError(
+        "expected real but found \"{}\"".format(s)
+    )
+
 def file_name_of_path(path):
     """ Returns the file name, whithout the extension if any,
     from a path. """
@@ -3,7 +3,7 @@
 import sys, os
 
 from stdout import log, warning, error, new_line
-import flags, lib, iolib
+import flags, lib, iolib, executor, shard, distrib
 
 # List of options. An option is a triplet of:
 # * a list of string representations of the option,
@@ -293,6 +293,28 @@ _add_option(
     _max_proc_action
 )
 
+# Backend option.
+def _backend_action(tail):
+    if tail[0] not in executor.backends(): raise ValueError(
+        "expected one of {} but found \"{}\"".format(
+            executor.backends(), tail[0]
+        )
+    )
+    flags.set_backend( tail[0] )
+    return tail[1:]
+_add_option(
+    ["--backend"],
+    [
+        "> {} (default {})".format(
+            lib.string_join(executor.backends(), "|"),
+            flags.backend_default()
+        ),
+        "how jobs run in parallel, thread avoids forking since jobs",
+        "mostly wait on pipes"
+    ],
+    _backend_action
+)
+
 
 # Output directory option.
 def _out_dir_action(tail):
@@ -316,3 +338,392 @@ _add_option(
     ],
     _out_dir_action
 )
+
+# Cache directory option.
+def _cache_dir_action(tail):
+    path = tail[0]
+    iolib.is_legal_dir_path(
+        path,
+        if_not_there_do=(lambda: warning(
+            ("Cache directory \"{}\" does not exist "
+             "and will be created.\n").format(path)
+        ))
+    )
+    flags.set_cache_dir(path)
+    return tail[1:]
+_add_option(
+    ["--cache_dir"],
+    [
+        "> path (default {})".format(
+            flags.cache_dir_default()
+        ),
+        "sets the directory where data is kept across runs"
+    ],
+    _cache_dir_action
+)
+
+# Result cache option.
+def _result_cache_action(tail):
+    flags.set_result_cache( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--result_cache"],
+    [
+        "> bool (default {})".format(
+            flags.result_cache_default()
+        ),
+        "if true, jobs the binary, oracle and test case of which did not",
+        "change since a previous run are not executed again, only the",
+        "files the commands mention are hashed, not the libraries or",
+        "scripts they use"
+    ],
+    _result_cache_action
+)
+
+# Result cache size option.
+def _cache_size_action(tail):
+    flags.set_cache_size( lib.int_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--cache_size"],
+    [
+        "> int (default {})".format(
+            flags.cache_size_default()
+        ),
+        "maximum number of results in the result cache, and of traces",
+        "in the trace store, least recently used ones are evicted first"
+    ],
+    _cache_size_action
+)
+
+# Clear result cache option.
+def _clear_cache_action(tail):
+    flags.set_clear_cache( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--clear_cache"],
+    [
+        "> bool (default {})".format(
+            flags.clear_cache_default()
+        ),
+        "if true, the result cache is emptied before running"
+    ],
+    _clear_cache_action
+)
+
+# Subsumption option.
+def _subsume_action(tail):
+    flags.set_subsume( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--subsume"],
+    [
+        "> bool (default {})".format(
+            flags.subsume_default()
+        ),
+        "if true, test cases the inputs of which are a prefix of another",
+        "test case's do not run, their result is derived from the latter"
+    ],
+    _subsume_action
+)
+
+# Longest processing time first option.
+def _lpt_action(tail):
+    flags.set_lpt( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--lpt"],
+    [
+        "> bool (default {})".format(
+            flags.lpt_default()
+        ),
+        "if true, jobs run longest first based on previous wall times",
+        "or test case length, otherwise in test set order"
+    ],
+    _lpt_action
+)
+
+# Shard option.
+def _shard_action(tail):
+    flags.set_shard( shard.of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--shard"],
+    [
+        "> i/n (default {})".format(
+            flags.shard_default()
+        ),
+        "only runs the i-th of n shards of balanced test case length, and",
+        "writes a partial result file in the output directory"
+    ],
+    _shard_action
+)
+
+# Merge option.
+def _merge_action(tail):
+    flags.set_merge( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--merge"],
+    [
+        "> bool (default {})".format(
+            flags.merge_default()
+        ),
+        "if true, the input files are the partial result files of all",
+        "shards of a run, which are merged into the summary of the run"
+    ],
+    _merge_action
+)
+
+# Coordinator option.
+def _coordinator_action(tail):
+    distrib.authkey( distrib.of_string(tail[0]) )
+    flags.set_coordinator( tail[0] )
+    return tail[1:]
+_add_option(
+    ["--coordinator"],
+    [
+        "> host:port|unix:path (default {})".format(
+            flags.coordinator_default()
+        ),
+        "serves the jobs to workers connecting to this address instead",
+        "of running them locally, tcp addresses require a key in",
+        "environment variable TEAS_AUTHKEY"
+    ],
+    _coordinator_action
+)
+
+# Worker option.
+def _worker_action(tail):
+    distrib.authkey( distrib.of_string(tail[0]) )
+    flags.set_worker( tail[0] )
+    return tail[1:]
+_add_option(
+    ["--worker"],
+    [
+        "> host:port|unix:path (default {})".format(
+            flags.worker_default()
+        ),
+        "pulls jobs from the coordinator at this address and runs",
+        "max_proc of them at a time, no input file needed, tcp",
+        "addresses require a key in environment variable TEAS_AUTHKEY"
+    ],
+    _worker_action
+)
+
+# Execution mode option.
+def _exec_mode_action(tail):
+    flags.set_exec_mode( tail[0] )
+    return tail[1:]
+_add_option(
+    ["--exec_mode"],
+    [
+        "> {} (default {})".format(
+            lib.string_join(flags.exec_modes(), "|"),
+            flags.exec_mode_default()
+        ),
+        "lockstep waits for the binary and the oracle at each step,",
+        "streaming pipes the whole input trace through both"
+    ],
+    _exec_mode_action
+)
+
+# Store traces option.
+def _store_traces_action(tail):
+    flags.set_store_traces( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--store_traces"],
+    [
+        "> bool (default {})".format(
+            flags.store_traces_default()
+        ),
+        "if true, the outputs of the binaries are stored compressed in",
+        "the cache directory"
+    ],
+    _store_traces_action
+)
+
+# Recheck option.
+def _recheck_action(tail):
+    flags.set_recheck( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--recheck"],
+    [
+        "> bool (default {})".format(
+            flags.recheck_default()
+        ),
+        "if true, stored binary outputs are replayed into the oracle",
+        "without running the binary, useful when only the oracle changed"
+    ],
+    _recheck_action
+)
+
+# Values cache option.
+def _values_cache_action(tail):
+    flags.set_values_cache( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--values_cache"],
+    [
+        "> bool (default {})".format(
+            flags.values_cache_default()
+        ),
+        "if true, test cases are compiled to memory-mapped typed columns",
+        "in the cache directory, rebuilt only when the csv file changes"
+    ],
+    _values_cache_action
+)
+
+# Index option.
+def _index_action(tail):
+    flags.set_index( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--index"],
+    [
+        "> bool (default {})".format(
+            flags.index_default()
+        ),
+        "if true, parsed test contexts and test sets are stored in the",
+        "cache directory and reused until their xml files change"
+    ],
+    _index_action
+)
+
+# Setup jobs option.
+def _setup_jobs_action(tail):
+    value = lib.int_of_string(tail[0])
+    if value < 1: raise ValueError(
+        "expected a positive integer but found \"{}\"".format(tail[0])
+    )
+    flags.set_setup_jobs(value)
+    return tail[1:]
+_add_option(
+    ["--setup_jobs"],
+    [
+        "> int (default {})".format(
+            flags.setup_jobs_default()
+        ),
+        "maximum number of setup commands to run in parallel, setups",
+        "declaring their inputs only run when the inputs change"
+    ],
+    _setup_jobs_action
+)
+
+def _timeout_of_string(s):
+    """ Parses a timeout in seconds, ``none`` for no limit. """
+    if s == "none": return None
+    value = lib.float_of_string(s)
+    if value <= 0: raise ValueError(
+        "expected a positive number of seconds but found \"{}\"".format(s)
+    )
+    return value
+
+# Step timeout option.
+def _step_timeout_action(tail):
+    flags.set_step_timeout( _timeout_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--step_timeout"],
+    [
+        "> float|none (default {})".format(
+            flags.step_timeout_default()
+        ),
+        "seconds the binary and the oracle have to answer a step, a test",
+        "case exceeding it is killed and reported as timed out"
+    ],
+    _step_timeout_action
+)
+
+# Execution timeout option.
+def _exec_timeout_action(tail):
+    flags.set_exec_timeout( _timeout_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--exec_timeout"],
+    [
+        "> float|none (default {})".format(
+            flags.exec_timeout_default()
+        ),
+        "seconds a test case has to run completely, a test case exceeding",
+        "it is killed and reported as timed out"
+    ],
+    _exec_timeout_action
+)
+
+# Spawner option.
+def _spawner_action(tail):
+    flags.set_spawner( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--spawner"],
+    [
+        "> bool (default {})".format(
+            flags.spawner_default()
+        ),
+        "if true, binaries and oracles are launched by a small process",
+        "forked at startup instead of by the workers, which is faster when",
+        "the workers use a lot of memory"
+    ],
+    _spawner_action
+)
+
+# Differential option.
+def _differential_action(tail):
+    flags.set_differential( lib.bool_of_string(tail[0]) )
+    return tail[1:]
+_add_option(
+    ["--differential"],
+    [
+        "> bool (default {})".format(
+            flags.differential_default()
+        ),
+        "if true, the binaries of a context run together on each test case",
+        "with its inputs loaded once, and the first step at which their",
+        "outputs differ is reported even if the oracles accept them"
+    ],
+    _differential_action
+)
+
+# Run ahead option.
+def _run_ahead_action(tail):
+    value = lib.int_of_string(tail[0])
+    if value < 0: raise ValueError(
+        "expected a natural number but found \"{}\"".format(tail[0])
+    )
+    flags.set_run_ahead(value)
+    return tail[1:]
+_add_option(
+    ["--run_ahead"],
+    [
+        "> int (default {})".format(
+            flags.run_ahead_default()
+        ),
+        "in lockstep mode, number of steps the binary can answer while the",
+        "oracles check earlier ones, the binary is stopped as soon as a",
+        "step fails"
+    ],
+    _run_ahead_action
+)
+
+# Real tolerance option.
+def _real_tolerance_action(tail):
+    value = lib.float_of_string(tail[0])
+    if value < 0: raise ValueError(
+        "expected a non-negative number but found \"{}\"".format(tail[0])
+    )
+    flags.set_real_tolerance(value)
+    return tail[1:]
+_add_option(
+    ["--real_tolerance"],
+    [
+        "> float (default {})".format(
+            flags.real_tolerance_default()
+        ),
+        "relative tolerance of the comparison of real outputs to the",
+        "expected outputs of test cases, for contexts without oracles"
+    ],
+    _real_tolerance_action
+)
@@ -1,19 +1,53 @@
 """
 Module for the oracle of a system. An oracle contains
-- ``"path"``: the path to the binary of the oracle,
+- ``"kind"``: ``process`` for an oracle binary spawned for each test case,
+  ``python`` for an oracle checked in process, see ``pyoracle``,
+- ``"path"``: the path to the binary of the oracle, for a python oracle an
+  identifier hashing its signals and expressions,
 - ``"outputs"``: the outputs of the system, i.e. the name of the output and a
-  boolean indicating if the output corresponds to a global mode.
+  boolean indicating if the output corresponds to a global mode, along with
+  its expression for a python oracle,
+- ``"signals"``: for a python oracle, the names and types of the values of
+  the lines it is fed with, empty otherwise,
+- ``"setup"``: the setup building the oracle, ``None`` if there is none, see
+  ``build``,
+- ``"reuse"``: how the oracle runs several test cases in a row, ``None`` if
+  it cannot, see ``warm``,
+- ``"global"``: false if the oracle only judges one mode of the system.
+
+A context can have several oracles, all fed the same inputs and outputs. At
+each step, every global oracle must accept the step and, if there are
+non-global ones, at least one of them must, see
+``outcome.first_failure_of_oracles``.
 """
 
-from lib import bool_of_string, run_setup_if_any
+import hashlib
+
+from lib import bool_of_string
 from iolib import norm_path
 from stdout import log, error, new_line
 
 import flags
 import failure
+import build
+import warm
 
 max_log = flags.max_log_lvl()
 
+# Kinds of oracles.
+kinds = ["process", "python"]
+
+# Types of the signals of python oracles.
+signal_types = ["bool", "int", "real"]
+
+def kind(t):
+  """The kind of an oracle, ``process`` or ``python``."""
+  return t["kind"]
+
+def signals(t):
+  """The names and types of the signals of a python oracle."""
+  return t["signals"]
+
 def path(t):
   """The path of an oracle."""
   return t["path"]
@@ -22,9 +56,22 @@ def outputs(t):
   """The outputs of the oracle."""
   return t["out"]
 
+def setup(t):
+  """The setup of an oracle, ``None`` if there is none."""
+  return t["setup"]
+
+def reuse(t):
+  """The reuse of an oracle, ``None`` if it cannot be reused."""
+  return t["reuse"]
+
+def is_global(t):
+  """False if the oracle only judges one mode of the system."""
+  return t["global"]
+
 def pprint(prefix, t, lvl=2):
   """Prints an oracle."""
-  log( "{}{}".format(prefix, path(t)), lvl )
+  if is_global(t): log( "{}{}".format(prefix, path(t)), lvl )
+  else: log( "{}{} (mode)".format(prefix, path(t)), lvl )
   log( "{}outputs:".format(prefix), lvl)
   for out in outputs(t):
     if out["mode"] == None:
@@ -36,38 +83,103 @@ def pprint(prefix, t, lvl=2):
     else:
       pos = "\"{}\": l{}c{}".format(out["file"], out["row"], out["col"])
     log( "{}  - {} ({})".format(prefix, desc, pos), lvl )
+    if "expr" in out: log( "{}    {}".format(prefix, out["expr"]), lvl )
 
-def mk(path, outputs):
+def mk(path, outputs, setup=None, reuse=None, glob4l=True):
   """Creates an oracle."""
-  return { "path": norm_path(path), "out": outputs }
+  return {
+    "kind": "process", "path": norm_path(path), "out": outputs,
+    "signals": [], "setup": setup, "reuse": reuse, "global": glob4l
+  }
 
-def of_xml(xml_tree):
-  """Creates an oracle from an xml element tree. The tree should have an
-  ``oracle`` subtree with a ``path`` attribute. The subtree should have some
-  ``output`` xml leaves with a ``global`` (boolean) attribute, and its content
-  should be the name of the output."""
-  for oracle in xml_tree.findall("oracle"):
-    # Fail if no path attribute.
-    if "path" not in oracle.attrib.keys(): raise Exception(
-      "illegal oracle: no path attribute"
+def mk_python(signals, outputs, glob4l=True):
+  """Creates a python oracle. The expressions of its outputs are compiled
+  to check their syntax."""
+  for out in outputs:
+    try: compile( out["expr"], "<oracle>", "eval" )
+    except SyntaxError as e: raise Exception(
+      "illegal python oracle output \"{}\": {}".format(out["expr"], e.msg)
     )
-    path = oracle.attrib["path"]
-    # Extracts output info.
-    def extract(leaf):
-      if "mode" not in leaf.attrib.keys(): mode = None
-      else: mode = leaf.attrib["mode"]
-      return {
-        "mode": mode,
-        "count": leaf.attrib["count"],
-        "file": leaf.attrib["file"],
-        "row": leaf.attrib["row"],
-        "col": leaf.attrib["col"],
-      }
-    outputs = map(extract, oracle.findall("output"))
-    setup = run_setup_if_any(
-      oracle, "oracle \"{}\"".format(path)
+  digest = hashlib.sha1( repr( (
+    signals, [ out["expr"] for out in outputs ]
+  ) ) ).hexdigest()[:12]
+  return {
+    "kind": "python", "path": "<python {}>".format(digest), "out": outputs,
+    "signals": signals, "setup": None, "reuse": None, "global": glob4l
+  }
+
+def _signal(leaf):
+  """The name and type of a ``signal`` xml leaf."""
+  if "name" not in leaf.attrib.keys(): raise Exception(
+    "illegal oracle signal: no name attribute"
+  )
+  typ3 = leaf.attrib.get("type", "real")
+  if typ3 not in signal_types: raise Exception(
+    "illegal type \"{}\" for oracle signal \"{}\", expected one of {}".format(
+      typ3, leaf.attrib["name"], signal_types
     )
-    return {"path": path, "out": outputs}
+  )
+  return ( leaf.attrib["name"], typ3 )
+
+def _of_leaf(oracle):
+  """Creates an oracle from an ``oracle`` xml subtree."""
+  kind = oracle.attrib.get("kind", "process")
+  if kind not in kinds: raise Exception(
+    "illegal oracle kind \"{}\", expected one of {}".format(kind, kinds)
+  )
+  # Fail if no path attribute.
+  if kind == "process" and "path" not in oracle.attrib.keys(): raise Exception(
+    "illegal oracle: no path attribute"
+  )
+  # Extracts output info.
+  def extract(leaf):
+    if "mode" not in leaf.attrib.keys(): mode = None
+    else: mode = leaf.attrib["mode"]
+    res = {
+      "mode": mode,
+      "count": leaf.attrib["count"],
+      "file": leaf.attrib["file"],
+      "row": leaf.attrib["row"],
+      "col": leaf.attrib["col"],
+    }
+    if kind == "python":
+      if leaf.text == None or leaf.text.strip() == "": raise Exception(
+        "illegal python oracle output: no expression"
+      )
+      res["expr"] = leaf.text.strip()
+    return res
+  outputs = map(extract, oracle.findall("output"))
+  glob4l = True
+  if "global" in oracle.attrib.keys():
+    glob4l = bool_of_string( oracle.attrib["global"] )
+  if kind == "python": return mk_python(
+    map( _signal, oracle.findall("signal") ), outputs, glob4l
+  )
+  path = oracle.attrib["path"]
+  return {
+    "kind": kind, "path": path, "out": outputs, "signals": [],
+    "setup": build.of_xml(oracle, path), "reuse": warm.of_xml(oracle),
+    "global": glob4l
+  }
+
+def all_of_xml(xml_tree):
+  """Creates the oracles of an xml element tree, one per ``oracle`` subtree
+  with a ``path`` attribute. The subtrees should have some ``output`` xml
+  leaves with a ``global`` (boolean) attribute, and its content should be the
+  name of the output. An oracle is global unless its ``global`` attribute is
+  false. The setups, if any, are not run, see ``build.run_all``. They build
+  the oracles by default. An oracle can be reused if it has a ``reset``
+  attribute, see ``warm.of_xml``. An oracle with a ``kind`` attribute equal
+  to ``python`` has no path, its ``signal`` leaves name the values of its
+  input lines and the content of its ``output`` leaves are python
+  expressions, see ``pyoracle``."""
+  return map( _of_leaf, xml_tree.findall("oracle") )
+
+def of_xml(xml_tree):
+  """The first oracle of an xml element tree, see ``all_of_xml``. ``None`` if
+  there is none."""
+  oracles = all_of_xml(xml_tree)
+  return oracles[0] if len(oracles) > 0 else None
 
 def check_values(t, values):
   """Checks if the input values for the oracle makes the contract it
@@ -1,6 +1,6 @@
 """ The outcome of a test execution is either ``Success`` or ``Failure``. """
 
-import lib, iolib
+import lib, iolib, verdicts
 from stdout import log
 
 def get_file_path(root_path, binary_name, testcase_file):
@@ -24,36 +24,19 @@ def first_failure_of_oracles(oracle_outputs, length):
       index,
     - only an index if the failure comes from all non-global oracles
       evaluating to false."""
-    global_oracles = []
-    mode_oracles = []
-    for oracle_output in oracle_outputs:
-        oracle = oracle_output["oracle"]
-        if oracle["global"]: global_oracles.append(oracle_output)
-        else: mode_oracles.append(oracle)
-
-    index = 0
-    result = []
-    def log_orcl(o,i):
-        log("{}[{}]: {}".format(o["oracle"]["name"], i, o["seq"][i]))
-        return "False" == o["seq"][i]
-    while index < length:
-        result = filter(
-            (lambda o: not lib.bool_of_string(o["seq"][index])),
-            global_oracles
-        )
-        if len(result) != 0: break
-        mode_disj = reduce(
-            (lambda disj, o: disj or o["seq"][index]),
-            mode_oracles,
-            True
-        )
-        if not mode_disj: break
-        index += 1
-
-    if index < length: return [
-        index, map( (lambda o: o["oracle"]), result )
+    seqs = map( (lambda o: o["seq"][:length]), oracle_outputs )
+    rejections = map(verdicts.column, seqs)
+    index = verdicts.first( verdicts.failing(
+        map( (lambda o: o["oracle"]), oracle_outputs ),
+        rejections,
+        min( [length] + map(len, seqs) )
+    ) )
+    if index == None: return []
+    result = [
+        o["oracle"] for (o, bits) in zip(oracle_outputs, rejections)
+        if o["oracle"]["global"] and (bits >> index) & 1
     ]
-    return []
+    return [ index, result ]
 
 def generate_breakdown_and_outcome(testex_result):
     testcase = testex_result["testcase"]
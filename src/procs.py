@@ -0,0 +1,203 @@
+"""
+Process lifecycle. The processes of test executions are spawned and released
+through this module, which keeps counters for the interpreter it runs in:
+- ``"spawned"``: processes spawned,
+- ``"reaped"``: processes waited for after their release,
+- ``"killed"``: processes killed while still running, on failure, on timeout
+  or when they do not exit after their release,
+- ``"leaked"``: processes released but not reaped yet,
+- ``"reused"``: times an idle process was reused instead of spawning a new
+  one, see ``warm``,
+- ``"spawn_time"``: the total time spent spawning processes, in seconds.
+
+Processes are launched by the spawner if it is running, see ``spawner``.
+Otherwise they are launched directly; with python 3 this does not involve
+running python code in the child, which lets the interpreter use ``vfork``.
+
+A process is released as soon as the verdict of its execution is known. On
+failure it is killed right away, otherwise closing its pipes lets it exit on
+its own within ``grace`` seconds before it is killed. It is then reaped, or
+counted as leaked if it does not exit within ``reap_timeout`` seconds. Leaked
+processes are reaped by later releases if they end up exiting.
+
+Processes run in their own process group, killing one also kills its
+children. A snapshot of the counters (see ``snapshot``) also records the
+number of open file descriptors of the interpreter, so that long runs can be
+checked to stay flat.
+"""
+
+import os, signal, socket, subprocess, sys, threading, time
+
+from stdout import log
+import spawner
+
+# Seconds a released process has to exit on its own before being killed.
+grace = 0.5
+
+# Seconds a killed process has to exit before being counted as leaked.
+reap_timeout = 1.0
+
+# Longest sleep between two polls of a process exiting, in seconds.
+_max_poll = 0.05
+
+_lock = threading.Lock()
+_counters = {
+  "spawned": 0, "reaped": 0, "killed": 0, "leaked": 0, "reused": 0,
+  "spawn_time": 0.0
+}
+# Processes released but not reaped yet.
+_leaked = []
+
+def _incr(name, n=1):
+  """Increments a counter."""
+  with _lock: _counters[name] += n
+
+# Puts a process spawned directly in its own process group.
+if sys.version_info >= (3, 2): _new_group = { "start_new_session": True }
+else: _new_group = { "preexec_fn": getattr(os, "setsid", None) }
+
+def spawn(cmd, cwd=None):
+  """Spawns a process with piped stdin, stdout and stderr, in its own process
+  group."""
+  start = time.time()
+  if spawner.running(): proc = spawner.spawn(cmd, cwd)
+  else: proc = subprocess.Popen(
+    cmd,
+    stdin=subprocess.PIPE,
+    stdout=subprocess.PIPE,
+    stderr=subprocess.PIPE,
+    cwd=cwd,
+    **_new_group
+  )
+  _incr("spawn_time", time.time() - start)
+  _incr("spawned")
+  return proc
+
+def reuse():
+  """Counts an idle process being reused."""
+  _incr("reused")
+
+def kill(*procs):
+  """Kills the process groups of some processes. Processes already reaped are
+  ignored, their pid may name another process group by now, so a group is
+  only killed before its process is reaped. Counts the processes killed while
+  still running, once each."""
+  for proc in procs:
+    if proc.returncode != None: continue
+    try:
+      if hasattr(os, "killpg"): os.killpg(proc.pid, signal.SIGKILL)
+      else: proc.kill()
+    except OSError: ()
+    # Polling now tells a process we killed from one that already exited.
+    killed = proc.poll() in [None, -signal.SIGKILL]
+    if killed and not getattr(proc, "killed", False):
+      proc.killed = True
+      _incr("killed")
+
+def _close(proc):
+  """Closes the stdin and stdout pipes of a process, its stderr belongs to
+  its drain. Data still buffered for a dead process is lost."""
+  for pipe in [proc.stdin, proc.stdout]:
+    try: pipe.close()
+    except (IOError, OSError): ()
+
+def _wait(procs, timeout):
+  """Polls some processes until they all exited or ``timeout`` seconds
+  passed. Returns the ones still running."""
+  end = time.time() + timeout
+  delay = 0.001
+  while True:
+    procs = [ proc for proc in procs if proc.poll() == None ]
+    if len(procs) == 0 or time.time() >= end: return procs
+    time.sleep( min(delay, max(end - time.time(), 0)) )
+    delay = min(delay * 2, _max_poll)
+
+def _sweep():
+  """Reaps the leaked processes that exited since they were released."""
+  with _lock:
+    reaped = [ proc for proc in _leaked if proc.poll() != None ]
+    for proc in reaped: _leaked.remove(proc)
+    _counters["leaked"] -= len(reaped)
+    _counters["reaped"] += len(reaped)
+
+def release(procs, force=False):
+  """Releases some processes once the verdict of their execution is known,
+  ``None`` processes are ignored. Kills them right away if ``force``. Returns
+  the number of processes that could not be reaped."""
+  procs = [ proc for proc in procs if proc != None ]
+  if force: kill(*procs)
+  for proc in procs: _close(proc)
+  if not force: kill( *_wait(procs, grace) )
+  running = _wait(procs, reap_timeout)
+  _incr( "reaped", len(procs) - len(running) )
+  with _lock:
+    _leaked.extend(running)
+    _counters["leaked"] += len(running)
+  _sweep()
+  return len(running)
+
+def open_fds():
+  """The number of file descriptors open in this interpreter, ``None`` if it
+  cannot be known."""
+  try: return len( os.listdir("/proc/self/fd") ) - 1
+  except OSError: return None
+
+def worker():
+  """Identifies this interpreter across machines."""
+  return "{}:{}".format( socket.gethostname(), os.getpid() )
+
+def snapshot():
+  """The counters of this interpreter, along with its number of open file
+  descriptors under ``"fds"`` and its identifier under ``"worker"``."""
+  _sweep()
+  with _lock: res = dict(_counters)
+  res["fds"] = open_fds()
+  res["worker"] = worker()
+  return res
+
+def merge(snapshots):
+  """The latest snapshot of each worker in some snapshots, by worker. Counters
+  only decrease when leaked processes get reaped, so the latest snapshot is
+  the one with the most spawned then reaped processes."""
+  res = {}
+  for snap in snapshots:
+    if snap == None: continue
+    old = res.get( snap["worker"] )
+    if old == None or (
+      (snap["spawned"], snap["reaped"]) >= (old["spawned"], old["reaped"])
+    ): res[ snap["worker"] ] = snap
+  return res
+
+def pprint(prefix, snapshots, lvl=2):
+  """Prints the total of the counters of some workers and their open file
+  descriptors, see ``merge``."""
+  by_worker = merge(snapshots)
+  if len(by_worker) == 0: return
+  total = dict(
+    (name, sum( [ snap.get(name, 0) for snap in by_worker.values() ] ))
+    for name in [
+      "spawned", "reaped", "killed", "leaked", "reused", "spawn_time"
+    ]
+  )
+  log( (
+    "{}Processes: {} spawned, {} reaped, {} killed, {} leaked"
+  ).format(
+    prefix, total["spawned"], total["reaped"], total["killed"],
+    total["leaked"]
+  ), lvl )
+  fds = [
+    snap["fds"] for snap in by_worker.values() if snap["fds"] != None
+  ]
+  if len(fds) > 0:
+    log( "{}Open fds: {} to {} over {} worker(s)".format(
+      prefix, min(fds), max(fds), len(fds)
+    ), lvl )
+  if total["reused"] > 0:
+    log( "{}Reused idle processes {} time(s)".format(
+      prefix, total["reused"]
+    ), lvl )
+  if total["spawned"] > 0:
+    log( "{}Mean spawn latency: {:.2f}ms{}".format(
+      prefix, 1000 * total["spawn_time"] / total["spawned"],
+      " (spawner)" if spawner.running() else ""
+    ), lvl )
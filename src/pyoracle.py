@@ -0,0 +1,106 @@
+"""
+Python oracles. Spawning an oracle for each test case and sending it every
+step through a pipe costs much more than checking small contracts, so an
+oracle can instead be given as python expressions checked by teas itself:
+
+    <oracle kind="python">
+      <signal name="speed" type="real"/>
+      <signal name="brake" type="bool"/>
+      <output count="1" file="spec.lus" row="12" col="2">
+        not brake or speed &lt;= pre_speed
+      </output>
+    </oracle>
+
+The ``signal`` leaves name the values of the lines an oracle is fed with, the
+inputs then the outputs of the system, and give their type: ``bool``,
+``int`` or ``real`` (the default). Each output is an expression over the
+values of the signals at the current step and, prefixed by ``pre_``, at the
+previous step, ``None`` at the first step. Outputs are guarantees or mode
+ensures as for other oracles, and the failures are the same, see
+``oracle.check_values``.
+
+The expressions of an oracle are compiled once per worker into a function,
+which is then applied to the lines of a whole trace, or to the lines the
+binary already wrote when it runs, and the steps they falsify are gathered
+as bitsets, see ``verdicts``. The oracles of a context are either all python
+oracles or all process oracles. A signal the name of which is not a python
+identifier, a keyword such as ``in`` for instance, is legal but cannot
+appear in the expressions.
+"""
+
+import keyword, re
+
+import lib
+import oracle as o
+import decode
+import verdicts
+
+_parsers = {
+  "bool": lib.bool_of_string, "int": int, "real": lib.real_of_string
+}
+
+# Compiled functions of the oracles, by path.
+_functions = {}
+
+_identifier = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+
+def _parameters(names):
+  """The parameters of the function of an oracle for values named ``names``.
+  A name that is not a python identifier, or that is already taken, gets a
+  fresh parameter instead."""
+  params = []
+  for name in names:
+    if (
+      _identifier.match(name) == None or keyword.iskeyword(name) or
+      name in ["None", "True", "False"] or name in params
+    ):
+      name = "_{}".format( len(params) )
+      while name in names or name in params: name = "_" + name
+    params.append(name)
+  return params
+
+def _function(t):
+  """The function of a python oracle, from the values of its signals at the
+  current step and at the previous one to the truth values of its outputs.
+  Compiled the first time it is needed."""
+  fun = _functions.get( o.path(t) )
+  if fun == None:
+    names = [ name for (name, _) in o.signals(t) ]
+    source = "lambda {}: ({},)".format(
+      ", ".join( _parameters( names + [ "pre_" + name for name in names ] ) ),
+      ", ".join( "bool(({}))".format(out["expr"]) for out in o.outputs(t) )
+    )
+    fun = eval( compile( source, "<oracle {}>".format(o.path(t)), "eval" ), {} )
+    _functions[ o.path(t) ] = fun
+  return fun
+
+def parse(t, line):
+  """The values of a line fed to a python oracle."""
+  return decode.typed(
+    line, [ _parsers[typ3] for (_, typ3) in o.signals(t) ]
+  )
+
+def evaluate(t, lines, previous=None):
+  """Evaluates a python oracle on some lines. ``previous`` holds the values
+  of the step before the first line, ``None`` for the first step. Returns
+  the rows of the truth values of the outputs, as ``0`` (true) and ``1``
+  (false) characters, and the values of the last line."""
+  fun = _function(t)
+  if previous == None: previous = [None] * len( o.signals(t) )
+  rows = []
+  for line in lines:
+    values = parse(t, line)
+    rows.append( "".join(
+      "0" if value else "1" for value in fun( *(values + previous) )
+    ) )
+    previous = values
+  return (rows, previous)
+
+def rejected(rows):
+  """The bitset of the steps some rows of an oracle falsify, see
+  ``verdicts``."""
+  return reduce( lambda acc, col: acc | col, verdicts.pack(rows), 0 )
+
+def output_line(row):
+  """The output line a process oracle would write for a row."""
+  return ", ".join( "false" if c == "1" else "true" for c in row )
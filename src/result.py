@@ -0,0 +1,140 @@
+"""
+The result of a job contains
+- ``"system"``: the system of the context the job comes from,
+- ``"binary"``: the name of the binary tested,
+- ``"testset"``: the test set the test case comes from,
+- ``"testcase"``: the name of the test case,
+- ``"failure"``: the first failure of the execution, ``None`` on success,
+- ``"time"``: the wall time of the execution in seconds,
+- ``"cached"``: true iff the result comes from the result cache and the
+  execution did not actually run,
+- ``"derived"``: true iff the result was derived from the one of a longer
+  test case, see the ``subsume`` module,
+- ``"divergence"``: in differential mode, the first divergence of the
+  outputs of the binaries on the test case, ``None`` if there is none, see
+  the ``differential`` module,
+- ``"procs"``: the process counters of the interpreter that ran the job,
+  right after running it, see ``procs.snapshot``. ``None`` if the execution
+  did not actually run.
+"""
+
+from stdout import log, new_line
+import failure as f
+
+def system(t):
+  """The system of a result."""
+  return t["system"]
+
+def binary(t):
+  """The name of the binary of a result."""
+  return t["binary"]
+
+def testset(t):
+  """The test set of a result."""
+  return t["testset"]
+
+def testcase(t):
+  """The name of the test case of a result."""
+  return t["testcase"]
+
+def failure(t):
+  """The failure of a result, ``None`` on success."""
+  return t["failure"]
+
+def time(t):
+  """The wall time of the execution of a result, in seconds."""
+  return t["time"]
+
+def cached(t):
+  """True iff a result comes from the result cache."""
+  return t["cached"]
+
+def derived(t):
+  """True iff a result was derived from the one of a longer test case."""
+  return t["derived"]
+
+def divergence(t):
+  """The first divergence of the outputs of the binaries on the test case of
+  a result, ``None`` if there is none or if not known."""
+  return t.get("divergence")
+
+def set_divergence(t, divergence):
+  """Sets the first divergence of the outputs of the binaries on the test
+  case of a result."""
+  t["divergence"] = divergence
+
+def procs(t):
+  """The process counters of the interpreter that ran the job of a result,
+  ``None`` if the execution did not run."""
+  return t.get("procs")
+
+def ok(t):
+  """True iff the execution of a result succeeded."""
+  return failure(t) == None
+
+def key(t):
+  """The system, binary and test set of a result, used to group results."""
+  return (system(t), binary(t), testset(t))
+
+def ident(t):
+  """Identifies the job a result comes from, see ``job.ident``."""
+  return (system(t), binary(t), testset(t), testcase(t))
+
+def mk(
+  system, binary, testset, testcase, failure, time,
+  cached=False, derived=False, procs=None, divergence=None
+):
+  """Creates a result."""
+  return {
+    "system": system, "binary": binary, "testset": testset,
+    "testcase": testcase, "failure": failure, "time": time,
+    "cached": cached, "derived": derived, "procs": procs,
+    "divergence": divergence
+  }
+
+def pprint_summary(prefix, results, lvl=2):
+  """Prints the number of successes and failures of some results."""
+  total = len(results)
+  successes = len( [res for res in results if ok(res)] )
+  failures = total - successes
+  timeouts = len( [
+    res for res in results if not ok(res) and f.timeout(failure(res)) != None
+  ] )
+  diverged = len( [res for res in results if divergence(res) != None] )
+  from_cache = len( [res for res in results if cached(res)] )
+  from_longer = len( [res for res in results if derived(res)] )
+  width = len(str(total))
+  log("{}Done on {} test(s):".format(prefix, total), lvl)
+  log("{}> \033[32m{:>{width}} test(s) passed\033[0m".format(
+    prefix, successes, width=width), lvl
+  )
+  if failures > 0:
+    log("{}> \033[31m{:>{width}} test(s) failed\033[0m".format(
+      prefix, failures, width=width), lvl
+    )
+  if timeouts > 0:
+    log("{}> \033[31m{:>{width}} test(s) timed out\033[0m".format(
+      prefix, timeouts, width=width), lvl
+    )
+  if diverged > 0:
+    log("{}> \033[33m{:>{width}} test(s) diverged\033[0m".format(
+      prefix, diverged, width=width), lvl
+    )
+  if from_cache > 0:
+    log("{}> {:>{width}} test(s) cached".format(
+      prefix, from_cache, width=width), lvl
+    )
+  if from_longer > 0:
+    log("{}> {:>{width}} test(s) derived from longer ones".format(
+      prefix, from_longer, width=width), lvl
+    )
+
+def pprint_summaries(results, keys, lvl=2):
+  """Prints a summary for each system, binary and test set in ``keys``, in
+  order."""
+  for k in keys:
+    log( "System \"{}\", binary \"{}\", test set {}:".format(
+      k[0], k[1], k[2]
+    ), lvl )
+    pprint_summary( "  ", [res for res in results if key(res) == k], lvl )
+    new_line(lvl)
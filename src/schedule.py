@@ -0,0 +1,111 @@
+"""
+Job scheduling. Jobs are ordered by estimated cost, longest first, so that a
+long test case does not end up stretching the tail of a run.
+
+The cost of a job is its wall time during a previous run if the history
+knows it. Otherwise it is the number of steps of its test case, scaled by the
+average time per step of the jobs in the history, if any. The history maps
+job identifiers (see ``job.ident``) to wall times in seconds, and is stored
+as a csv file in the cache directory.
+"""
+
+import csv
+
+from stdout import log, warning
+import testexec as te
+import testcase as tc
+import job as j
+import result as r
+import iolib
+
+def history_path(cache_dir):
+  """The path of the history file in a cache directory."""
+  return iolib.join_path(cache_dir, "history.csv")
+
+def load_history(path):
+  """Loads the history stored in a file, empty if the file does not
+  exist."""
+  history = {}
+  if not iolib.is_path_a_file(path): return history
+  fil3 = open(path, "rb")
+  try:
+    for row in csv.reader(fil3, delimiter=","):
+      if len(row) != 5:
+        warning( "ignoring ill-formed line in history file \"{}\"".format(
+          path
+        ) )
+      else:
+        history[ tuple(row[:4]) ] = float(row[4])
+  finally:
+    fil3.close()
+  return history
+
+def save_history(path, history):
+  """Writes a history to a file."""
+  fil3 = open(path, "wb")
+  try:
+    writer = csv.writer(fil3, delimiter=",")
+    for ident in sorted(history.keys()):
+      writer.writerow( list(ident) + [ repr(history[ident]) ] )
+  finally:
+    fil3.close()
+
+def update_history(history, results):
+  """Records the wall times of some results in a history, ignoring the ones
+  that did not actually run."""
+  for res in results:
+    if not r.cached(res) and not r.derived(res):
+      history[ r.ident(res) ] = r.time(res)
+
+def steps(job):
+  """The number of steps of the test case of a job, see ``testexec.steps``.
+  """
+  return max( tc.length( te.testcase(j.execution(job)) ) - 2, 0 )
+
+def estimate(jobs, history):
+  """The estimated cost of each job, in seconds if the history knows at least
+  one of the jobs, in steps otherwise."""
+  # Test cases are shared between binaries, only looking at each file once.
+  lengths = {}
+  def steps_of(job):
+    path = tc.path( te.testcase(j.execution(job)) )
+    if path not in lengths: lengths[path] = steps(job)
+    return lengths[path]
+
+  # Average time per step of the jobs the history knows.
+  known_time = 0.0
+  known_steps = 0
+  for job in jobs:
+    if j.ident(job) in history:
+      known_time += history[ j.ident(job) ]
+      known_steps += steps_of(job)
+  if known_steps > 0: rate = known_time / known_steps
+  else: rate = 1.0
+
+  def cost(job):
+    if j.ident(job) in history: return history[ j.ident(job) ]
+    else: return rate * steps_of(job)
+
+  return map(cost, jobs)
+
+def lpt(jobs, costs):
+  """Orders some jobs longest first. Jobs with the same cost stay in their
+  original order."""
+  indices = sorted(
+    range(0, len(jobs)), key=(lambda i: (- costs[i], i))
+  )
+  return map( (lambda i: jobs[i]), indices )
+
+def pprint_makespan(prefix, results, makespan, workers, lvl=2):
+  """Prints how close the makespan of a run came to the ideal one, i.e. the
+  total work divided by the number of workers."""
+  work = sum( map(r.time, results) )
+  ideal = work / max(workers, 1)
+  if makespan > 0: efficiency = 100.0 * ideal / makespan
+  else: efficiency = 100.0
+  log( "{}makespan {:.2f}s, ideal {:.2f}s ({:.2f}s of work on {} worker(s))"
+    .format(prefix, makespan, ideal, work, workers), lvl
+  )
+  log( "{}> efficiency {:.1f}% (ideal / makespan)".format(
+    prefix, efficiency
+  ), lvl )
@@ -0,0 +1,119 @@
+"""
+Sharding splits the jobs of a run across several nodes, for instance CI
+machines. Shard ``i`` of ``n`` (``1 <= i <= n``) runs its share of the jobs
+and writes its results to a partial result file, the partial result files of
+all ``n`` shards are then merged into the summary of a single node run.
+
+Jobs are partitioned deterministically by balancing their estimated cost, not
+their number. The estimate ignores the history (see ``schedule.estimate``)
+since nodes do not necessarily share it: it only depends on the test cases.
+Each partial result file records a digest of the partition so that merging
+detects shards that disagree.
+"""
+
+import hashlib, json
+
+import job as j
+import iolib
+
+def of_string(s):
+  """Parses a shard ``i/n``, raises a ``ValueError`` in case of failure."""
+  split = s.split("/")
+  try:
+    if len(split) != 2: raise ValueError()
+    i = int(split[0])
+    n = int(split[1])
+  except ValueError: raise ValueError(
+    "expected shard \"i/n\" but found \"{}\"".format(s)
+  )
+  if n < 1 or i < 1 or i > n: raise ValueError(
+    "illegal shard \"{}\", expected 1 <= i <= n".format(s)
+  )
+  return (i, n)
+
+def partition(jobs, costs, n):
+  """Splits some jobs in ``n`` lists of balanced cost. Jobs are assigned
+  costliest first to the currently cheapest list, ties are broken on job
+  identifiers and list indices so that the result only depends on the jobs
+  and their costs."""
+  indices = sorted(
+    range(0, len(jobs)), key=(lambda i: (- costs[i], j.ident(jobs[i])))
+  )
+  parts = [ [] for _ in range(0, n) ]
+  loads = [ 0.0 ] * n
+  for i in indices:
+    cheapest = min( range(0, n), key=(lambda p: (loads[p], p)) )
+    parts[cheapest].append( jobs[i] )
+    loads[cheapest] += costs[i]
+  return parts
+
+def digest(parts):
+  """A digest of a partition, identical on all nodes iff they agree on the
+  partition."""
+  sha = hashlib.sha1()
+  for p in range(0, len(parts)):
+    for ident in sorted( map(j.ident, parts[p]) ):
+      sha.update( repr( (p, ident) ) )
+  return sha.hexdigest()
+
+def path(out_dir, shard):
+  """The path of the partial result file of a shard."""
+  return iolib.join_path(
+    out_dir, "shard_{}_of_{}.json".format(shard[0], shard[1])
+  )
+
+def write(fil3_path, shard, parts, keys, results):
+  """Writes the partial result file of a shard. ``keys`` are the keys of all
+  the jobs of the run, not only the ones of the shard, see ``result.key``."""
+  fil3 = open(fil3_path, "w")
+  try:
+    json.dump( {
+      "shard": list(shard),
+      "digest": digest(parts),
+      "jobs": sum( map(len, parts) ),
+      "keys": map(list, keys),
+      "results": results,
+    }, fil3, indent=1 )
+    fil3.write("\n")
+  finally:
+    fil3.close()
+
+def read(fil3_path):
+  """Reads a partial result file."""
+  fil3 = open(fil3_path, "r")
+  try: return json.load(fil3)
+  finally: fil3.close()
+
+def merge(paths):
+  """Merges the partial result files of all the shards of a run. Returns the
+  keys and the results of the run, or raises a ``ValueError`` if the files
+  do not make up a full run."""
+  shards = map(read, paths)
+  if len(shards) == 0: raise ValueError("no partial result file to merge")
+  n = shards[0]["shard"][1]
+  seen = {}
+  for fil3_path, shard in zip(paths, shards):
+    i, m = shard["shard"]
+    if m != n or shard["digest"] != shards[0]["digest"]: raise ValueError(
+      "\"{}\" comes from a different partition than \"{}\"".format(
+        fil3_path, paths[0]
+      )
+    )
+    if i in seen: raise ValueError(
+      "shard {}/{} appears twice (\"{}\" and \"{}\")".format(
+        i, n, seen[i], fil3_path
+      )
+    )
+    seen[i] = fil3_path
+  missing = [ i for i in range(1, n + 1) if i not in seen ]
+  if len(missing) > 0: raise ValueError(
+    "missing shard(s) {} of {}".format(missing, n)
+  )
+  results = []
+  for shard in shards: results.extend( shard["results"] )
+  if len(results) != shards[0]["jobs"]: raise ValueError(
+    "expected {} results but found {}".format(
+      shards[0]["jobs"], len(results)
+    )
+  )
+  return ( map(tuple, shards[0]["keys"]), results )
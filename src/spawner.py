@@ -0,0 +1,201 @@
+"""
+Spawner. Forking a worker with a large heap to launch each binary and oracle
+gets slow with short test cases, so processes can instead be launched by the
+spawner: a small process forked when teas starts, before contexts and test
+cases are loaded. Workers send it the command and directory of a process, it
+launches it in its own process group and sends back its pid and the file
+descriptors of its pipes.
+
+Each worker process has its own connection to the spawner, over a Unix socket
+in a temporary directory. The processes launched are children of the spawner,
+which reaps them when asked whether they exited. Killing them does not
+involve the spawner, see ``procs.kill``. The spawner exits when teas does.
+
+Requests are tuples. ``("spawn", cmd, cwd)`` is answered with ``("ok",
+pid)`` followed by the descriptors of stdin, stdout and stderr, or with
+``("error", errno, message)`` if the process could not be launched. ``("poll",
+pid)`` is answered with the exit code of the process, ``None`` if it is
+still running. ``("stop",)`` is not answered.
+"""
+
+import atexit, os, shutil, signal, subprocess, tempfile, threading, time
+from multiprocessing.connection import Listener, Client
+from multiprocessing import reduction
+
+import iolib
+
+# Address of the spawner, ``None`` if it is not running.
+_address = None
+_authkey = None
+# Pid of the process that started the spawner.
+_owner = None
+
+# Connection of this worker process to the spawner, and the pid it belongs to.
+_lock = threading.Lock()
+_conn = None
+_conn_pid = None
+
+def running():
+  """True iff the spawner is running."""
+  return _address != None
+
+def start():
+  """Forks the spawner and waits for it to listen. Meant to be called early,
+  while the heap of teas is still small."""
+  global _address, _authkey, _owner
+  d1r = tempfile.mkdtemp(prefix="teas-spawner-")
+  address = os.path.join(d1r, "socket")
+  authkey = os.urandom(16)
+  parent = os.getpid()
+  (r, w) = os.pipe()
+  pid = os.fork()
+  if pid == 0:
+    os.close(r)
+    code = 1
+    try:
+      listener = Listener(address, "AF_UNIX", authkey=authkey)
+      os.write(w, b"!")
+      os.close(w)
+      _serve(listener, parent)
+      code = 0
+    finally: os._exit(code)
+  os.close(w)
+  ready = os.read(r, 1)
+  os.close(r)
+  if len(ready) == 0:
+    os.waitpid(pid, 0)
+    shutil.rmtree(d1r, True)
+    raise OSError("the spawner failed to start")
+  _address = address
+  _authkey = authkey
+  _owner = parent
+  atexit.register(stop)
+
+def stop():
+  """Stops the spawner if this process started it."""
+  global _address, _conn
+  if _address == None or os.getpid() != _owner: return
+  try: _connection().send( ("stop",) )
+  except (EOFError, IOError, OSError): ()
+  # A spawner started later must not be reached through this connection.
+  with _lock:
+    if _conn != None: _conn.close()
+    _conn = None
+  shutil.rmtree( os.path.dirname(_address), True )
+  _address = None
+
+def _serve(listener, parent):
+  """Serves the connections of the workers, each from its own thread, until
+  asked to stop or until process ``parent`` is gone. Launches are serialized
+  so that processes do not inherit the pipes of each other."""
+  children = {}
+  lock = threading.Lock()
+  def watch():
+    while os.getppid() == parent: time.sleep(1.0)
+    _shutdown(children, lock)
+  watcher = threading.Thread(target=watch)
+  watcher.daemon = True
+  watcher.start()
+  while True:
+    conn = listener.accept()
+    iolib.cloexec( conn.fileno() )
+    handler = threading.Thread(
+      target=_handle, args=(conn, children, lock)
+    )
+    handler.daemon = True
+    handler.start()
+
+def _shutdown(children, lock):
+  """Kills the process groups of the children of the spawner and exits."""
+  with lock:
+    for pid in children.keys():
+      try: os.killpg(pid, signal.SIGKILL)
+      except OSError: ()
+  os._exit(0)
+
+def _handle(conn, children, lock):
+  """Answers the requests of a worker. ``children`` maps the pids of the
+  processes launched and not reaped yet to their ``Popen`` object."""
+  try:
+    while True:
+      request = conn.recv()
+      if request[0] == "spawn":
+        (_, cmd, cwd) = request
+        with lock:
+          try: proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            preexec_fn=os.setsid
+          )
+          except OSError as e:
+            conn.send( ("error", e.errno, e.strerror) )
+            continue
+          children[proc.pid] = proc
+          conn.send( ("ok", proc.pid) )
+          for pipe in [proc.stdin, proc.stdout, proc.stderr]:
+            reduction.send_handle(conn, pipe.fileno(), None)
+            pipe.close()
+      elif request[0] == "poll":
+        with lock:
+          proc = children.get(request[1])
+          if proc == None: code = 0
+          else:
+            code = proc.poll()
+            if code != None: del children[request[1]]
+        conn.send(code)
+      elif request[0] == "stop": _shutdown(children, lock)
+  except (EOFError, IOError, OSError): ()
+  finally:
+    conn.close()
+
+def _connection():
+  """The connection of this worker process to the spawner, opened the first
+  time it is needed."""
+  global _conn, _conn_pid
+  if _conn == None or _conn_pid != os.getpid():
+    _conn = Client(_address, "AF_UNIX", authkey=_authkey)
+    _conn_pid = os.getpid()
+  return _conn
+
+def _request(request, handles=0):
+  """Sends a request to the spawner, returns its answer and the ``handles``
+  descriptors that follow it unless it is an error."""
+  with _lock:
+    conn = _connection()
+    conn.send(request)
+    answer = conn.recv()
+    if isinstance(answer, tuple) and answer[0] == "error": return (answer, [])
+    return ( answer, [ reduction.recv_handle(conn) for _ in range(handles) ] )
+
+def spawn(cmd, cwd=None):
+  """Launches a process through the spawner. Raises an ``OSError`` if it
+  could not be launched."""
+  (answer, fds) = _request( ("spawn", cmd, cwd), 3 )
+  if answer[0] == "error": raise OSError(answer[1], answer[2])
+  return Process(answer[1], fds)
+
+class Process(object):
+  """A process launched by the spawner, with the part of the interface of
+  ``subprocess.Popen`` test executions use."""
+
+  def __init__(self, pid, fds):
+    self.pid = pid
+    self.stdin = os.fdopen(fds[0], "wb", 0)
+    self.stdout = os.fdopen(fds[1], "rb", 0)
+    self.stderr = os.fdopen(fds[2], "rb", 0)
+    self.returncode = None
+
+  def poll(self):
+    """The exit code of the process, ``None`` if it is still running."""
+    if self.returncode == None:
+      self.returncode = _request( ("poll", self.pid) )[0]
+    return self.returncode
+
+  def kill(self):
+    """Kills the process, unless it is already reaped."""
+    if self.returncode != None: return
+    try: os.kill(self.pid, signal.SIGKILL)
+    except OSError: ()
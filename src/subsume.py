@@ -0,0 +1,106 @@
+"""
+Prefix subsumption. Binaries and oracles are deterministic, so running a test
+case also decides every test case the inputs of which are a prefix of its
+own: the prefix fails iff the first failure of the longer test case falls
+inside the prefix, and then at the same step.
+
+The inputs of the jobs sharing a binary and oracles are put in a trie. Only
+the maximal jobs, i.e. the ones at the leaves of the trie, need to run. Each
+of the other jobs is covered by a maximal job below it in the trie, and its
+result is derived from the result of that job.
+"""
+
+import binary as b
+import oracle as o
+import testcase as tc
+import testexec as te
+import failure as f
+import result as r
+import job as j
+
+def covers(seqs):
+  """For each sequence, the index of a maximal sequence it is a prefix of.
+  Maximal sequences cover themselves, a sequence appearing several times is
+  covered by its first occurrence if maximal."""
+  # A node is a triple of a dictionary of children indexed by elements, of
+  # the elements of the children in insertion order, and of the indices of the
+  # sequences ending at this node.
+  root = ({}, [], [])
+  ends = []
+  for i in range(0, len(seqs)):
+    node = root
+    for elm in seqs[i]:
+      if elm not in node[0]:
+        node[0][elm] = ({}, [], [])
+        node[1].append(elm)
+      node = node[0][elm]
+    node[2].append(i)
+    ends.append(node)
+
+  def leaf_below(node):
+    # First child in insertion order, for the result to be deterministic.
+    while len(node[1]) > 0: node = node[0][ node[1][0] ]
+    return node
+
+  return map( lambda node: leaf_below(node)[2][0], ends )
+
+def _group(job):
+  """Jobs can only subsume each other if they share a binary, oracles and
+  expected outputs."""
+  execution = j.execution(job)
+  return (
+    te.wdir(execution), tuple( b.cmd(te.binary(execution)) ),
+    tuple( map( o.path, te.oracles(execution) ) ),
+    tc.expected( te.testcase(execution) )
+  )
+
+def maximal(jobs):
+  """Splits some jobs into the maximal jobs, in their original order, and a
+  map from the identifiers of the maximal jobs to the list of jobs they cover
+  along with their number of steps."""
+  # Loading each test case once.
+  inputs = {}
+  def inputs_of(job):
+    test_case = te.testcase( j.execution(job) )
+    if tc.path(test_case) not in inputs:
+      inputs[ tc.path(test_case) ] = tuple( map(
+        tuple, te.steps( tc.load_values(test_case) )
+      ) )
+    return inputs[ tc.path(test_case) ]
+
+  groups = {}
+  for job in jobs:
+    groups.setdefault( _group(job), [] ).append(job)
+
+  maximal_idents = set()
+  covered = {}
+  for group in groups.values():
+    seqs = map(inputs_of, group)
+    cover_of = covers(seqs)
+    for i in range(0, len(group)):
+      cover = j.ident( group[ cover_of[i] ] )
+      if cover_of[i] == i: maximal_idents.add(cover)
+      else:
+        covered.setdefault(cover, []).append( (group[i], len(seqs[i])) )
+
+  return (
+    [ job for job in jobs if j.ident(job) in maximal_idents ], covered
+  )
+
+def derive(covered, res):
+  """The results of the jobs a result covers."""
+  derived = []
+  for (job, length) in covered.get( r.ident(res), [] ):
+    failure = r.failure(res)
+    if failure != None and f.at(failure) < length:
+      failure = dict(failure)
+      failure["testcase"] = te.testcase( j.execution(job) )
+    else: failure = None
+    divergence = r.divergence(res)
+    if divergence != None and divergence[0] >= length: divergence = None
+    (system, binary, testset, testcase) = j.ident(job)
+    derived.append( r.mk(
+      system, binary, testset, testcase, failure, 0.0, derived=True,
+      divergence=divergence
+    ) )
+  return derived
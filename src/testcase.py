@@ -2,13 +2,19 @@
 A testcase contains
 - ``"path"``: the path to the actual test case,
 - ``"name"``: the name of the test case,
-- ``"format"``: the format of the actual test case,
-- ``"description"``: a list of lines describing the test case.
+- ``"format"``: the format of the actual test case, ``csv`` or ``step_csv``,
+  see ``values.iter_step_csv``,
+- ``"description"``: a list of lines describing the test case,
+- ``"expected"``: the path to the expected outputs of the test case, ``None``
+  if there are none, see ``golden``.
 """
 
-import values
+import values, columns, flags, iolib
 from stdout import log, error, new_line
 
+# Supported test case formats.
+formats = ["csv", "step_csv"]
+
 def path(t):
   """The path to the actual test case."""
   return t["path"]
@@ -25,20 +31,31 @@ def desc(t):
   """The description of a test case."""
   return t["desc"]
 
+def expected(t):
+  """The path to the expected outputs of a test case, ``None`` if there are
+  none."""
+  return t["expected"]
+
 def pprint(prefix, t, lvl=2):
   """Prints a test case."""
   log( "{}{}".format(prefix, name(t)), lvl )
   log( "{}| {} ({})".format(prefix, path(t), format(t)), lvl )
+  if expected(t) != None:
+    log( "{}| expecting {}".format(prefix, expected(t)), lvl )
   log( "{}| description:".format(prefix), lvl )
   for line in desc(t):
     log( "{}| | {}".format(prefix, line), lvl )
 
-def mk(path, name, form4t, desc):
+def mk(path, name, form4t, desc, expected=None):
   """Creates a test case."""
-  return { "path": path, "name": name, "format": form4t, "desc": desc }
+  return {
+    "path": path, "name": name, "format": form4t, "desc": desc,
+    "expected": expected
+  }
 
 def of_xml(tree, path):
-  """Creates a test case from an xml tree."""
+  """Creates a test case from an xml tree. Its expected outputs, if any, are
+  in the csv file of its ``expected`` attribute."""
   if "path" not in tree.attrib.keys(): raise Exception(
     "illegal test set file: data tag missing a path attribute"
   )
@@ -49,6 +66,9 @@ def of_xml(tree, path):
     "illegal test set file: data tag missing a format attribute"
   )
   # Extracting info.
+  expected = None
+  if "expected" in tree.attrib.keys():
+    expected = "{}/{}".format(path, tree.attrib["expected"])
   path = "{}/{}".format(path, tree.attrib["path"])
   name = tree.attrib["name"]
   form4t = tree.attrib["format"]
@@ -59,13 +79,45 @@ def of_xml(tree, path):
   if len(desc) > 0 and desc[-1] == "":
     desc = desc[:-1]
   # Done.
-  return mk(path, name, form4t, desc)
+  return mk(path, name, form4t, desc, expected)
 
-def load_values(t):
-  """Loads the values from the file associated with a test case."""
-  if format(t) != "csv": raise Exception(
-    "unsupported format for values \"{}\", only csv is supported".format(
-      format(t)
+def _unsupported(t):
+  """The exception raised for a test case in an unsupported format."""
+  return Exception(
+    "unsupported format for values \"{}\", only {} are supported".format(
+      format(t), " and ".join(formats)
     )
   )
+
+def load_values(t):
+  """Loads the values from the file associated with a test case."""
+  if format(t) == "step_csv": return values.of_step_csv(path(t))
+  elif format(t) != "csv": raise _unsupported(t)
+  if flags.values_cache():
+    cache_dir = iolib.abs_path( flags.cache_dir() )
+    return columns.load( path(t), columns.path(cache_dir, path(t)) )
   return values.of_csv(path(t))
+
+def load_inputs(t):
+  """The encoded input lines of the steps of a test case, read from the
+  values cache if it is enabled, see ``columns.inputs``. ``None`` if the
+  values cache is disabled or does not support the format of the test
+  case."""
+  if format(t) != "csv" or not flags.values_cache(): return None
+  cache_dir = iolib.abs_path( flags.cache_dir() )
+  return columns.inputs( path(t), columns.path(cache_dir, path(t)) )
+
+def iter_values(t):
+  """Iterates lazily over the vectors of values of a test case, see
+  ``values.seq``."""
+  if format(t) == "step_csv": return values.iter_step_csv(path(t))
+  elif format(t) != "csv": raise _unsupported(t)
+  if flags.values_cache(): return iter( values.seq(load_values(t)) )
+  return values.iter_csv(path(t))
+
+def length(t):
+  """The length of the sequences of values of a test case, without loading
+  the values."""
+  if format(t) == "step_csv": return values.length_of_step_csv(path(t))
+  elif format(t) != "csv": raise _unsupported(t)
+  return values.length_of_csv(path(t))
@@ -1,31 +1,81 @@
 """
 A test execution contains
 - ``"binary"``: binary to test,
-- ``"oracle"``: oracle to use when testing,
+- ``"oracles"``: oracles to use when testing, all fed the inputs and the
+  outputs of the binary, see ``combine``, none to compare the outputs of the
+  binary to the expected outputs of the test case, see ``golden``,
 - ``"binlog"``: log file for the binary output,
 - ``"oralog"``: log file for the oracle output,
-- ``"testcase"``: test case to run.
+- ``"errlog"``: prefix of the files the stderr of the binary and of the
+  oracles are spilled to, see ``drain``,
+- ``"testcase"``: test case to run,
+- ``"wdir"``: directory the binary and the oracles run in, ``None`` for the
+  current directory,
+- ``"trace"``: file the outputs of the binary are stored to and replayed from,
+  ``None`` to neither store nor replay them.
 """
 
-import os, subprocess
+import hashlib, os, signal, subprocess, threading, time, Queue
 
 from stdout import log, new_line
+from excs import ExecError
 import binary as b
 import oracle as o
 import values as v
 import testcase as tc
 import failure as f
+import outcome
+import verdicts
+import pyoracle
+import decode
+import encoded as enc
+import golden as gold
+import traces
+import drain
+import procs
+import warm
 import flags
 
 max_log = flags.max_log_lvl()
 
+# Size in bytes of the chunks of input lines written to a process.
+_chunk_size = 1 << 16
+
+# Maximum number of lines a writer thread writes at once to an oracle.
+_batch_size = 256
+
+# Number of lines of stderr attached to a failure, per process.
+stderr_lines = 10
+
 def binary(t):
   """The binary of a test execution."""
   return t["binary"]
 
+def oracles(t):
+  """The oracles to use when testing."""
+  return t["oracles"]
+
 def oracle(t):
-  """The oracle to use when testing."""
-  return t["oracle"]
+  """The first oracle to use when testing."""
+  return oracles(t)[0]
+
+def golden(t):
+  """True iff a test execution has no oracle, and compares the outputs of the
+  binary to the expected outputs of its test case, see ``golden``."""
+  return len( oracles(t) ) == 0
+
+def in_process(t):
+  """True iff a test execution spawns no oracle, either because its oracles
+  are python oracles, see ``pyoracle``, or because it has none, see
+  ``golden``."""
+  return all( o.kind(orcl) == "python" for orcl in oracles(t) )
+
+def oracle_name(t, i):
+  """The name of the ``i``th oracle of a test execution, in timeouts and
+  stderr files: ``oracle`` if it is the only one, ``oracle1``, ``oracle2``...
+  otherwise."""
+  if len( oracles(t) ) == 1: return "oracle"
+  return "oracle{}".format(i + 1)
 
 def binlog(t):
   """The log file for the binary output."""
@@ -35,10 +85,31 @@ def oralog(t):
   """The log file for the oracle output."""
   return t["oralog"]
 
+def errlog(t):
+  """The prefix of the spill files of the stderr of the processes."""
+  return t["errlog"]
+
+def stderr_path(t, name):
+  """The spill file of the stderr of a process, ``binary`` or the name of an
+  oracle."""
+  return "{}.{}.stderr".format(errlog(t), name)
+
 def testcase(t):
   """The test case to run."""
   return t["testcase"]
 
+def wdir(t):
+  """The directory the binary and the oracles run in."""
+  return t["wdir"]
+
+def trace(t):
+  """The trace file of the outputs of the binary."""
+  return t["trace"]
+
+def set_trace(t, path):
+  """Sets the trace file of the outputs of the binary."""
+  t["trace"] = path
+
 def pprint(prefix, t, lvl=2):
   """Prints a test execution."""
   log(
@@ -46,21 +117,29 @@ def pprint(prefix, t, lvl=2):
   )
   log( "{}| binary:".format(prefix), lvl )
   b.pprint( "{}| | ".format(prefix), binary(t), lvl )
-  log( "{}| oracle:".format(prefix), lvl )
-  o.pprint( "{}| | ".format(prefix), oracle(t), lvl )
+  log( "{}| oracles:".format(prefix), lvl )
+  for orcl in oracles(t):
+    o.pprint( "{}| | ".format(prefix), orcl, lvl )
   log( "{}| testcase:".format(prefix), lvl )
   tc.pprint( "{}| | ".format(prefix), testcase(t), lvl )
 
-def mk(binary, oracle, log_root, testcase):
+def mk(binary, oracles, log_root, testcase, wdir=None):
   """Creates a test execution."""
   name = tc.name(testcase)
   log_prefix = log_root + "/" + name
+  # Test cases of different test sets can share a name.
+  discr = hashlib.sha1(
+    "{}\n{}".format( b.name(binary), tc.path(testcase) )
+  ).hexdigest()[:8]
   return {
     "binary": binary,
-    "oracle": oracle,
+    "oracles": oracles,
     "binlog": log_prefix + ".binary.csv",
     "oralog": log_prefix + ".oracle.csv",
-    "testcase": testcase
+    "errlog": "{}.{}".format(log_prefix, discr),
+    "testcase": testcase,
+    "wdir": wdir,
+    "trace": None
   }
 
 def write_log_header(t, file_bin, file_ora):
@@ -96,95 +175,783 @@ def write_out_seq(values, fil3):
   )
   fil3.write( values + "\n" )
 
-def run(t):
-  """Runs a test execution."""
-  # Opening log files
-  # file_bin = open( binlog(t), "w" )
-  # file_ora = open( oralog(t), "w" )
+def steps(test_case):
+  """The input steps of a test case that are fed to the binary, as lists of
+  values."""
+  seq = v.seq(test_case)
+  return seq[:len(seq) - 1]
+
+def iter_steps(t):
+  """Lazy version of ``steps`` on the test case of a test execution, yields
+  the input steps one at a time."""
+  previous = None
+  first = True
+  for vec in tc.iter_values( testcase(t) ):
+    if not first: yield previous
+    previous = vec
+    first = False
+
+def exec_deadline():
+  """The deadline of a test execution starting now, ``None`` if there is no
+  execution timeout."""
+  if flags.exec_timeout() == None: return None
+  return time.time() + flags.exec_timeout()
+
+def step_deadline(deadline):
+  """The deadline of a step starting now in a test execution with deadline
+  ``deadline``."""
+  if flags.step_timeout() == None: return deadline
+  step = time.time() + flags.step_timeout()
+  if deadline == None: return step
+  return min(step, deadline)
+
+def timeout(t, k, name, deadline):
+  """The failure of a test execution timing out at step ``k`` waiting for
+  process ``name``, where ``deadline`` is the execution deadline."""
+  if deadline != None and time.time() >= deadline:
+    failure = f.mk_timeout(name, "execution", flags.exec_timeout())
+  else:
+    failure = f.mk_timeout(name, "step", flags.step_timeout())
+  f.add_at(failure, k)
+  f.add_testcase(failure, testcase(t))
+  f.pprint("    ", failure, max_log)
+  return failure
+
+def combine(t, failures):
+  """Combines the failures of the oracles of a test execution at one step,
+  ``None`` for the oracles accepting it, with the semantics of
+  ``outcome.first_failure_of_oracles``. Returns the failure if any, ``None``
+  otherwise. The failure merges the ones of the global oracles rejecting the
+  step, or of all the non-global oracles if none accepts it."""
+  if len(failures) == 1: return failures[0]
+  verdict = outcome.first_failure_of_oracles( [
+    { "oracle": orcl, "seq": [ str(failure == None) ] }
+    for (orcl, failure) in zip(oracles(t), failures)
+  ], 1 )
+  if len(verdict) == 0: return None
+  if len(verdict[1]) > 0: blamed = set( map(id, verdict[1]) )
+  else: blamed = set(
+    id(orcl) for orcl in oracles(t) if not o.is_global(orcl)
+  )
+  pairs = [
+    (orcl, failure) for (orcl, failure) in zip(oracles(t), failures)
+    if id(orcl) in blamed
+  ]
+  return f.merge(
+    [ failure for (_, failure) in pairs ],
+    [ o.path(orcl) for (orcl, _) in pairs ]
+  )
 
-  # Writing headers.
-  # write_log_header(t, file_bin, file_ora)
+def check_step(t, k, outputs):
+  """Checks the output lines of the oracles at step ``k``, one per oracle, see
+  ``combine``. Returns the failure if any, ``None`` otherwise."""
+  failures = []
+  for (orcl, output) in zip(oracles(t), outputs):
+    log( "      ora out: {}".format(output), max_log )
+    out_values = decode.fields(output)
+    # out_values = output.split(",")
+    # write_out_seq( out_values, file_ora )
+
+    # Checking the oracle output.
+    failures.append( o.check_values(orcl, out_values) )
+  failure = combine(t, failures)
+  if failure != None:
+    f.add_at(failure, k)
+    f.add_testcase(failure, testcase(t))
+    f.pprint("    ", failure, max_log)
+  else:
+    log( "      oracle check: ok", max_log )
+  return failure
+
+def run_lockstep(t, bin_proc, ora_procs, inputs, outputs, deadline=None):
+  """Feeds the binary the encoded ``inputs``, then the oracles, one step at a
+  time. Appends the output lines of the binary to ``outputs``. Returns the
+  first failure if any, ``None`` otherwise. Times out if the execution is not
+  over by ``deadline``, or if a step takes too long."""
+  bin_reader = decode.of_file(bin_proc.stdout)
+  ora_readers = map( lambda proc: decode.of_file(proc.stdout), ora_procs )
+  # Feeding binary, logging output, feeding oracle, logging output.
+  for k in range( enc.count(inputs) ):
+
+    step_end = step_deadline(deadline)
+
+    log( "    step {}".format(k), max_log )
+
+    # Binary input values.
+    values = enc.line(inputs, k)
+
+    # Feeding binary.
+    log( "      bin in:  {}".format(values), max_log )
+    bin_proc.stdin.write( enc.chunk(inputs, k, k + 1) )
+
+    # Retrieving binary output.
+    output = decode.read(bin_reader, step_end)
+    if output == None:
+      procs.kill(bin_proc, *ora_procs)
+      return timeout(t, k, "binary", deadline)
+    output = output.strip()
+    log( "      bin out: {}".format(output), max_log )
+    outputs.append(output)
+
+    # Creating oracle input values.
+    values = values + ", " + output + "\n"
+
+    # Feeding oracles.
+    log( "      ora in:  {}".format(values.rstrip()), max_log )
+    for ora_proc in ora_procs: ora_proc.stdin.write(values)
+
+    # Retrieving and checking oracle outputs.
+    ora_outputs = []
+    for (i, reader) in enumerate(ora_readers):
+      output = decode.read(reader, step_end)
+      if output == None:
+        procs.kill(bin_proc, *ora_procs)
+        return timeout(t, k, oracle_name(t, i), deadline)
+      ora_outputs.append( output.strip() )
+    failure = check_step(t, k, ora_outputs)
+    if failure != None: return failure
+
+  return None
+
+def check_steps(t, k, batch):
+  """Checks the output lines of the oracles at the steps from ``k`` on in one
+  pass, see ``verdicts``. ``batch`` holds the same number of lines for each
+  oracle. Returns the first failure if any, ``None`` otherwise."""
+  length = len( batch[0] )
+  if length > 1:
+    try:
+      j = verdicts.first( verdicts.failing(
+        oracles(t), [
+          verdicts.rejected(orcl, lines)
+          for (orcl, lines) in zip(oracles(t), batch)
+        ], length
+      ) )
+      if j == None: return None
+      return check_step( t, k + j, [ lines[j] for lines in batch ] )
+    except ValueError:
+      # Malformed lines are only an error if no step fails before them.
+      ()
+  for j in range(0, length):
+    failure = check_step( t, k + j, [ lines[j] for lines in batch ] )
+    if failure != None: return failure
+  return None
+
+def check_python(t, k, lines, previous):
+  """Checks the lines fed to the python oracles at the steps from ``k`` on in
+  one pass. ``previous`` holds the values of the previous step for each
+  oracle, and is updated. Returns the first failure if any, ``None``
+  otherwise."""
+  evaluations = []
+  for (i, orcl) in enumerate( oracles(t) ):
+    (rows, previous[i]) = pyoracle.evaluate(orcl, lines, previous[i])
+    evaluations.append(rows)
+  j = verdicts.first( verdicts.failing(
+    oracles(t), map(pyoracle.rejected, evaluations), len(lines)
+  ) )
+  if j == None: return None
+  log( "      ora in:  {}".format(lines[j]), max_log )
+  return check_step(
+    t, k + j, [ pyoracle.output_line(rows[j]) for rows in evaluations ]
+  )
 
-  # Creating processes.
-  bin_proc = None
-  ora_proc = None
+def check_golden(t, k, lines, expected):
+  """Checks the output lines of the binary at the steps from ``k`` on against
+  the ``expected`` outputs of the test case in one pass. Returns the first
+  mismatch if any, ``None`` otherwise."""
+  res = gold.mismatch( expected, k, lines, flags.real_tolerance() )
+  if res == None: return None
+  (at, i, value) = res
+  line = lines[at - k]
+  log( "      mismatch at {}: {}".format(at, line), max_log )
+  if i == None:
+    if at < gold.length(expected): value = ",".join( [
+      col[at] for col in gold.columns(expected)
+    ] )
+    failure = f.mk_mismatch(None, value, line)
+  else: failure = f.mk_mismatch(
+    gold.ids(expected)[i], value, decode.fields(line)[i]
+  )
+  f.add_at(failure, at)
+  return failure
+
+def checker(t):
+  """The function checking the output lines of the binary of an in-process
+  test execution at the steps from some ``k`` on, given ``k``, the input
+  lines and the output lines. Returns the first failure if any, ``None``
+  otherwise. Raises an ``ExecError`` if the test execution compares to
+  expected outputs and the test case has none."""
+  if golden(t):
+    path = tc.expected( testcase(t) )
+    if path == None or not os.path.isfile(path): raise ExecError(
+      "no expected outputs for a context without oracle",
+      b.name( binary(t) ), tc.name( testcase(t) )
+    )
+    expected = gold.load(path)
+    return lambda k, ins, outs: check_golden(t, k, outs, expected)
+  previous = [None] * len( oracles(t) )
+  return lambda k, ins, outs: check_python(
+    t, k, [ i + ", " + out for (i, out) in zip(ins, outs) ], previous
+  )
 
+def run_in_process(
+  t, bin_proc, inputs, count, outputs, deadline=None, keep=[]
+):
+  """Writes the first ``count`` encoded ``inputs`` to the binary from a
+  feeder thread as ``run_streaming``, and checks the outputs of the binary in
+  batches of the lines it already wrote, see ``checker``. Appends the output
+  lines of the binary to ``outputs``. Returns the first failure if any,
+  ``None`` otherwise. Times out as ``run_streaming``, and keeps the stdin of
+  the binary open if it is in ``keep``. Raises an ``ExecError`` if the binary
+  exits early."""
+  check = checker(t)
+  # Input lines written but not checked yet.
+  pending = Queue.Queue()
+  feeder = threading.Thread(
+    target=_feed_inputs,
+    args=(bin_proc, inputs, count, pending, bin_proc not in keep)
+  )
+  feeder.daemon = True
+  feeder.start()
+
+  reader = decode.of_file(bin_proc.stdout)
+  bulk = flags.log_lvl() < max_log
+  failure = None
+  # True once all the steps were checked.
+  done = False
+  try:
+    k = 0
+    while k < count:
+      log( "    step {}".format(k), max_log )
+      output = decode.read( reader, step_deadline(deadline) )
+      if output == None:
+        failure = timeout(t, k, "binary", deadline)
+        break
+      if not output.endswith("\n"): raise ExecError(
+          "binary exited at step {}".format(k),
+          b.name( binary(t) ), tc.name( testcase(t) )
+        )
+      n = 1
+      if bulk: n = min(count - k, 1 + decode.complete(reader))
+      lines = [ output.strip() ] + map(
+        str.strip, decode.take(reader, n - 1)
+      )
+      log( "      bin out: {}".format(lines[0]), max_log )
+      outputs.extend(lines)
+      failure = check( k, [ pending.get() for _ in lines ], lines )
+      if failure != None: break
+      k += n
+    else: done = True
+  finally:
+    if not done:
+      # Early exit, killing the binary unblocks the feeder.
+      procs.kill(bin_proc)
+    feeder.join()
+
+  return failure
+
+def _step_binary(bin_proc, inputs, stage, cancel, errors, deadline):
+  """Binary stage of ``run_pipeline``. Feeds the binary the encoded
+  ``inputs`` one step at a time and puts the index, input line and output
+  line of each step in bounded queue ``stage``, ``None`` as output line if
+  the binary does not answer in time. Puts ``None`` last. Stops before the
+  next step once event ``cancel`` is set. Meant to run in its own thread,
+  appends exceptions to ``errors``."""
+  reader = decode.of_file(bin_proc.stdout)
   try:
+    for k in range( enc.count(inputs) ):
+      if cancel.is_set(): break
+      values = enc.line(inputs, k)
+      bin_proc.stdin.write( enc.chunk(inputs, k, k + 1) )
+      output = decode.read( reader, step_deadline(deadline) )
+      if output != None: output = output.strip()
+      stage.put( (k, values, output) )
+      if output == None: break
+  except Exception as e: errors.append(e)
+  finally: stage.put(None)
+
+def run_pipeline(
+  t, bin_proc, ora_procs, inputs, outputs, deadline=None, ahead=1
+):
+  """Runs the binary and the oracles as two pipeline stages. The binary stage
+  runs in its own thread, see ``_step_binary``, and can answer up to
+  ``ahead`` steps the oracles have not taken yet. The oracles are fed and
+  checked one step at a time as in ``run_lockstep``, and the binary stage is
+  cancelled as soon as a step fails. Appends the output lines of the binary
+  to ``outputs``. Returns the first failure if any, ``None`` otherwise. Times
+  out as ``run_lockstep``, the binary and the oracles having a step timeout
+  each."""
+  stage = Queue.Queue(ahead)
+  cancel = threading.Event()
+  errors = []
+  binary_stage = threading.Thread(
+    target=_step_binary,
+    args=(bin_proc, inputs, stage, cancel, errors, deadline)
+  )
+  binary_stage.daemon = True
+  binary_stage.start()
 
-    bin_proc = subprocess.Popen(
-      b.cmd(binary(t)),
-      stdin=subprocess.PIPE,
-      stdout=subprocess.PIPE,
-      stderr=subprocess.PIPE
-    )
-    ora_proc = subprocess.Popen(
-      o.path(oracle(t)),
-      stdin=subprocess.PIPE,
-      stdout=subprocess.PIPE,
-      stderr=subprocess.PIPE
-    )
+  ora_readers = map( lambda proc: decode.of_file(proc.stdout), ora_procs )
+  failure = None
+  # True once the binary stage put its last step.
+  finished = False
+  try:
+    for (k, values, output) in iter(stage.get, None):
 
-    # Loading test case.
-    log( "    loading test case \"{}\"".format(tc.name(testcase(t))), max_log )
-    test_case = tc.load_values(testcase(t))
-    max_k = len( v.seq(test_case) ) - 1
+      log( "    step {}".format(k), max_log )
+      log( "      bin in:  {}".format(values), max_log )
 
-    # Result.
-    res = None
+      if output == None:
+        procs.kill(bin_proc, *ora_procs)
+        failure = timeout(t, k, "binary", deadline)
+        break
+      log( "      bin out: {}".format(output), max_log )
+      outputs.append(output)
 
-    # Feeding binary, logging output, feeding oracle, logging output.
-    for k in range(0, max_k):
+      # Creating oracle input values.
+      values = values + ", " + output + "\n"
+
+      # Feeding oracles.
+      log( "      ora in:  {}".format(values.rstrip()), max_log )
+      for ora_proc in ora_procs: ora_proc.stdin.write(values)
+
+      # Retrieving and checking oracle outputs.
+      step_end = step_deadline(deadline)
+      ora_outputs = []
+      for (i, reader) in enumerate(ora_readers):
+        output = decode.read(reader, step_end)
+        if output == None:
+          procs.kill(bin_proc, *ora_procs)
+          failure = timeout(t, k, oracle_name(t, i), deadline)
+          break
+        ora_outputs.append( output.strip() )
+      if failure != None: break
+      failure = check_step(t, k, ora_outputs)
+      if failure != None: break
+    else: finished = True
 
+  finally:
+    if not finished:
+      # Early exit, killing the binary unblocks its stage, emptying the queue
+      # lets it put its last step.
+      cancel.set()
+      procs.kill(bin_proc)
+      while binary_stage.is_alive():
+        try:
+          while True: stage.get_nowait()
+        except Queue.Empty: ()
+        binary_stage.join(0.01)
+    else: binary_stage.join()
+
+  if failure == None and len(errors) > 0: raise errors[0]
+  return failure
+
+def _feed(proc, lines, errors, pending=None, close=True):
+  """Writes some lines to the stdin of a process by chunks and closes it if
+  ``close``. Lines are produced lazily and put in queue ``pending``, if any,
+  before being written, ``None`` is put last. Meant to run in its own thread,
+  stops silently if the pipe breaks. If producing the lines fails, kills the
+  process and appends the exception to ``errors``."""
+  try:
+    chunk = []
+    size = 0
+    for line in lines:
+      if pending != None: pending.put(line)
+      chunk.append(line + "\n")
+      size += len(line) + 1
+      if size >= _chunk_size:
+        proc.stdin.write( "".join(chunk) )
+        chunk = []
+        size = 0
+    proc.stdin.write( "".join(chunk) )
+    if close: proc.stdin.close()
+  except (IOError, OSError, ValueError): ()
+  except Exception as e:
+    errors.append(e)
+    procs.kill(proc)
+  finally:
+    if pending != None: pending.put(None)
+
+def _feed_inputs(proc, inputs, count, pending=None, close=True):
+  """Writes the first ``count`` encoded ``inputs`` to the stdin of a process
+  by chunks of the blob, see ``encoded.chunks``, and closes it if ``close``.
+  The input lines of the steps of a chunk are put in queue ``pending``, if
+  any, before it is written, ``None`` is put last. Meant to run in its own
+  thread, stops silently if the pipe breaks."""
+  try:
+    for (start, stop) in enc.chunks(inputs, _chunk_size):
+      stop = min(stop, count)
+      if start >= stop: break
+      if pending != None:
+        for k in range(start, stop): pending.put( enc.line(inputs, k) )
+      proc.stdin.write( enc.chunk(inputs, start, stop) )
+    if close: proc.stdin.close()
+  except (IOError, OSError, ValueError): ()
+  finally:
+    if pending != None: pending.put(None)
+
+def _forward(t, bin_proc, write, end, pending, outputs, errors):
+  """Forwards each output line of the binary of test execution ``t`` with
+  function ``write``, prefixed by the corresponding input line taken from
+  queue ``pending``, and appends it to ``outputs``. Calls ``end`` at the end
+  with true iff all the lines were forwarded. Meant to run in its own thread,
+  stops silently if a pipe breaks. Appends an ``ExecError`` to ``errors`` if
+  the binary exits early."""
+  done = False
+  reader = decode.of_file(bin_proc.stdout)
+  try:
+    for (k, line) in enumerate( iter(pending.get, None) ):
+      output = decode.read(reader)
+      if not output.endswith("\n"):
+        errors.append( ExecError(
+          "binary exited at step {}".format(k),
+          b.name( binary(t) ), tc.name( testcase(t) )
+        ) )
+        break
+      output = output.strip()
+      outputs.append(output)
+      write( line + ", " + output + "\n" )
+    else: done = True
+  except (IOError, OSError, ValueError): ()
+  finally:
+    try: end(done)
+    except (IOError, OSError, ValueError): ()
+
+def _write(proc, lines, close=True):
+  """Writes the lines taken from queue ``lines`` to the stdin of a process,
+  batching the ones already there. Stops after closing the stdin on
+  ``False``, or on ``None`` if ``close``. Meant to run in its own thread, stops
+  silently if the pipe breaks, but keeps emptying the queue."""
+  broken = False
+  while True:
+    chunk = [ lines.get() ]
+    try:
+      while chunk[-1] not in (None, False) and len(chunk) < _batch_size:
+        chunk.append( lines.get_nowait() )
+    except Queue.Empty: ()
+    last = chunk[-1]
+    if last in (None, False): chunk.pop()
+    try:
+      if not broken:
+        proc.stdin.write( "".join(chunk) )
+        if last == False or (last == None and close): proc.stdin.close()
+    except (IOError, OSError, ValueError): broken = True
+    if last in (None, False): return
+
+def _check_all(
+  t, ora_procs, count, threads, processes, errors, deadline, outputs=None
+):
+  """Checks ``count`` outputs of each oracle while ``threads`` feed the
+  oracles. On early exit, kills ``processes`` to unblock the threads. Returns
+  the first failure if any. Otherwise raises the first of the ``errors`` of
+  the threads if any, an ``ExecError`` if an oracle exits early, and returns
+  ``None``. On timeout, ``outputs`` tells whether
+  the binary answered the current step, the oracle is blamed if ``None``."""
+  for thread in threads:
+    thread.daemon = True
+    thread.start()
+
+  readers = map( lambda proc: decode.of_file(proc.stdout), ora_procs )
+  # Steps are checked in batches of the lines all the oracles already wrote,
+  # unless each step is logged.
+  bulk = flags.log_lvl() < max_log
+  failure = None
+  # Index of the oracle that exited early, if any.
+  exited = None
+  try:
+    k = 0
+    while k < count:
       log( "    step {}".format(k), max_log )
-
-      # Creating binary input values.
-      values = v.seq(test_case)[k]
-      values = reduce(
-        lambda s,v: s + ", " + v,
-        values[1:],
-        values[0]
+      step_end = step_deadline(deadline)
+      ora_outputs = []
+      for (i, reader) in enumerate(readers):
+        output = decode.read(reader, step_end)
+        if output == None:
+          if outputs != None and len(outputs) <= k: name = "binary"
+          else: name = oracle_name(t, i)
+          failure = timeout(t, k, name, deadline)
+          break
+        if not output.endswith("\n"):
+          exited = i
+          break
+        ora_outputs.append( output.strip() )
+      if failure != None or exited != None: break
+      n = 1
+      if bulk: n = min(
+        [count - k] + [ 1 + decode.complete(reader) for reader in readers ]
       )
+      failure = check_steps( t, k, [
+        [output] + decode.take(reader, n - 1)
+        for (output, reader) in zip(ora_outputs, readers)
+      ] )
+      if failure != None: break
+      k += n
+  finally:
+    if failure != None or any( map(lambda th: th.is_alive(), threads) ):
+      # Early exit, killing the processes unblocks the threads.
+      procs.kill(*processes)
+    for thread in threads: thread.join()
+
+  if failure == None and len(errors) > 0: raise errors[0]
+  if failure == None and exited != None: raise ExecError(
+    "{} exited at step {}".format(oracle_name(t, exited), k),
+    b.name( binary(t) ), tc.name( testcase(t) )
+  )
+  return failure
+
+def run_streaming(
+  t, bin_proc, ora_procs, inputs, count, outputs, deadline=None, keep=[]
+):
+  """Writes the first ``count`` encoded ``inputs`` to the binary from a feeder
+  thread by chunks, and forwards the outputs of the binary to the
+  oracles from a forwarder thread as they arrive. With several oracles, the
+  forwarder tees the outputs to a writer thread per oracle, so that a slow
+  oracle does not stall the binary nor the other oracles. Checks the oracle
+  outputs as they arrive. Appends the output lines of the binary to
+  ``outputs``. Returns the first failure if any, ``None`` otherwise. Times out
+  as ``run_lockstep``, a step starting when the previous oracle outputs
+  arrive. The stdin of the processes in ``keep`` is left open, see ``warm``.
+  """
+  # Input lines written but not forwarded yet, bounded by the pipe buffers.
+  pending = Queue.Queue()
+  errors = []
+  feeder = threading.Thread(
+    target=_feed_inputs,
+    args=(bin_proc, inputs, count, pending, bin_proc not in keep)
+  )
+  if len(ora_procs) == 1:
+    ora_proc = ora_procs[0]
+    write = ora_proc.stdin.write
+    def end(done):
+      # Closing stdin on early exit lets the oracle stop.
+      if not done or ora_proc not in keep: ora_proc.stdin.close()
+    writers = []
+  else:
+    # Lines forwarded but not written yet, by oracle.
+    queues = [ Queue.Queue() for _ in ora_procs ]
+    def write(line):
+      for queue in queues: queue.put(line)
+    def end(done):
+      for queue in queues: queue.put(None if done else False)
+    writers = [
+      threading.Thread(
+        target=_write, args=(ora_proc, queue, ora_proc not in keep)
+      ) for (ora_proc, queue) in zip(ora_procs, queues)
+    ]
+  forwarder = threading.Thread(
+    target=_forward, args=(t, bin_proc, write, end, pending, outputs, errors)
+  )
+  return _check_all(
+    t, ora_procs, count, [feeder, forwarder] + writers,
+    [bin_proc] + ora_procs, errors, deadline, outputs
+  )
 
-      # Feeding binary.
-      log( "      bin in:  {}".format(values), max_log )
-      bin_proc.stdin.write( values + "\n" )
+def run_replay(
+  t, ora_procs, inputs, count, outputs, deadline=None, keep=[]
+):
+  """Feeds the oracles with the encoded ``inputs`` and some stored outputs of
+  the binary, without running the binary. Returns the first failure if any,
+  ``None`` otherwise. Times out and keeps stdin open as ``run_streaming``."""
+  count = min( count, len(outputs), enc.count(inputs) )
+  def lines():
+    for k in range(count):
+      yield enc.line(inputs, k) + ", " + outputs[k]
+  errors = []
+  # Oracles share the lines, produced once.
+  if len(ora_procs) == 1: shared = lines()
+  else: shared = list( lines() )
+  feeders = [
+    threading.Thread(
+      target=_feed,
+      args=(ora_proc, iter(shared), errors, None, ora_proc not in keep)
+    ) for ora_proc in ora_procs
+  ]
+  return _check_all(
+    t, ora_procs, count, feeders, ora_procs, errors, deadline
+  )
 
-      # Retrieving binary output.
-      output = bin_proc.stdout.readline().strip()
-      log( "      bin out: {}".format(output), max_log )
-      # out_values = map(
-      #   string.strip
-      #   output.split(",")
-      # )
-      # write_out_seq( out_values, file_bin )
+def _acquire(t, name, cmd, reus3):
+  """A pool entry for the process of the binary or of an oracle of a test
+  execution, see ``warm.acquire``."""
+  return warm.acquire( cmd, wdir(t), reus3, stderr_path(t, name) )
+
+def _acquire_oracles(t, entries):
+  """Appends pool entries for the processes of the oracles of a test
+  execution to ``entries``, so that the ones acquired are released even if
+  acquiring the next one fails. Python oracles have no process."""
+  if in_process(t): return
+  for (i, orcl) in enumerate( oracles(t) ):
+    entries.append(
+      _acquire( t, oracle_name(t, i), o.path(orcl), o.reuse(orcl) )
+    )
 
-      # Creating oracle input values.
-      values = values + ", " + output
-
-      # Feeding oracle.
-      log( "      ora in:  {}".format(values), max_log )
-      ora_proc.stdin.write( values + "\n" )
-
-      # Retrieving oracle output.
-      output = ora_proc.stdout.readline().strip()
-      log( "      ora out: {}".format(output), max_log )
-      out_values = map(
-        lambda s: s.strip(),
-        output.split(",")
+def _reset(entry, deadline):
+  """Writes the reset line to the process of a pool entry and waits for it to
+  write it back until ``deadline``. Returns true iff it did."""
+  process = warm.proc(entry)
+  line = warm.reset( warm.reuse(entry) )
+  try:
+    process.stdin.write(line + "\n")
+    ack = decode.read( decode.of_file(process.stdout), deadline )
+  except (IOError, OSError, ValueError): return False
+  return ack != None and ack.strip() == line
+
+def _release(entries, force):
+  """Releases the processes of a test execution once its verdict is known.
+  Unless ``force``, the processes that can be reused go back to the pool if
+  they acknowledge their reset line, and are killed otherwise."""
+  entries = [ entry for entry in entries if entry != None ]
+  if force:
+    warm.release(entries, True)
+    return
+  limit = warm.ack_timeout
+  if flags.step_timeout() != None: limit = min(limit, flags.step_timeout())
+  deadline = time.time() + limit
+  (done, broken) = ([], [])
+  for entry in entries:
+    if not warm.reusable(entry): done.append(entry)
+    elif _reset(entry, deadline): warm.put_back(entry)
+    else: broken.append(entry)
+  warm.release(done, False)
+  warm.release(broken, True)
+
+def _named_oracles(t, entries):
+  """The pool entries of the oracles of a test execution along with their
+  names."""
+  return [
+    (oracle_name(t, i), entry) for (i, entry) in enumerate(entries)
+  ]
+
+def _drains(entries):
+  """The names and drains of the processes of the pool entries of a test
+  execution, see ``_add_stderr``."""
+  return [
+    (name, warm.drain_of(entry)) for (name, entry) in entries
+    if entry != None
+  ]
+
+def _add_stderr(failure, drains):
+  """Attaches the last lines of stderr of some drained processes to a
+  failure. ``drains`` is a list of pairs of a process name and a drain. Meant
+  to be called as soon as the failure is known, before closing the pipes of
+  the processes makes them complain."""
+  for (name, dr4in) in drains:
+    lines = drain.tail(dr4in, stderr_lines)
+    spill = drain.path(dr4in) if drain.spilled(dr4in) else None
+    if len(lines) > 0 or spill != None:
+      f.add_stderr(failure, name, lines, spill)
+
+def replay(t, inputs, count, deadline=None, seen=None):
+  """Replays the stored trace of a test execution into the oracle if there is
+  one. Returns a pair of a boolean indicating if the replay reached a verdict
+  and the first failure if any. The replay does not reach a verdict if there
+  is no trace, or if the trace is partial and the oracle accepts all of it.
+  When it does, the stored outputs are appended to ``seen`` if any."""
+  stored = traces.read( trace(t) )
+  if stored == None: return (False, None)
+  (outputs, complete) = stored
+  log( "    replaying {} stored output(s)".format(len(outputs)), max_log )
+  if in_process(t):
+    n = min( count, len(outputs), enc.count(inputs) )
+    res = checker(t)(
+      0, [ enc.line(inputs, k) for k in range(n) ], outputs[:n]
+    )
+  else: res = _replay_processes(t, inputs, count, outputs, deadline)
+  if res == None and not complete:
+    log( "    stored trace is partial, running binary", max_log )
+    return (False, None)
+  if seen != None: seen.extend( outputs[:count] )
+  return (True, res)
+
+def _replay_processes(t, inputs, count, outputs, deadline):
+  """Replays some stored outputs into the oracle processes of a test
+  execution, see ``replay``. Returns the first failure if any, ``None``
+  otherwise."""
+  ora_entries = []
+  # Killing the oracles right away unless they accepted the trace.
+  force = True
+  try:
+    _acquire_oracles(t, ora_entries)
+    res = run_replay(
+      t, map(warm.proc, ora_entries), inputs, count, outputs, deadline, [
+        warm.proc(entry) for entry in ora_entries if warm.reusable(entry)
+      ]
+    )
+    if res != None: _add_stderr( res, _drains(
+      _named_oracles(t, ora_entries)
+    ) )
+    else: force = False
+  finally:
+    _release(ora_entries, force)
+  return res
+
+def execute(t, inputs=None, outputs=None):
+  """Runs a test execution. Returns the first failure if any, ``None``
+  otherwise. The input steps are the encoded ``inputs`` if any, the ones of
+  the test case otherwise, see ``encoded.of_testcase``. The output lines of
+  the binary are appended to ``outputs`` if any."""
+  # Opening log files
+  # file_bin = open( binlog(t), "w" )
+  # file_ora = open( oralog(t), "w" )
+
+  # Writing headers.
+  # write_log_header(t, file_bin, file_ora)
+
+  # Loading test case.
+  log( "    loading test case \"{}\"".format(tc.name(testcase(t))), max_log )
+  if inputs == None:
+    inputs = enc.of_testcase( testcase(t), iter_steps(t) )
+  count = enc.count(inputs)
+  deadline = exec_deadline()
+
+  # Output lines of the binary.
+  if outputs == None: outputs = []
+
+  # Re-checking stored binary outputs if asked to.
+  if flags.recheck() and trace(t) != None:
+    (done, res) = replay(t, inputs, count, deadline, outputs)
+    if done:
+      log( "    done", max_log )
+      new_line( max_log )
+      return res
+
+  # Pool entries of the processes, see ``warm``.
+  bin_entry = None
+  ora_entries = []
+  # Killing the processes right away unless the execution succeeded.
+  force = True
+
+  try:
+
+    bin_entry = _acquire(
+      t, "binary", b.cmd(binary(t)), b.reuse(binary(t))
+    )
+    bin_proc = warm.proc(bin_entry)
+    _acquire_oracles(t, ora_entries)
+    ora_procs = map(warm.proc, ora_entries)
+
+    if in_process(t):
+      res = run_in_process(
+        t, bin_proc, inputs, count, outputs, deadline,
+        [bin_proc] if warm.reusable(bin_entry) else []
       )
-      # out_values = output.split(",")
-      # write_out_seq( out_values, file_ora )
-
-      # Checking the oracle output.
-      failure = o.check_values(oracle(t), out_values)
-      if failure != None:
-        f.add_at(failure, k)
-        f.add_testcase(failure, testcase(t))
-        f.pprint("    ", failure, max_log)
-        res = failure
-        break
-      else:
-        log( "      oracle check: ok", max_log )
+    elif flags.exec_mode() == "streaming":
+      keep = [
+        warm.proc(entry) for entry in [bin_entry] + ora_entries
+        if warm.reusable(entry)
+      ]
+      res = run_streaming(
+        t, bin_proc, ora_procs, inputs, count, outputs, deadline, keep
+      )
+    elif flags.run_ahead() > 0:
+      res = run_pipeline(
+        t, bin_proc, ora_procs, inputs, outputs, deadline, flags.run_ahead()
+      )
+    else:
+      res = run_lockstep(t, bin_proc, ora_procs, inputs, outputs, deadline)
+    if res != None: _add_stderr( res, _drains(
+      [ ("binary", bin_entry) ] + _named_oracles(t, ora_entries)
+    ) )
+    else: force = False
 
     log( "    done", max_log )
     new_line( max_log )
@@ -193,15 +960,14 @@ def run(t):
     # Closing log files.
     # file_bin.close()
     # file_ora.close()
-    # Closing processes if necessary.
-    if bin_proc != None:
-      bin_proc.stdin.close()
-      bin_proc.stdout.close()
-      bin_proc.stderr.close()
-    if ora_proc != None:
-      ora_proc.stdin.close()
-      ora_proc.stdout.close()
-      ora_proc.stderr.close()
-
-  return res == None
+    # Releasing processes as soon as the verdict is known.
+    _release([bin_entry] + ora_entries, force)
+
+  if trace(t) != None and flags.store_traces():
+    traces.write( trace(t), outputs, len(outputs) == count )
 
+  return res
+
+def run(t):
+  """Runs a test execution, returns true iff it succeeded."""
+  return execute(t) == None
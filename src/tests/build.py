@@ -0,0 +1,120 @@
+""" Tests setup builds. """
+
+from nose.tools import *
+
+import os, shutil, tempfile
+
+import src.binary as binary
+import src.build as build
+import src.context as context
+
+# Appends a line to ``runs`` and copies ``src`` to ``out``.
+_copy = "sh -c 'echo run >> runs; cp src out'"
+
+def _context(d1r, setups):
+    """ A context in some directory with a binary per setup. """
+    return context.mk( d1r, "sys", [], [], [
+        binary.mk( "bin_{}".format(i), "cat", setup )
+        for (i, setup) in enumerate(setups)
+    ] )
+
+def _write(path, content):
+    """ Writes a file. """
+    fil3 = open(path, "w")
+    fil3.write(content)
+    fil3.close()
+
+def _runs(d1r):
+    """ The number of times the ``_copy`` setup ran in some directory. """
+    if not os.path.exists( os.path.join(d1r, "runs") ): return 0
+    fil3 = open( os.path.join(d1r, "runs") )
+    try: return len( fil3.read().splitlines() )
+    finally: fil3.close()
+
+def _with_dir(test):
+    """ Runs a test on a temporary directory with a ``src`` file. """
+    d1r = tempfile.mkdtemp()
+    try:
+        _write( os.path.join(d1r, "src"), "source\n" )
+        test(d1r)
+    finally:
+        shutil.rmtree(d1r)
+
+def _run_all(d1r, contexts, jobs=2):
+    """ Runs the setups of some contexts with the cache and logs in some
+    directory. """
+    return build.run_all(
+        contexts, os.path.join(d1r, "cache"), os.path.join(d1r, "setup"),
+        jobs
+    )
+
+def test_gather_dedup():
+    """ Setups with the same directory and command are gathered once """
+    def test(d1r):
+        setups = build.gather( [
+            _context( d1r, [ build.mk(_copy), build.mk("true"), None ] ),
+            _context( d1r, [ build.mk(_copy, ["src"]) ] ),
+        ] )
+        assert [ build.cmd(setup) for (_, setup, _) in setups ] == [
+            _copy, "true"
+        ]
+        assert all( wdir == os.path.abspath(d1r) for (wdir, _, _) in setups )
+    _with_dir(test)
+
+def test_skip_up_to_date():
+    """ Setups run again only when their inputs change or their output is
+    missing """
+    def test(d1r):
+        contexts = [ _context( d1r, [ build.mk(_copy, ["src"], "out") ] ) ]
+        assert _run_all(d1r, contexts) == 0
+        assert _runs(d1r) == 1
+        assert _run_all(d1r, contexts) == 0
+        assert _runs(d1r) == 1
+        _write( os.path.join(d1r, "src"), "edited\n" )
+        assert _run_all(d1r, contexts) == 0
+        assert _runs(d1r) == 2
+        os.remove( os.path.join(d1r, "out") )
+        assert _run_all(d1r, contexts) == 0
+        assert _runs(d1r) == 3
+        assert os.path.exists( os.path.join(d1r, "out") )
+    _with_dir(test)
+
+def test_undeclared_inputs():
+    """ Setups that do not declare their inputs always run """
+    def test(d1r):
+        contexts = [ _context( d1r, [ build.mk(_copy, None, "out") ] ) ]
+        assert _run_all(d1r, contexts) == 0
+        assert _run_all(d1r, contexts) == 0
+        assert _runs(d1r) == 2
+    _with_dir(test)
+
+def test_failure():
+    """ Failed setups are counted, logged, and not stamped """
+    def test(d1r):
+        setup = build.mk(
+            "sh -c 'echo run >> runs; echo oops; exit 3'", ["src"]
+        )
+        contexts = [ _context( d1r, [setup] ) ]
+        assert _run_all(d1r, contexts) == 1
+        assert _run_all(d1r, contexts) == 1
+        assert _runs(d1r) == 2
+        log = build.log_path(
+            os.path.join(d1r, "setup"), os.path.abspath(d1r), setup,
+            "binary \"bin_0\" of system \"sys\""
+        )
+        fil3 = open(log)
+        try: assert "oops" in fil3.read()
+        finally: fil3.close()
+    _with_dir(test)
+
+def test_concurrent():
+    """ Setups run concurrently, each of these two waits for the other """
+    def waits(mine, other):
+        return build.mk(
+            "sh -c 'touch {}; for i in $(seq 500); do ".format(mine) +
+            "[ -f {} ] && exit 0; sleep 0.01; done; exit 1'".format(other)
+        )
+    def test(d1r):
+        contexts = [ _context( d1r, [ waits("a", "b"), waits("b", "a") ] ) ]
+        assert _run_all(d1r, contexts, 2) == 0
+    _with_dir(test)
@@ -0,0 +1,120 @@
+""" Tests the result cache. """
+
+from nose.tools import *
+
+import os, shutil, stat, tempfile
+
+import src.binary as binary
+import src.cache as cache
+import src.failure as failure
+import src.job as job
+import src.oracle as oracle
+import src.result as result
+import src.testcase as testcase
+import src.testexec as testexec
+
+def _write(path, content):
+    """ Writes a file, executable. """
+    fil3 = open(path, "w")
+    fil3.write(content)
+    fil3.close()
+    os.chmod(path, stat.S_IRWXU)
+
+def _job(d1r):
+    """ A job the binary, oracle and test case of which are files of a
+    directory. """
+    _write( os.path.join(d1r, "bin.sh"), "#!/bin/sh\ncat\n" )
+    _write( os.path.join(d1r, "oracle.sh"), "#!/bin/sh\necho true\n" )
+    _write( os.path.join(d1r, "tc.csv"), "x,int,0,1,2\n" )
+    return job.mk( "sys", "ts", testexec.mk(
+        binary.mk( "bin", "sh bin.sh" ), [ oracle.mk("oracle.sh", []) ], d1r,
+        testcase.mk( os.path.join(d1r, "tc.csv"), "tc", "csv", [] ), d1r
+    ) )
+
+def _with_job(test):
+    """ Runs a test on a job in a temporary directory. """
+    d1r = tempfile.mkdtemp()
+    try: test( d1r, _job(d1r) )
+    finally: shutil.rmtree(d1r)
+
+def test_key_stable():
+    """ Keys only depend on the content of the files """
+    def test(d1r, j0b):
+        k3y = cache.key(j0b, {})
+        assert cache.key(j0b, {}) == k3y
+        os.utime( os.path.join(d1r, "tc.csv"), (0, 0) )
+        assert cache.key(j0b, {}) == k3y
+    _with_job(test)
+
+def test_key_changes():
+    """ Keys change with the binary, the oracle and the test case """
+    def test(d1r, j0b):
+        keys = [ cache.key(j0b, {}) ]
+        for (name, content) in [
+            ("bin.sh", "#!/bin/sh\ncat -u\n"),
+            ("oracle.sh", "#!/bin/sh\necho false\n"),
+            ("tc.csv", "x,int,0,1,3\n"),
+        ]:
+            _write( os.path.join(d1r, name), content )
+            keys.append( cache.key(j0b, {}) )
+        assert len( set(keys) ) == len(keys)
+    _with_job(test)
+
+def test_key_memo():
+    """ File hashes are memoized until the files change """
+    def test(d1r, j0b):
+        memo = {}
+        k3y = cache.key(j0b, memo)
+        path = os.path.join(d1r, "tc.csv")
+        assert path in memo
+        _write(path, "x,int,0,1,3\n")
+        os.utime( path, (0, 0) )
+        assert cache.key(j0b, memo) != k3y
+    _with_job(test)
+
+def test_store_lookup():
+    """ Stored results are looked up with their test case """
+    def test(d1r, j0b):
+        assert cache.lookup(d1r, "ok", j0b) == None
+        cache.store( d1r, "ok", result.mk("sys", "bin", "ts", "tc", None, 1.0) )
+        res = cache.lookup(d1r, "ok", j0b)
+        assert result.ok(res) and result.cached(res)
+        fail = failure.mk_mismatch(None, "1", "2")
+        failure.add_at(fail, 3)
+        cache.store(
+            d1r, "failed", result.mk("sys", "bin", "ts", "tc", fail, 1.0)
+        )
+        res = cache.lookup(d1r, "failed", j0b)
+        assert failure.at( result.failure(res) ) == 3
+        assert testcase.name(
+            failure.testcase( result.failure(res) )
+        ) == "tc"
+        assert result.ident(res) == job.ident(j0b)
+    _with_job(test)
+
+def test_store_timeout():
+    """ Timeouts are not stored """
+    def test(d1r, j0b):
+        fail = failure.mk_timeout("binary", "step", 1.0)
+        failure.add_at(fail, 0)
+        cache.store(
+            d1r, "timeout", result.mk("sys", "bin", "ts", "tc", fail, 1.0)
+        )
+        assert cache.lookup(d1r, "timeout", j0b) == None
+    _with_job(test)
+
+def test_evict():
+    """ Eviction removes the least recently used entries """
+    def test(d1r, j0b):
+        for k in range(5):
+            cache.store(
+                d1r, str(k), result.mk("sys", "bin", "ts", "tc", None, 1.0)
+            )
+            os.utime( os.path.join(cache.dir_of(d1r), str(k)), (k, k) )
+        # Looking the oldest entry up makes it the most recently used one.
+        assert cache.lookup(d1r, "0", j0b) != None
+        _write( os.path.join(cache.dir_of(d1r), "5.tmp"), "" )
+        assert cache.evict(d1r, 2) == 3
+        assert sorted( os.listdir(cache.dir_of(d1r)) ) == ["0", "4", "5.tmp"]
+        assert cache.evict(d1r, 2) == 0
+    _with_job(test)
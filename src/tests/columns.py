@@ -0,0 +1,155 @@
+""" Tests columnar values cache related things. """
+
+from nose.tools import *
+
+import os, pickle, shutil, tempfile
+
+import src.columns as columns
+import src.encoded as encoded
+import src.testexec as testexec
+import src.values as values
+import src.iolib as iolib
+from src.excs import IOLibError
+
+_csv = """a,bool,true,false,true,true,false,false,true,false,true,false
+b,int,0,-1,42,7,9223372036854775807,3,3,0,1,2
+c,real,0.5,1.0,-2.25,0.1,3.0,1e-05,0.0,2.5,4.0,8.0
+d,real,1/2,0.5,1,2,3,4,5,6,7,8
+e,enum,A,B,A,C,A,B,B,A,C,C
+"""
+
+def _with_csv(content, test):
+    d1r = tempfile.mkdtemp()
+    try:
+        csv_path = os.path.join(d1r, "test.csv")
+        fil3 = open(csv_path, "w")
+        fil3.write(content)
+        fil3.close()
+        test( csv_path, columns.path(d1r, csv_path) )
+    finally:
+        shutil.rmtree(d1r)
+
+def test_load_same_as_csv():
+    """ Loading from the cache yields the same values as parsing the csv """
+    def test(csv_path, cache_path):
+        assert columns.load(csv_path, cache_path) == values.of_csv(csv_path)
+        # Second load goes through the mapped file.
+        assert columns.load(csv_path, cache_path) == values.of_csv(csv_path)
+    _with_csv(_csv, test)
+
+def test_column_kinds():
+    """ Columns are typed unless their values do not print back """
+    def test(csv_path, cache_path):
+        columns.load(csv_path, cache_path)
+        (_, header, _) = columns._map(cache_path)
+        kinds = [ col["kind"] for col in header["columns"] ]
+        assert kinds == [ "bool", "int", "float", "str", "str" ]
+    _with_csv(_csv, test)
+
+def test_rebuild_on_change():
+    """ The cache is rebuilt when the csv file changes """
+    def test(csv_path, cache_path):
+        columns.load(csv_path, cache_path)
+        fil3 = open(csv_path, "w")
+        fil3.write( _csv.replace("true,false,true", "false,false,false", 1) )
+        fil3.close()
+        os.utime(csv_path, (0, 0))
+        assert columns.load(csv_path, cache_path) == values.of_csv(csv_path)
+    _with_csv(_csv, test)
+
+def test_restamp_on_touch():
+    """ Touching the csv file without changing it restamps the cache """
+    def test(csv_path, cache_path):
+        columns.load(csv_path, cache_path)
+        os.utime(csv_path, (0, 0))
+        assert columns.load(csv_path, cache_path) == values.of_csv(csv_path)
+        (_, header, _) = columns._map(cache_path)
+        assert header["mtime"] == os.stat(csv_path).st_mtime
+        # Further loads do not hash the csv file again.
+        sha1 = columns._sha1
+        columns._sha1 = None
+        try:
+            columns._mapped.clear()
+            assert columns.load(csv_path, cache_path) == values.of_csv(
+                csv_path
+            )
+        finally:
+            columns._sha1 = sha1
+    _with_csv(_csv, test)
+
+def test_inputs_same_as_encoded():
+    """ Input lines from the cache are the encoded steps of the csv """
+    def test(csv_path, cache_path):
+        for _ in range(2):
+            inputs = columns.inputs(csv_path, cache_path)
+            expected = encoded.of_steps(
+                testexec.steps( values.of_csv(csv_path) )
+            )
+            assert encoded.offsets(inputs) == encoded.offsets(expected)
+            assert encoded.blob(inputs) == encoded.blob(expected)
+    _with_csv(_csv, test)
+
+def test_load_separators():
+    """ Values containing separators are decoded from typed columns """
+    def test(csv_path, cache_path):
+        assert columns.load(csv_path, cache_path) == values.of_csv(csv_path)
+        (_, header, _) = columns._map(cache_path)
+        assert not header["split"]
+    _with_csv(_csv + "f,string,\"x, y\",\"\n\",z,,,,,,,\n", test)
+
+def test_mapped_bounded():
+    """ Cache files are unmapped beyond the bound """
+    d1r = tempfile.mkdtemp()
+    size = columns._mapped_size
+    columns._mapped_size = 2
+    try:
+        mappings = []
+        for k in range(5):
+            csv_path = os.path.join(d1r, "test_{}.csv".format(k))
+            fil3 = open(csv_path, "w")
+            fil3.write(_csv)
+            fil3.close()
+            cache_path = columns.path(d1r, csv_path)
+            columns.load(csv_path, cache_path)
+            mappings.append( columns._mapped[cache_path][0] )
+        assert len(columns._mapped) == 2
+        for mapping in mappings[:3]:
+            # Closed mappings cannot be read.
+            assert_raises(ValueError, mapping.read_byte)
+        for mapping in mappings[3:]: mapping.seek(0)
+    finally:
+        columns._mapped_size = size
+        columns._mapped.clear()
+        shutil.rmtree(d1r)
+
+def test_restamp_closes():
+    """ Restamping a cache file unmaps the previous version """
+    def test(csv_path, cache_path):
+        columns.load(csv_path, cache_path)
+        mapping = columns._mapped[cache_path][0]
+        os.utime(csv_path, (0, 0))
+        columns.load(csv_path, cache_path)
+        assert_raises(ValueError, mapping.read_byte)
+        assert columns._mapped[cache_path][0] is not mapping
+    _with_csv(_csv, test)
+
+def test_concurrent_mkdir():
+    """ Creating the cache directory while another job creates it """
+    d1r = tempfile.mkdtemp()
+    path = columns.dir_of(d1r)
+    real_mkdir = os.mkdir
+    def racing_mkdir(p4th, *args):
+        # Another job wins the race.
+        real_mkdir(p4th, *args)
+        real_mkdir(p4th, *args)
+    os.mkdir = racing_mkdir
+    try: iolib.mkdir(path)
+    finally:
+        os.mkdir = real_mkdir
+        shutil.rmtree(d1r)
+
+def test_io_error_pickles():
+    """ Io errors go through process pools """
+    e = pickle.loads( pickle.dumps( IOLibError("cannot mkdir") ) )
+    assert e.msg == "cannot mkdir"
+    assert str(e) == "[IOLib] cannot mkdir"
@@ -0,0 +1,76 @@
+""" Tests the incremental decoding of process outputs. """
+
+from nose.tools import *
+
+import os
+
+import src.decode as decode
+import src.iolib as iolib
+
+def _records(form4t, chunks):
+    """ The records of some chunks fed to a decoder one at a time. """
+    decoder = decode.mk(None, form4t)
+    records = []
+    for chunk in chunks + [""]:
+        decode.feed(decoder, chunk)
+        while True:
+            record = decode.read(decoder)
+            if record == None or record == "": break
+            records.append(record)
+    return records
+
+def test_csv():
+    """ Lines split across chunks """
+    assert _records("csv", ["1, 2\n3", ", 4\n", "5, 6"]) == [
+        "1, 2\n", "3, 4\n", "5, 6"
+    ]
+
+def test_tuple():
+    """ Tuples split across chunks """
+    records = _records(
+        "tuple", ["(0, 0.) (7, .69)", "\n(3, 3.) (42", ", 17.7) (1, ", "1.)"]
+    )
+    assert map( lambda r: decode.fields(r, "tuple"), records ) == [
+        ["0", "0."], ["7", ".69"], ["3", "3."], ["42", "17.7"], ["1", "1."]
+    ]
+
+def test_take():
+    """ Complete records taken at once """
+    decoder = decode.mk(None)
+    decode.feed(decoder, "a\nb\nc")
+    assert decode.complete(decoder) == 2
+    assert decode.take(decoder, 2) == ["a", "b"]
+    decode.feed(decoder, "d\n")
+    assert decode.read(decoder) == "cd\n"
+
+def test_pipe():
+    """ Records read from a pipe """
+    (r, w) = os.pipe()
+    os.write(w, "x, y\nz")
+    os.close(w)
+    fil3 = os.fdopen(r)
+    decoder = decode.of_file(fil3)
+    assert decode.read(decoder, None) == "x, y\n"
+    assert decode.read(decoder, None) == "z"
+    assert decode.read(decoder, None) == ""
+    fil3.close()
+
+def test_typed():
+    """ Typed values of a record """
+    assert decode.typed("1 , true,\t2.5\n", [int, str, float]) == [
+        1, "true", 2.5
+    ]
+
+@raises(ValueError)
+def test_typed_fail_width():
+    """ Typed values (fail, missing value) """
+    decode.typed("1", [int, int])
+
+def test_file_to_output_sequences():
+    """ Output sequences of tuple chunks """
+    outputs = [ { "seq": [] }, { "seq": [] } ]
+    iolib.file_to_output_sequences(
+        outputs, 3, None, False, ["(0, 0.) (7, .69)", "(3, 3.) (42", ", 1)"]
+    )
+    assert outputs[0]["seq"] == ["0", "7", "3"]
+    assert outputs[1]["seq"] == ["0.", ".69", "3."]
@@ -0,0 +1,26 @@
+""" Tests differential execution related things. """
+
+from nose.tools import *
+
+import src.differential as differential
+
+def test_first_agree():
+    """ No divergence when outputs agree up to spaces """
+    assert differential.first([
+        ("a", ["true, 1", "false, 2"]), ("b", ["true,1", "false , 2"])
+    ]) == None
+
+def test_first_diverge():
+    """ First divergence """
+    assert differential.first([
+        ("a", ["true, 1", "false, 2", "true, 3"]),
+        ("b", ["true, 1", "false, 3", "true, 4"]),
+        ("c", ["true, 1", "false, 2", "true, 5"]),
+    ]) == (1, { "a": "false, 2", "b": "false, 3", "c": "false, 2" })
+
+def test_first_shorter():
+    """ A binary stopping early does not diverge """
+    assert differential.first([
+        ("a", ["true, 1"]), ("b", ["true, 1", "false, 2"])
+    ]) == None
+    assert differential.first([ ("a", ["true, 1"]) ]) == None
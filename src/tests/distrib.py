@@ -0,0 +1,112 @@
+""" Tests distributed runs. """
+
+from nose.tools import *
+
+import multiprocessing, os, shutil, signal, socket, stat, tempfile
+
+import src.binary as binary
+import src.distrib as distrib
+import src.job as job
+import src.oracle as oracle
+import src.result as result
+import src.testcase as testcase
+import src.testexec as testexec
+
+# Rejects the steps where the binary outputs a 7.
+_oracle = """#!/bin/sh
+while read l; do
+  case "$l" in
+    *", 7") echo false ;;
+    *) echo true ;;
+  esac
+done
+"""
+
+# Answers each step after a while.
+_binary = """#!/bin/sh
+while read l; do sleep 0.05; echo $l; done
+"""
+
+def _script(d1r, name, content):
+    """ Writes an executable shell script, returns its path. """
+    path = os.path.join(d1r, name)
+    fil3 = open(path, "w")
+    fil3.write(content)
+    fil3.close()
+    os.chmod(path, stat.S_IRWXU)
+    return path
+
+def _jobs(d1r):
+    """ Jobs running a slow binary on test cases, some of which fail. """
+    orcl = oracle.mk( _script(d1r, "oracle.sh", _oracle), [ {
+        "mode": None, "count": "1", "file": "", "row": "1", "col": "1"
+    } ] )
+    bin4ry = binary.mk( "bin", _script(d1r, "bin.sh", _binary) )
+    jobs = []
+    for i in range(12):
+        name = "tc_{}".format(i)
+        tc_path = os.path.join(d1r, name + ".csv")
+        fil3 = open(tc_path, "w")
+        fil3.write( "x,int,{}\n".format(
+            ",".join( str( (i + k) % 10 ) for k in range(6) )
+        ) )
+        fil3.close()
+        jobs.append( job.mk( "sys", "ts", testexec.mk(
+            bin4ry, [orcl], d1r, testcase.mk(tc_path, name, "csv", []), d1r
+        ) ) )
+    return jobs
+
+def _free_port():
+    """ A TCP port on localhost nothing listens on. """
+    sock = socket.socket()
+    sock.bind( ("localhost", 0) )
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def _verdict(res):
+    """ The identifier of a result and whether it succeeded. """
+    return ( result.ident(res), result.ok(res) )
+
+def test_lost_worker():
+    """ The job of a worker killed mid-run goes to the other worker """
+    d1r = tempfile.mkdtemp()
+    key = os.environ.get("TEAS_AUTHKEY")
+    os.environ["TEAS_AUTHKEY"] = "test"
+    workers = []
+    try:
+        jobs = _jobs(d1r)
+        address = distrib.of_string( "localhost:{}".format( _free_port() ) )
+        for _ in range(2):
+            worker = multiprocessing.Process(
+                target=distrib.work, args=(address, 1)
+            )
+            worker.start()
+            workers.append(worker)
+        results = []
+        for res in distrib.coordinate(address, jobs):
+            if len(results) == 0: os.kill(workers[0].pid, signal.SIGKILL)
+            results.append(res)
+        assert sorted( map(_verdict, results) ) == sorted(
+            _verdict( job.run(j0b) ) for j0b in jobs
+        )
+        assert not all( map(result.ok, results) )
+    finally:
+        if key == None: del os.environ["TEAS_AUTHKEY"]
+        else: os.environ["TEAS_AUTHKEY"] = key
+        for worker in workers:
+            if worker.is_alive(): worker.terminate()
+            worker.join()
+        shutil.rmtree(d1r)
+
+@raises(ValueError)
+def test_tcp_requires_key():
+    """ TCP addresses require a key """
+    key = os.environ.pop("TEAS_AUTHKEY", None)
+    try: distrib.authkey( distrib.of_string("localhost:4242") )
+    finally:
+        if key != None: os.environ["TEAS_AUTHKEY"] = key
+
+def test_unix_default_key():
+    """ Unix sockets have a default key """
+    assert distrib.authkey( distrib.of_string("unix:/tmp/teas.sock") ) != None
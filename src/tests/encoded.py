@@ -0,0 +1,55 @@
+""" Tests the encoded inputs of test cases. """
+
+from nose.tools import *
+
+import os, shutil, tempfile
+
+import src.encoded as encoded
+import src.flags as flags
+import src.testcase as testcase
+
+def _inputs():
+    """ Encoded inputs of three steps. """
+    return encoded.of_steps( iter( [
+        ["1", "true"], ["22", "false"], ["3", "t"]
+    ] ) )
+
+def test_lines():
+    """ Input lines of the steps """
+    inputs = _inputs()
+    assert encoded.count(inputs) == 3
+    assert encoded.line(inputs, 1) == "22, false"
+    assert encoded.chunk(inputs, 1, 3) == "22, false\n3, t\n"
+
+def test_chunks():
+    """ Chunks of at least some size """
+    inputs = _inputs()
+    assert list( encoded.chunks(inputs, 1) ) == [ (0, 1), (1, 2), (2, 3) ]
+    assert list( encoded.chunks(inputs, 10) ) == [ (0, 2), (2, 3) ]
+    assert list( encoded.chunks(inputs, 1000) ) == [ (0, 3) ]
+    assert list( encoded.chunks(encoded.of_steps([]), 10) ) == []
+
+def test_of_testcase_cache():
+    """ Encoded inputs read from the values cache """
+    d1r = tempfile.mkdtemp()
+    (cache_dir, values_cache) = ( flags.cache_dir(), flags.values_cache() )
+    try:
+        path = os.path.join(d1r, "tc.csv")
+        fil3 = open(path, "w")
+        fil3.write("x,int,1,2,3\ny,bool,true,false,true\n")
+        fil3.close()
+        test_case = testcase.mk(path, "tc", "csv", [])
+        flags.set_cache_dir(d1r)
+        flags.set_values_cache(True)
+        # Steps are not needed when reading from the cache.
+        inputs = encoded.of_testcase(test_case, None)
+        assert encoded.count(inputs) == 1
+        assert encoded.line(inputs, 0) == "1, true"
+        flags.set_values_cache(False)
+        assert encoded.of_testcase(
+            test_case, iter( [ ["1", "true"] ] )
+        ) == inputs
+    finally:
+        flags.set_cache_dir(cache_dir)
+        flags.set_values_cache(values_cache)
+        shutil.rmtree(d1r)
@@ -0,0 +1,81 @@
+""" Tests the executor backends. """
+
+from nose.tools import *
+
+import os, shutil, stat, tempfile
+
+import src.binary as binary
+import src.executor as executor
+import src.failure as failure
+import src.job as job
+import src.oracle as oracle
+import src.result as result
+import src.testcase as testcase
+import src.testexec as testexec
+
+# Rejects the steps where the binary outputs a 7.
+_oracle = """#!/bin/sh
+while read l; do
+  case "$l" in
+    *", 7") echo false ;;
+    *) echo true ;;
+  esac
+done
+"""
+
+def _jobs(d1r):
+    """ Jobs running ``cat`` on test cases, some of which fail. """
+    path = os.path.join(d1r, "oracle.sh")
+    fil3 = open(path, "w")
+    fil3.write(_oracle)
+    fil3.close()
+    os.chmod(path, stat.S_IRWXU)
+    orcl = oracle.mk(path, [ {
+        "mode": None, "count": "1", "file": "", "row": "1", "col": "1"
+    } ])
+    jobs = []
+    for i in range(12):
+        name = "tc_{}".format(i)
+        tc_path = os.path.join(d1r, name + ".csv")
+        fil3 = open(tc_path, "w")
+        fil3.write( "x,int,{}\n".format(
+            ",".join( str( (i + k) % 10 ) for k in range(i % 5 + 3) )
+        ) )
+        fil3.close()
+        jobs.append( job.mk( "sys", "ts", testexec.mk(
+            binary.mk("cat", "cat"), [orcl], d1r,
+            testcase.mk(tc_path, name, "csv", []), d1r
+        ) ) )
+    return jobs
+
+def _verdicts(backend, jobs):
+    """ The verdicts of some jobs run with a backend. """
+    ex3cutor = executor.mk(backend, 4)
+    try:
+        results = list( executor.imap_unordered(ex3cutor, job.run, jobs) )
+    finally:
+        executor.close(ex3cutor)
+    return sorted(
+        (
+            result.ident(res),
+            None if result.ok(res) else failure.at( result.failure(res) )
+        ) for res in results
+    )
+
+def test_thread_same_as_process():
+    """ The thread backend yields the verdicts of the process backend """
+    d1r = tempfile.mkdtemp()
+    try:
+        jobs = _jobs(d1r)
+        verdicts = _verdicts("process", jobs)
+        assert len(verdicts) == len(jobs)
+        assert any( at != None for (_, at) in verdicts )
+        assert any( at == None for (_, at) in verdicts )
+        assert _verdicts("thread", jobs) == verdicts
+    finally:
+        shutil.rmtree(d1r)
+
+@raises(ValueError)
+def test_unknown_backend():
+    """ Unknown backends are rejected """
+    executor.mk("asyncio", 4)
@@ -0,0 +1,66 @@
+""" Tests the comparison to expected outputs. """
+
+from nose.tools import *
+
+import src.golden as golden
+import src.binary as binary
+import src.testcase as testcase
+import src.testexec as testexec
+
+def _expected():
+    """ Expected outputs of three steps. """
+    return golden.mk(
+        ["y", "ok", "r"], ["int", "bool", "real"], [
+            ["1", "2", "3"], ["true", "true", "false"], ["0.5", "1/3", "2.0"]
+        ]
+    )
+
+def test_equal():
+    """ Values equal up to their type """
+    assert golden.equal("int", "07", "7", 0)
+    assert golden.equal("bool", "true", "1", 0)
+    assert golden.equal("real", "1/3", "0.3333334", 1e-6)
+    assert not golden.equal("real", "1/3", "0.3334", 1e-6)
+    assert not golden.equal("int", "1", "one", 0)
+    assert not golden.equal("enum", "a", "b", 0)
+
+def test_mismatch_none():
+    """ Outputs matching the expected ones """
+    assert golden.mismatch(
+        _expected(), 1, ["2, t, 0.333333333", "3, false, 2"], 1e-6
+    ) == None
+
+def test_mismatch_first():
+    """ First mismatching step and output """
+    assert golden.mismatch(
+        _expected(), 0, ["1, true, 0.5", "2, true, 0.3", "4, f, 2.0"], 1e-6
+    ) == (1, 2, "1/3")
+
+def test_mismatch_lines():
+    """ Mismatches of whole lines """
+    assert golden.mismatch(_expected(), 0, ["1, true"], 1e-6) == (0, None, None)
+    assert golden.mismatch(
+        _expected(), 2, ["3, false, 2.0", "4, true, 1.0"], 1e-6
+    ) == (3, None, None)
+
+def test_mismatch_before_line():
+    """ Mismatches before a mismatching line come first """
+    assert golden.mismatch(
+        golden.mk(['o'], ['int'], [['1', '2', '3']]), 0, ['9', '2, 5'], 1e-6
+    ) == (0, 0, '1')
+    assert golden.mismatch(
+        golden.mk(['o'], ['int'], [['1', '2', '3']]), 0, ['1', '2, 5'], 1e-6
+    ) == (1, None, None)
+
+def test_check_golden():
+    """ Mismatch failures """
+    t = testexec.mk(
+        binary.mk("bin", "bin"), [], "/tmp",
+        testcase.mk("tc.csv", "tc", "csv", [], "tc.out.csv")
+    )
+    assert testexec.golden(t) and testexec.in_process(t)
+    failure = testexec.check_golden(
+        t, 0, ["1, true, 0.5", "2, false, 1/3"], _expected()
+    )
+    assert failure["at"] == 1
+    assert failure["mismatch"] == ("ok", "true", "false")
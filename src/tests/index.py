@@ -0,0 +1,126 @@
+""" Tests the index of parsed contexts. """
+
+from nose.tools import *
+
+import os, pickle, shutil, tempfile
+
+import src.binary as binary
+import src.context as context
+import src.index as index
+import src.testcase as testcase
+import src.testset as testset
+
+_context = """<?xml version="1.0"?>
+<data system="sys">
+  <oracle path="oracle.sh">
+    <output count="1" file="spec.lus" row="1" col="1"></output>
+  </oracle>
+  <tests>ts.xml</tests>
+  <binary name="bin">cat</binary>
+</data>
+"""
+
+_testset = """<?xml version="1.0"?>
+<data system="sys" name="ts">
+  <testcase path="tc.csv" name="tc" format="csv">
+    a test case
+  </testcase>
+</data>
+"""
+
+def _write(path, content):
+    """ Writes a file. """
+    fil3 = open(path, "w")
+    fil3.write(content)
+    fil3.close()
+
+def _with_entry(test):
+    """ Runs a test on the entry of a context in a temporary directory. """
+    d1r = tempfile.mkdtemp()
+    try:
+        _write( os.path.join(d1r, "ctx.xml"), _context )
+        _write( os.path.join(d1r, "ts.xml"), _testset )
+        _write( os.path.join(d1r, "tc.csv"), "x,int,0,1,2\n" )
+        test( d1r, index.of_file( os.path.join(d1r, "ctx.xml") ) )
+    finally:
+        shutil.rmtree(d1r)
+
+def test_fresh():
+    """ Entries are fresh until their files change """
+    def test(d1r, entry):
+        assert index.is_fresh(entry)
+        # Test case files are not sources of the entry.
+        _write( os.path.join(d1r, "tc.csv"), "x,int,0,1,3\n" )
+        assert index.is_fresh(entry)
+    _with_entry(test)
+
+def test_stale_context():
+    """ Entries are stale when their context file changes """
+    def test(d1r, entry):
+        os.utime( os.path.join(d1r, "ctx.xml"), (0, 0) )
+        assert not index.is_fresh(entry)
+    _with_entry(test)
+
+def test_stale_testset():
+    """ Entries are stale when a test set file changes """
+    def test(d1r, entry):
+        _write( os.path.join(d1r, "ts.xml"), _testset.replace("tc", "td") )
+        assert not index.is_fresh(entry)
+    _with_entry(test)
+
+def test_stale_removed():
+    """ Entries are stale when a source file is removed """
+    def test(d1r, entry):
+        os.remove( os.path.join(d1r, "ts.xml") )
+        assert not index.is_fresh(entry)
+    _with_entry(test)
+
+def test_of_file():
+    """ Entries hold the parsed context and its test sets """
+    def test(d1r, entry):
+        ctx = index.context(entry)
+        assert context.system(ctx) == "sys"
+        assert map( binary.name, context.bins(ctx) ) == ["bin"]
+        testsets = index.testsets(entry)
+        ts_path = os.path.realpath( os.path.join(d1r, "ts.xml") )
+        assert map(os.path.realpath, testsets.keys()) == [ts_path]
+        tests = testset.tests( testsets.values()[0] )
+        assert testset.name( testsets.values()[0] ) == "ts"
+        assert map(testcase.name, tests) == ["tc"]
+    _with_entry(test)
+
+def test_round_trip():
+    """ Loading an index yields the entries it was saved with """
+    def test(d1r, entry):
+        cache_dir = os.path.join(d1r, "cache")
+        assert index.load(cache_dir) == {}
+        index.save( cache_dir, { "ctx.xml": entry } )
+        loaded = index.load(cache_dir)
+        assert loaded == { "ctx.xml": entry }
+        assert index.is_fresh( loaded["ctx.xml"] )
+    _with_entry(test)
+
+def test_load_outdated():
+    """ Indices of another version are ignored """
+    d1r = tempfile.mkdtemp()
+    try:
+        fil3 = open( index.path(d1r), "wb" )
+        pickle.dump( { "version": -1, "entries": { "ctx.xml": {} } }, fil3 )
+        fil3.close()
+        assert index.load(d1r) == {}
+    finally:
+        shutil.rmtree(d1r)
+
+def test_load_ill_formed():
+    """ Ill-formed indices are ignored """
+    d1r = tempfile.mkdtemp()
+    try:
+        for content in [ "not a pickle", "" ]:
+            _write( index.path(d1r), content )
+            assert index.load(d1r) == {}
+        fil3 = open( index.path(d1r), "wb" )
+        pickle.dump( ["ctx.xml"], fil3 )
+        fil3.close()
+        assert index.load(d1r) == {}
+    finally:
+        shutil.rmtree(d1r)
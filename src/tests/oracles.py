@@ -0,0 +1,60 @@
+""" Tests the combination of several oracles. """
+
+from nose.tools import *
+
+import xml.etree.ElementTree as xet
+
+import src.oracle as oracle
+import src.binary as binary
+import src.testcase as testcase
+import src.testexec as testexec
+
+def _output(mode=None):
+    """ An output of an oracle. """
+    return {
+        "mode": mode, "count": "1", "file": "", "row": "1", "col": "1"
+    }
+
+def _execution(*glob4ls):
+    """ A test execution with an oracle per global flag. """
+    oracles = [
+        oracle.mk("o{}".format(i), [ _output() ], glob4l=glob4l)
+        for (i, glob4l) in enumerate(glob4ls)
+    ]
+    return testexec.mk(
+        binary.mk("bin", "bin"), oracles, "/tmp",
+        testcase.mk("tc.csv", "tc", "csv", [])
+    )
+
+def _failure(t, i):
+    """ The failure of the ``i``th oracle of a test execution. """
+    return oracle.check_values( testexec.oracles(t)[i], ["false"] )
+
+def test_all_of_xml():
+    """ Oracle parsing, one per oracle tag """
+    oracles = oracle.all_of_xml( xet.fromstring(
+        "<data><oracle path=\"a\"/><oracle path=\"b\" global=\"false\"/></data>"
+    ) )
+    assert map(oracle.path, oracles) == ["a", "b"]
+    assert map(oracle.is_global, oracles) == [True, False]
+
+def test_combine_single():
+    """ A single oracle decides alone """
+    t = _execution(False)
+    assert testexec.combine(t, [None]) == None
+    assert testexec.combine(t, [ _failure(t, 0) ]) == _failure(t, 0)
+
+def test_combine_global():
+    """ Any global oracle rejecting a step fails it """
+    t = _execution(True, True, False)
+    assert testexec.combine(t, [None, None, None]) == None
+    failure = testexec.combine(t, [None, _failure(t, 1), None])
+    assert failure["oracles"] == ["o1"]
+
+def test_combine_modes():
+    """ Mode oracles fail a step only if they all reject it """
+    t = _execution(True, False, False)
+    assert testexec.combine(t, [None, _failure(t, 1), None]) == None
+    failure = testexec.combine(t, [None, _failure(t, 1), _failure(t, 2)])
+    assert failure["oracles"] == ["o1", "o2"]
+    assert len(failure["globals"]) == 2
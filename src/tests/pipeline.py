@@ -0,0 +1,51 @@
+""" Tests the pipelined lockstep execution. """
+
+from nose.tools import *
+
+import src.binary as binary
+import src.encoded as encoded
+import src.oracle as oracle
+import src.procs as procs
+import src.testcase as testcase
+import src.testexec as testexec
+
+def _execution():
+    """ A test execution with an oracle judging one global output. """
+    orcl = oracle.mk("o", [ {
+        "mode": None, "count": "1", "file": "", "row": "1", "col": "1"
+    } ])
+    return testexec.mk(
+        binary.mk("bin", "bin"), [orcl], "/tmp",
+        testcase.mk("tc.csv", "tc", "csv", [])
+    )
+
+def _run(oracle_script, steps, ahead):
+    """ Runs ``cat`` as binary against a shell oracle. """
+    bin_proc = procs.spawn(["cat"])
+    ora_proc = procs.spawn(["sh", "-c", oracle_script])
+    outputs = []
+    try:
+        failure = testexec.run_pipeline(
+            _execution(), bin_proc, [ora_proc],
+            encoded.of_steps( [ [str(k)] for k in range(steps) ] ), outputs,
+            None, ahead
+        )
+    finally:
+        procs.release([bin_proc, ora_proc], True)
+    return (failure, outputs)
+
+def test_pipeline_success():
+    """ Every step reaches the oracles """
+    (failure, outputs) = _run(
+        "while read l; do echo true; done", 100, 3
+    )
+    assert failure == None
+    assert outputs == [ str(k) for k in range(100) ]
+
+def test_pipeline_cancel():
+    """ A failure stops the binary stage within the run ahead """
+    (failure, outputs) = _run(
+        "read l; echo true; read l; echo false; cat > /dev/null", 1000, 2
+    )
+    assert failure["at"] == 1
+    assert len(outputs) == 2
@@ -0,0 +1,112 @@
+""" Tests process lifecycle related things. """
+
+from nose.tools import *
+
+import os
+
+import src.procs as procs
+
+def _delta(before, after):
+    """ The difference of the counters of two snapshots. """
+    return dict(
+        (name, after[name] - before[name])
+        for name in ["spawned", "reaped", "killed", "leaked"]
+    )
+
+def test_release_exits():
+    """ Release reaps a process exiting on end of input """
+    before = procs.snapshot()
+    proc = procs.spawn(["cat"])
+    procs.release([proc, None])
+    assert proc.returncode == 0
+    assert _delta(before, procs.snapshot()) == {
+        "spawned": 1, "reaped": 1, "killed": 0, "leaked": 0
+    }
+
+def test_release_force():
+    """ Forced release kills and reaps a running process """
+    before = procs.snapshot()
+    proc = procs.spawn(["sleep", "100"])
+    assert procs.release([proc], True) == 0
+    assert proc.returncode != None
+    assert _delta(before, procs.snapshot()) == {
+        "spawned": 1, "reaped": 1, "killed": 1, "leaked": 0
+    }
+
+def test_kill_counts_once():
+    """ Killing a process twice counts it once """
+    before = procs.snapshot()
+    proc = procs.spawn(["sleep", "100"])
+    procs.kill(proc)
+    procs.kill(proc)
+    procs.release([proc], True)
+    assert _delta(before, procs.snapshot())["killed"] == 1
+
+def test_kill_reaped():
+    """ Killing a reaped process leaves its former process group alone """
+    before = procs.snapshot()
+    proc = procs.spawn(["true"])
+    proc.stderr.close()
+    procs.release([proc])
+    assert proc.returncode == 0
+    signalled = []
+    killpg = os.killpg
+    os.killpg = lambda pid, sig: signalled.append(pid)
+    try: procs.kill(proc)
+    finally: os.killpg = killpg
+    assert signalled == []
+    assert _delta(before, procs.snapshot())["killed"] == 0
+
+def test_kill_exited():
+    """ Killing a process that exited on its own does not count it """
+    before = procs.snapshot()
+    proc = procs.spawn(["true"])
+    proc.stderr.close()
+    # Waits for the process to be a zombie, without reaping it.
+    stat = "/proc/{}/stat".format(proc.pid)
+    while open(stat).read().split(")")[-1].split()[0] != "Z": ()
+    procs.kill(proc)
+    assert proc.returncode == 0
+    procs.release([proc])
+    assert _delta(before, procs.snapshot())["killed"] == 0
+
+def test_release_closes_fds():
+    """ Released processes leave no file descriptor open """
+    procs.release( [ procs.spawn(["cat"]) ] )
+    before = procs.open_fds()
+    for _ in range(10):
+        proc = procs.spawn(["cat"])
+        proc.stderr.close()
+        procs.release([proc])
+    assert procs.open_fds() == before
+
+def test_merge_latest():
+    """ Merging keeps the latest snapshot of each worker """
+    def snap(worker, spawned, reaped):
+        return {
+            "worker": worker, "spawned": spawned, "reaped": reaped,
+            "killed": 0, "leaked": spawned - reaped, "fds": 5
+        }
+    merged = procs.merge([
+        snap("a", 2, 2), None, snap("a", 4, 3), snap("b", 1, 1),
+        snap("a", 3, 3)
+    ])
+    assert merged["a"] == snap("a", 4, 3)
+    assert merged["b"] == snap("b", 1, 1)
+
+def test_spawner():
+    """ Processes launched by the spawner are released like the others """
+    spawner = procs.spawner
+    spawner.start()
+    try:
+        before = procs.snapshot()
+        proc = procs.spawn(["cat"])
+        proc.stdin.write(b"hello\n")
+        assert proc.stdout.readline() == b"hello\n"
+        proc.stderr.close()
+        assert procs.release([proc]) == 0
+        assert proc.returncode == 0
+        assert _delta(before, procs.snapshot())["reaped"] == 1
+    finally:
+        spawner.stop()
+    assert not spawner.running()
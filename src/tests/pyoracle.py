@@ -0,0 +1,69 @@
+""" Tests python oracles. """
+
+from nose.tools import *
+
+import xml.etree.ElementTree as xet
+
+import src.oracle as oracle
+import src.pyoracle as pyoracle
+
+_xml = """
+<data>
+  <oracle kind="python">
+    <signal name="x" type="int"/>
+    <signal name="y" type="real"/>
+    <output count="1" file="" row="1" col="1">y &gt;= x</output>
+    <output mode="m" count="2" file="" row="2" col="1">
+      pre_y is None or y != pre_y
+    </output>
+  </oracle>
+</data>
+"""
+
+def test_of_xml():
+    """ Python oracle parsing """
+    orcl = oracle.of_xml( xet.fromstring(_xml) )
+    assert oracle.kind(orcl) == "python"
+    assert oracle.signals(orcl) == [ ("x", "int"), ("y", "real") ]
+    assert oracle.outputs(orcl)[1]["expr"] == "pre_y is None or y != pre_y"
+    assert oracle.path(orcl) == oracle.path(
+        oracle.of_xml( xet.fromstring(_xml) )
+    )
+
+@raises(Exception)
+def test_of_xml_fail_syntax():
+    """ Python oracle parsing (fail, illegal expression) """
+    oracle.of_xml( xet.fromstring(_xml.replace("&gt;=", "&gt;=&gt;")) )
+
+def test_evaluate():
+    """ Python oracle evaluation, across batches """
+    orcl = oracle.of_xml( xet.fromstring(_xml) )
+    (rows, previous) = pyoracle.evaluate(orcl, ["1, 2", "2, 1/2"])
+    assert rows == ["00", "10"]
+    (rows, _) = pyoracle.evaluate(orcl, ["0, 0.5"], previous)
+    assert rows == ["01"]
+    assert pyoracle.rejected(["00", "10", "01"]) == 0b110
+    assert pyoracle.output_line("01") == "true, false"
+
+@raises(ValueError)
+def test_parse_fail_width():
+    """ Python oracle evaluation (fail, missing value) """
+    orcl = oracle.of_xml( xet.fromstring(_xml) )
+    pyoracle.evaluate(orcl, ["1"])
+
+def test_evaluate_keyword_signals():
+    """ Signals named after python keywords or not identifiers """
+    orcl = oracle.of_xml( xet.fromstring( """
+<data>
+  <oracle kind="python">
+    <signal name="in" type="int"/>
+    <signal name="x.y" type="int"/>
+    <signal name="_1" type="int"/>
+    <signal name="None" type="int"/>
+    <signal name="_1" type="int"/>
+    <output count="1" file="" row="1" col="1">_1 &gt; 0</output>
+  </oracle>
+</data>
+""" ) )
+    (rows, _) = pyoracle.evaluate(orcl, ["1, 2, 3, 4, 5", "1, 2, 0, 4, 5"])
+    assert rows == ["0", "1"]
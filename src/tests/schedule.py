@@ -0,0 +1,107 @@
+""" Tests job scheduling. """
+
+from nose.tools import *
+
+import os, shutil, tempfile
+
+import src.binary as binary
+import src.job as job
+import src.result as result
+import src.schedule as schedule
+import src.testcase as testcase
+import src.testexec as testexec
+
+def _jobs(d1r, lengths):
+    """ Jobs running ``cat`` on test cases with some numbers of values, named
+    after their position. A test case has two steps less than values. """
+    jobs = []
+    for (i, length) in enumerate(lengths):
+        name = "tc_{}".format(i)
+        tc_path = os.path.join(d1r, name + ".csv")
+        fil3 = open(tc_path, "w")
+        fil3.write( "x,int,{}\n".format(
+            ",".join( str(k) for k in range(length) )
+        ) )
+        fil3.close()
+        jobs.append( job.mk( "sys", "ts", testexec.mk(
+            binary.mk("cat", "cat"), [], d1r,
+            testcase.mk(tc_path, name, "csv", []), d1r
+        ) ) )
+    return jobs
+
+def test_lpt():
+    """ LPT orders jobs longest first, ties in their original order """
+    jobs = [ "a", "b", "c", "d", "e" ]
+    costs = [ 1, 5, 3, 5, 0 ]
+    assert schedule.lpt(jobs, costs) == [ "b", "d", "c", "a", "e" ]
+
+def test_estimate_steps():
+    """ Without history, the cost of a job is its number of steps """
+    d1r = tempfile.mkdtemp()
+    try:
+        jobs = _jobs(d1r, [12, 4, 2, 7])
+        assert schedule.estimate(jobs, {}) == [ 10, 2, 0, 5 ]
+        order = schedule.lpt( jobs, schedule.estimate(jobs, {}) )
+        assert map(job.ident, order) == map(
+            job.ident, [ jobs[0], jobs[3], jobs[1], jobs[2] ]
+        )
+    finally:
+        shutil.rmtree(d1r)
+
+def test_estimate_history():
+    """ The history overrides the number of steps, and scales the steps of the
+    jobs it does not know """
+    d1r = tempfile.mkdtemp()
+    try:
+        jobs = _jobs(d1r, [12, 4, 22])
+        history = {
+            job.ident( jobs[0] ): 0.5, job.ident( jobs[1] ): 5.5
+        }
+        # 6 seconds for 12 steps.
+        assert schedule.estimate(jobs, history) == [ 0.5, 5.5, 10.0 ]
+        order = schedule.lpt( jobs, schedule.estimate(jobs, history) )
+        assert map(job.ident, order) == map(
+            job.ident, [ jobs[2], jobs[1], jobs[0] ]
+        )
+    finally:
+        shutil.rmtree(d1r)
+
+def test_history_round_trip():
+    """ Saving then loading a history yields the same history """
+    d1r = tempfile.mkdtemp()
+    try:
+        path = schedule.history_path(d1r)
+        assert schedule.load_history(path) == {}
+        history = {
+            ("sys", "cat", "ts", "tc_0"): 0.1,
+            ("sys", "cat", "ts", "tc, 1"): 2.0 / 3.0,
+        }
+        schedule.save_history(path, history)
+        assert schedule.load_history(path) == history
+    finally:
+        shutil.rmtree(d1r)
+
+def test_history_ill_formed():
+    """ Ill-formed lines of a history file are ignored """
+    d1r = tempfile.mkdtemp()
+    try:
+        path = schedule.history_path(d1r)
+        fil3 = open(path, "w")
+        fil3.write("sys,cat,ts,tc_0,1.5\nsys,cat,ts\nsys,cat,ts,tc_1,2\n")
+        fil3.close()
+        assert schedule.load_history(path) == {
+            ("sys", "cat", "ts", "tc_0"): 1.5,
+            ("sys", "cat", "ts", "tc_1"): 2.0,
+        }
+    finally:
+        shutil.rmtree(d1r)
+
+def test_update_history():
+    """ Only results that actually ran update the history """
+    history = { ("sys", "cat", "ts", "tc_0"): 1.0 }
+    schedule.update_history(history, [
+        result.mk("sys", "cat", "ts", "tc_0", None, 3.0),
+        result.mk("sys", "cat", "ts", "tc_1", None, 0.0, cached=True),
+        result.mk("sys", "cat", "ts", "tc_2", None, 0.0, derived=True),
+    ])
+    assert history == { ("sys", "cat", "ts", "tc_0"): 3.0 }
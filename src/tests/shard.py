@@ -0,0 +1,47 @@
+""" Tests sharding related things. """
+
+from nose.tools import *
+
+import src.shard as shard
+
+def _job(name):
+    """ A job with a dummy binary and test case. """
+    return {
+        "system": "system", "testset": "tests/unit.xml",
+        "exec": {
+            "binary": { "name": "bin", "cmd": ["bin"] },
+            "testcase": { "name": name },
+        },
+    }
+
+def test_of_string():
+    """ Shard parsing """
+    assert shard.of_string("1/1") == (1, 1)
+    assert shard.of_string("2/3") == (2, 3)
+
+@raises(ValueError)
+def test_of_string_fail_index():
+    """ Shard parsing (fail, index out of range) """
+    shard.of_string("4/3")
+
+@raises(ValueError)
+def test_of_string_fail_format():
+    """ Shard parsing (fail, not a shard) """
+    shard.of_string("2")
+
+def test_partition_balances_cost():
+    """ Partition balances cost, not counts """
+    jobs = map( _job, ["a", "b", "c", "d", "e"] )
+    costs = [ 10, 1, 1, 1, 1 ]
+    parts = shard.partition(jobs, costs, 2)
+    assert map(len, parts) == [1, 4]
+    assert parts[0] == [ jobs[0] ]
+
+def test_partition_deterministic():
+    """ Partition does not depend on job order """
+    jobs = map( _job, ["a", "b", "c", "d", "e", "f"] )
+    costs = [ 3, 3, 2, 2, 1, 1 ]
+    parts = shard.partition(jobs, costs, 3)
+    rev_parts = shard.partition(jobs[::-1], costs[::-1], 3)
+    assert parts == rev_parts
+    assert shard.digest(parts) == shard.digest(rev_parts)
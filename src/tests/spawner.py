@@ -0,0 +1,118 @@
+""" Tests the pre-forked spawner. """
+
+from nose.tools import *
+
+import errno, os, shutil, signal, subprocess, tempfile, time
+
+import src.procs as procs
+import src.spawner as spawner
+
+def _parent(pid):
+    """ The pid of the parent of a process. """
+    fil3 = open( "/proc/{}/stat".format(pid) )
+    try: return int( fil3.read().split(")")[-1].split()[1] )
+    finally: fil3.close()
+
+def _wait(proc):
+    """ Polls a process until it exits, returns its exit code. """
+    while proc.poll() == None: time.sleep(0.01)
+    return proc.returncode
+
+def _gone(pid, timeout):
+    """ True iff a process is gone or a zombie within some seconds. """
+    end = time.time() + timeout
+    while time.time() < end:
+        try: fil3 = open( "/proc/{}/stat".format(pid) )
+        except IOError: return True
+        try: state = fil3.read().split(")")[-1].split()[0]
+        finally: fil3.close()
+        if state == "Z": return True
+        time.sleep(0.01)
+    return False
+
+def _with_spawner(test):
+    """ Runs a test with the spawner running. """
+    spawner.start()
+    try: test()
+    finally: spawner.stop()
+
+def test_start_stop():
+    """ The spawner runs between its start and its stop """
+    assert not spawner.running()
+    spawner.start()
+    try:
+        assert spawner.running()
+        d1r = os.path.dirname(spawner._address)
+    finally:
+        spawner.stop()
+    assert not spawner.running()
+    assert not os.path.exists(d1r)
+
+def test_spawn():
+    """ Processes launched by the spawner are its children, in their own
+    process group and directory """
+    def test():
+        d1r = os.path.realpath( tempfile.mkdtemp() )
+        try:
+            proc = spawner.spawn(["sh", "-c", "pwd; exec cat"], d1r)
+            assert _parent(proc.pid) != os.getpid()
+            assert os.getpgid(proc.pid) == proc.pid
+            assert proc.stdout.readline() == (d1r + "\n").encode()
+            proc.stdin.write(b"hello\n")
+            assert proc.stdout.readline() == b"hello\n"
+            assert proc.poll() == None
+            proc.stdin.close()
+            assert _wait(proc) == 0
+            for pipe in [proc.stdout, proc.stderr]: pipe.close()
+        finally:
+            shutil.rmtree(d1r)
+    _with_spawner(test)
+
+def test_spawn_error():
+    """ Commands that cannot be launched raise an ``OSError`` """
+    def test():
+        try:
+            spawner.spawn(["/nonexistent/teas/binary"])
+            assert False
+        except OSError as e:
+            assert e.errno == errno.ENOENT
+        # The spawner still serves requests.
+        proc = spawner.spawn(["true"])
+        assert _wait(proc) == 0
+    _with_spawner(test)
+
+def test_kill():
+    """ Processes launched by the spawner are killed with their group """
+    def test():
+        proc = spawner.spawn(["sh", "-c", "sleep 100 & echo $!; wait"])
+        child = int( proc.stdout.readline() )
+        procs.kill(proc)
+        assert _wait(proc) == -signal.SIGKILL
+        # The child of the process is gone, or a zombie of init.
+        assert _gone(child, 5.0)
+    _with_spawner(test)
+
+def test_forked_worker():
+    """ Forked workers launch processes through their own connection """
+    def test():
+        assert _wait( spawner.spawn(["true"]) ) == 0
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                if _wait( spawner.spawn(["sh", "-c", "exit 7"]) ) == 7:
+                    code = 0
+            finally: os._exit(code)
+        assert os.waitpid(pid, 0)[1] == 0
+        assert _wait( spawner.spawn(["true"]) ) == 0
+    _with_spawner(test)
+
+def test_fallback():
+    """ Without the spawner, processes are launched directly """
+    assert not spawner.running()
+    proc = procs.spawn(["cat"])
+    assert isinstance(proc, subprocess.Popen)
+    assert _parent(proc.pid) == os.getpid()
+    assert os.getpgid(proc.pid) == proc.pid
+    proc.stderr.close()
+    assert procs.release([proc]) == 0
@@ -0,0 +1,67 @@
+""" Tests the streaming execution. """
+
+from nose.tools import *
+
+import src.binary as binary
+import src.encoded as encoded
+import src.oracle as oracle
+import src.procs as procs
+import src.testcase as testcase
+import src.testexec as testexec
+from src.excs import ExecError
+
+def _execution(oracle_count):
+    """ A test execution with oracles judging one global output. """
+    oracles = [
+        oracle.mk("o{}".format(i), [ {
+            "mode": None, "count": "1", "file": "", "row": "1", "col": "1"
+        } ]) for i in range(oracle_count)
+    ]
+    return testexec.mk(
+        binary.mk("bin", "bin"), oracles, "/tmp",
+        testcase.mk("tc.csv", "tc", "csv", [])
+    )
+
+def _run(binary_script, oracle_count, steps):
+    """ Runs a shell binary against oracles accepting every step. """
+    bin_proc = procs.spawn(["sh", "-c", binary_script])
+    ora_procs = [
+        procs.spawn(["sh", "-c", "while read l; do echo true; done"])
+        for _ in range(oracle_count)
+    ]
+    outputs = []
+    try:
+        failure = testexec.run_streaming(
+            _execution(oracle_count), bin_proc, ora_procs,
+            encoded.of_steps( [ [str(k)] for k in range(steps) ] ), steps,
+            outputs
+        )
+    finally:
+        procs.release([bin_proc] + ora_procs, True)
+    return (failure, outputs)
+
+def test_streaming_success():
+    """ Every step reaches the oracles """
+    for oracle_count in [1, 2]:
+        (failure, outputs) = _run("cat", oracle_count, 100)
+        assert failure == None
+        assert outputs == [ str(k) for k in range(100) ]
+
+def _exits_early(oracle_count):
+    """ A binary exiting early fails the execution instead of hanging """
+    try:
+        _run(
+            "read l; echo $l; read l; echo $l; exit 3", oracle_count, 10
+        )
+    except ExecError as e:
+        assert e.msg == "binary exited at step 2"
+        return
+    assert False
+
+def test_streaming_early_exit():
+    """ Binary exiting early, one oracle """
+    _exits_early(1)
+
+def test_streaming_early_exit_oracles():
+    """ Binary exiting early, several oracles """
+    _exits_early(2)
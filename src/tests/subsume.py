@@ -0,0 +1,133 @@
+""" Tests prefix subsumption related things. """
+
+import os, shutil, tempfile
+
+import src.binary as binary
+import src.failure as failure
+import src.job as job
+import src.oracle as oracle
+import src.result as result
+import src.subsume as subsume
+import src.testcase as testcase
+import src.testexec as testexec
+
+def _job(d1r, name, steps, orcl="o"):
+    """ A job running on a test case with some input steps. """
+    path = os.path.join(d1r, name + ".csv")
+    fil3 = open(path, "w")
+    # ``values.of_csv`` and ``testexec.steps`` both drop a last value.
+    fil3.write( "x,int,{}\n".format(
+        ",".join( map(str, steps + [0, 0]) )
+    ) )
+    fil3.close()
+    return job.mk( "sys", "ts", testexec.mk(
+        binary.mk("bin", "bin"), [ oracle.mk(orcl, []) ], d1r,
+        testcase.mk(path, name, "csv", []), d1r
+    ) )
+
+def test_covers_maximal():
+    """ Maximal sequences cover themselves """
+    seqs = [ (1, 2, 3), (1, 3), (2,) ]
+    assert subsume.covers(seqs) == [ 0, 1, 2 ]
+
+def test_covers_prefixes():
+    """ Prefixes are covered by a maximal sequence """
+    seqs = [ (1,), (1, 2), (1, 2, 3), (2, 1), (2,), () ]
+    assert subsume.covers(seqs) == [ 2, 2, 2, 3, 3, 2 ]
+
+def test_covers_duplicates():
+    """ Duplicates are covered by their first occurrence """
+    seqs = [ (1, 2), (1, 2), (1,) ]
+    assert subsume.covers(seqs) == [ 0, 0, 0 ]
+
+def _with_jobs(steps, test):
+    """ Runs a test on jobs with some input steps, named after their index.
+    """
+    d1r = tempfile.mkdtemp()
+    try:
+        test( [
+            _job( d1r, "tc_{}".format(i), s7eps )
+            for (i, s7eps) in enumerate(steps)
+        ] )
+    finally:
+        shutil.rmtree(d1r)
+
+def _names(jobs):
+    """ The test case names of some jobs. """
+    return [ job.ident(j0b)[3] for j0b in jobs ]
+
+def test_maximal_shared_step():
+    """ Jobs sharing a first step but not prefixes of each other are maximal
+    """
+    def test(jobs):
+        (maximal, covered) = subsume.maximal(jobs)
+        assert _names(maximal) == [ "tc_0", "tc_2", "tc_3" ]
+        assert covered.keys() == [ job.ident(jobs[0]) ]
+        assert [
+            (job.ident(j0b)[3], length)
+            for (j0b, length) in covered[ job.ident(jobs[0]) ]
+        ] == [ ("tc_1", 2) ]
+    _with_jobs( [ [0, 1, 2], [0, 1], [0, 5], [9] ], test )
+
+def test_maximal_no_shared_step():
+    """ Jobs sharing no step are all maximal """
+    def test(jobs):
+        (maximal, covered) = subsume.maximal(jobs)
+        assert _names(maximal) == _names(jobs)
+        assert covered == {}
+    _with_jobs( [ [1, 2], [2, 1], [3] ], test )
+
+def test_maximal_other_oracle():
+    """ Jobs with different oracles do not subsume each other """
+    d1r = tempfile.mkdtemp()
+    try:
+        jobs = [ _job(d1r, "tc_0", [0, 1], "o"), _job(d1r, "tc_1", [0], "p") ]
+        (maximal, covered) = subsume.maximal(jobs)
+        assert _names(maximal) == [ "tc_0", "tc_1" ]
+        assert covered == {}
+    finally:
+        shutil.rmtree(d1r)
+
+def _derive(at):
+    """ The results derived from a maximal job of 5 steps failing at step
+    ``at``, if any, for prefixes of 2 and 4 steps. """
+    d1r = tempfile.mkdtemp()
+    try:
+        jobs = [
+            _job(d1r, "tc_0", [0, 1, 2, 3, 4]), _job(d1r, "tc_1", [0, 1]),
+            _job(d1r, "tc_2", [0, 1, 2, 3])
+        ]
+        (maximal, covered) = subsume.maximal(jobs)
+        assert _names(maximal) == [ "tc_0" ]
+        fail = None
+        if at != None:
+            fail = failure.mk_mismatch(None, "0", "1")
+            failure.add_at(fail, at)
+            failure.add_testcase( fail, testexec.testcase(
+                job.execution(jobs[0])
+            ) )
+        res = result.mk("sys", "bin", "ts", "tc_0", fail, 1.0)
+        derived = subsume.derive(covered, res)
+        assert _names(jobs[1:]) == [ result.testcase(r3s) for r3s in derived ]
+        assert all( result.derived(r3s) for r3s in derived )
+        return map( result.failure, derived )
+    finally:
+        shutil.rmtree(d1r)
+
+def test_derive_success():
+    """ The prefixes of a successful job succeed """
+    assert _derive(None) == [ None, None ]
+
+def test_derive_failure_inside():
+    """ A failure inside a prefix fails it at the same step """
+    failures = _derive(1)
+    assert map( failure.at, failures ) == [ 1, 1 ]
+    assert [
+        testcase.name( failure.testcase(fail) ) for fail in failures
+    ] == [ "tc_1", "tc_2" ]
+
+def test_derive_failure_after():
+    """ A failure after a prefix does not fail it """
+    failures = _derive(3)
+    assert failures[0] == None
+    assert failure.at(failures[1]) == 3
@@ -0,0 +1,92 @@
+""" Tests the step and execution timeouts. """
+
+from nose.tools import *
+
+import os, shutil, stat, tempfile
+
+import src.binary as binary
+import src.flags as flags
+import src.failure as failure
+import src.oracle as oracle
+import src.procs as procs
+import src.testcase as testcase
+import src.testexec as testexec
+
+# Execution modes, as pairs of an exec mode and a run ahead.
+_modes = [ ("lockstep", 0), ("lockstep", 2), ("streaming", 0) ]
+
+def _script(d1r, name, content):
+    """ Writes an executable shell script, returns its path. """
+    path = os.path.join(d1r, name)
+    fil3 = open(path, "w")
+    fil3.write( "#!/bin/sh\n" + content )
+    fil3.close()
+    os.chmod(path, stat.S_IRWXU)
+    return path
+
+def _execute(binary_script, steps, step_timeout, exec_timeout, mode):
+    """ Runs a shell binary against an oracle accepting every step, with
+    some timeouts in some mode. Returns the failure and the difference of the
+    process counters. """
+    d1r = tempfile.mkdtemp()
+    try:
+        orcl = oracle.mk(
+            _script(d1r, "oracle.sh", "while read l; do echo true; done\n"),
+            [ {
+                "mode": None, "count": "1", "file": "", "row": "1",
+                "col": "1"
+            } ]
+        )
+        tc_path = os.path.join(d1r, "tc.csv")
+        fil3 = open(tc_path, "w")
+        fil3.write( "x,int,{}\n".format(
+            ",".join( str(k) for k in range(steps + 2) )
+        ) )
+        fil3.close()
+        execution = testexec.mk(
+            binary.mk( "bin", _script(d1r, "bin.sh", binary_script) ),
+            [orcl], d1r, testcase.mk(tc_path, "tc", "csv", []), d1r
+        )
+        flags.set_step_timeout(step_timeout)
+        flags.set_exec_timeout(exec_timeout)
+        flags.set_exec_mode( mode[0] )
+        flags.set_run_ahead( mode[1] )
+        before = procs.snapshot()
+        try: fail = testexec.execute(execution)
+        finally:
+            flags.set_step_timeout( flags.step_timeout_default() )
+            flags.set_exec_timeout( flags.exec_timeout_default() )
+            flags.set_exec_mode( flags.exec_mode_default() )
+            flags.set_run_ahead( flags.run_ahead_default() )
+        after = procs.snapshot()
+        return (fail, dict(
+            (name, after[name] - before[name])
+            for name in ["spawned", "reaped", "killed", "leaked"]
+        ))
+    finally:
+        shutil.rmtree(d1r)
+
+def test_step_timeout():
+    """ A binary hanging on a step fails at that step and is killed """
+    for mode in _modes:
+        (fail, delta) = _execute(
+            "read l; echo $l; read l; echo $l; exec sleep 100\n", 5,
+            0.5, None, mode
+        )
+        assert failure.timeout(fail) == ("binary", "step", 0.5)
+        assert failure.at(fail) == 2
+        assert delta == {
+            "spawned": 2, "reaped": 2, "killed": 2, "leaked": 0
+        }
+
+def test_exec_timeout():
+    """ A binary with fast steps but a long run fails and is killed """
+    for mode in _modes:
+        (fail, delta) = _execute(
+            "while read l; do sleep 0.1; echo $l; done\n", 100, 1, 1, mode
+        )
+        assert failure.timeout(fail) == ("binary", "execution", 1)
+        assert 0 < failure.at(fail) < 100
+        assert delta == {
+            "spawned": 2, "reaped": 2, "killed": 2, "leaked": 0
+        }
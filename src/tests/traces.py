@@ -0,0 +1,81 @@
+""" Tests the binary output trace store. """
+
+from nose.tools import *
+
+import os, shutil, stat, tempfile
+
+import src.binary as binary
+import src.flags as flags
+import src.failure as failure
+import src.oracle as oracle
+import src.testcase as testcase
+import src.testexec as testexec
+import src.traces as traces
+
+# Rejects the steps where the binary outputs a 7.
+_oracle = """#!/bin/sh
+while read l; do
+  case "$l" in
+    *", 7") echo false ;;
+    *) echo true ;;
+  esac
+done
+"""
+
+def _recheck(d1r, outputs):
+    """ Rechecks the stored outputs of a binary that cannot run. """
+    path = os.path.join(d1r, "oracle.sh")
+    fil3 = open(path, "w")
+    fil3.write(_oracle)
+    fil3.close()
+    os.chmod(path, stat.S_IRWXU)
+    orcl = oracle.mk(path, [ {
+        "mode": None, "count": "1", "file": "", "row": "1", "col": "1"
+    } ])
+    tc_path = os.path.join(d1r, "tc.csv")
+    fil3 = open(tc_path, "w")
+    fil3.write("x,int,0,1,2,3,4\n")
+    fil3.close()
+    execution = testexec.mk(
+        binary.mk("bin", os.path.join(d1r, "missing")), [orcl], d1r,
+        testcase.mk(tc_path, "tc", "csv", []), d1r
+    )
+    testexec.set_trace( execution, traces.path(d1r, "k3y") )
+    os.mkdir( traces.dir_of(d1r) )
+    traces.write( testexec.trace(execution), outputs, True )
+    flags.set_recheck(True)
+    try: return testexec.execute(execution)
+    finally: flags.set_recheck( flags.recheck_default() )
+
+def test_recheck():
+    """ Rechecking replays a stored trace into the oracle """
+    d1r = tempfile.mkdtemp()
+    try:
+        assert _recheck(d1r, ["0", "1", "2", "3"]) == None
+    finally:
+        shutil.rmtree(d1r)
+
+def test_recheck_failure():
+    """ Rechecking reports the failure of a stored trace """
+    d1r = tempfile.mkdtemp()
+    try:
+        res = _recheck(d1r, ["0", "1", "7", "3"])
+        assert failure.at(res) == 2
+    finally:
+        shutil.rmtree(d1r)
+
+def test_evict():
+    """ Eviction removes the least recently used traces """
+    d1r = tempfile.mkdtemp()
+    try:
+        os.mkdir( traces.dir_of(d1r) )
+        paths = [ traces.path(d1r, str(k)) for k in range(5) ]
+        for (k, path) in enumerate(paths):
+            traces.write(path, [str(k)], True)
+            os.utime(path, (k, k))
+        # Reading the oldest trace makes it the most recently used one.
+        assert traces.read(paths[0]) == (["0"], True)
+        assert traces.evict(d1r, 2) == 3
+        assert map(os.path.exists, paths) == [True] + [False] * 3 + [True]
+    finally:
+        shutil.rmtree(d1r)
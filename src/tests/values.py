@@ -0,0 +1,72 @@
+""" Tests lazy value readers. """
+
+import os, shutil, tempfile
+from nose.tools import *
+
+import src.values as values
+
+_csv = "a,int,1,2,3,4,5\nb,bool,true,false,true,true,false\n"
+_step_csv = "a,b\nint,bool\n1,true\n2,false\n3,true\n4,true\n5,false\n"
+
+def _with_files(test):
+    d1r = tempfile.mkdtemp()
+    try:
+        paths = []
+        for (name, content) in [ ("t.csv", _csv), ("s.csv", _step_csv) ]:
+            path = os.path.join(d1r, name)
+            fil3 = open(path, "w")
+            fil3.write(content)
+            fil3.close()
+            paths.append(path)
+        test(*paths)
+    finally:
+        shutil.rmtree(d1r)
+
+def test_iter_csv():
+    """ Lazy csv reading yields the same vectors as ``of_csv`` """
+    def test(csv_path, _):
+        vecs = [ vec for vec in values.iter_csv(csv_path) ]
+        assert vecs == values.seq( values.of_csv(csv_path) )
+        assert vecs == [
+            ["1", "true"], ["2", "false"], ["3", "true"], ["4", "true"]
+        ]
+    _with_files(test)
+
+def test_step_csv():
+    """ A step-major csv file is the transpose of a csv file """
+    def test(csv_path, step_csv_path):
+        assert values.of_step_csv(step_csv_path) == values.of_csv(csv_path)
+        assert (
+            [ vec for vec in values.iter_step_csv(step_csv_path) ] ==
+            values.seq( values.of_csv(csv_path) )
+        )
+    _with_files(test)
+
+@raises(Exception)
+def test_iter_csv_ill_formed():
+    """ Lazy csv reading fails on inconsistent sequences """
+    def test(csv_path, _):
+        fil3 = open(csv_path, "a")
+        fil3.write("c,int,1,2\n")
+        fil3.close()
+        for _ in values.iter_csv(csv_path): ()
+    _with_files(test)
+
+def test_iter_csv_chunks():
+    """ Lazy csv reading across chunk boundaries and line endings """
+    d1r = tempfile.mkdtemp()
+    size = values._chunk_size
+    values._chunk_size = 3
+    try:
+        path = os.path.join(d1r, "t.csv")
+        fil3 = open(path, "w")
+        fil3.write(
+            "a,int,1,22,333,4444,,6\r\nb,real,0.5,1.25,,3.125,4,5\r\n"
+        )
+        fil3.close()
+        vecs = [ vec for vec in values.iter_csv(path) ]
+        assert vecs == values.seq( values.of_csv(path) )
+        assert vecs[2] == ["333", ""]
+    finally:
+        values._chunk_size = size
+        shutil.rmtree(d1r)
@@ -0,0 +1,63 @@
+""" Tests verdicts over whole traces. """
+
+from nose.tools import *
+
+import src.oracle as oracle
+import src.verdicts as verdicts
+import src.outcome as outcome
+
+def _oracle(width, glob4l=True):
+    """ An oracle with ``width`` global outputs. """
+    return oracle.mk( "o", [ {
+        "mode": None, "count": "1", "file": "", "row": "1", "col": "1"
+    } ] * width, glob4l=glob4l )
+
+def test_columns():
+    """ Columns of the false values of some lines """
+    cols = verdicts.columns(
+        ["true, false, 7", "0,1", "False , T,"], 2
+    )
+    assert cols == [0b110, 0b001]
+    assert verdicts.counts(cols) == [2, 1]
+
+@raises(ValueError)
+def test_columns_fail_value():
+    """ Columns (fail, not a boolean) """
+    verdicts.columns(["true, maybe"], 2)
+
+@raises(ValueError)
+def test_columns_fail_width():
+    """ Columns (fail, missing value) """
+    verdicts.columns(["true"], 2)
+
+def test_first():
+    """ First step of a bitset """
+    assert verdicts.first(0) == None
+    assert verdicts.first(0b1000) == 3
+    assert verdicts.first(1 << 5000 | 1 << 7000) == 5000
+
+def test_failing():
+    """ Failing steps of global and mode oracles """
+    oracles = [ _oracle(2), _oracle(1, False), _oracle(1, False) ]
+    rejections = [
+        verdicts.rejected( oracles[0], ["t,t", "t,t", "t,f", "t,t"] ),
+        verdicts.rejected( oracles[1], ["f", "f", "t", "t"] ),
+        verdicts.rejected( oracles[2], ["t", "f", "t", "t"] ),
+    ]
+    assert verdicts.failing(oracles, rejections, 4) == 0b0110
+
+def test_first_failure_of_oracles():
+    """ First failure of legacy oracle outputs """
+    glob4l = { "name": "g", "global": True }
+    mode = { "name": "m", "global": False }
+    assert outcome.first_failure_of_oracles( [
+        { "oracle": glob4l, "seq": ["True", "True", "False"] },
+        { "oracle": mode, "seq": ["True", "False", "True"] },
+    ], 3 ) == [1, []]
+    assert outcome.first_failure_of_oracles( [
+        { "oracle": glob4l, "seq": ["True", "True", "False"] },
+        { "oracle": mode, "seq": ["True", "True", "True"] },
+    ], 3 ) == [2, [glob4l]]
+    assert outcome.first_failure_of_oracles( [
+        { "oracle": glob4l, "seq": ["True", "True", "False"] },
+    ], 2 ) == []
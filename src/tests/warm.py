@@ -0,0 +1,38 @@
+""" Tests warm process related things. """
+
+from nose.tools import *
+
+import xml.etree.ElementTree as xet
+
+import src.warm as warm
+
+def test_of_xml():
+    """ Reuse parsing """
+    assert warm.of_xml( xet.fromstring("<binary>bin</binary>") ) == None
+    reus3 = warm.of_xml( xet.fromstring("<binary reset=\"#r\">bin</binary>") )
+    assert reus3 == warm.mk("#r", warm.recycle_default)
+    reus3 = warm.of_xml(
+        xet.fromstring("<oracle reset=\"#r\" recycle=\"3\" path=\"o\"/>")
+    )
+    assert warm.recycle(reus3) == 3
+
+@raises(Exception)
+def test_of_xml_fail_recycle():
+    """ Reuse parsing (fail, recycle is not positive) """
+    warm.of_xml( xet.fromstring("<binary reset=\"#r\" recycle=\"0\"/>") )
+
+def test_recycle():
+    """ Idle processes are reused until recycled """
+    reus3 = warm.mk("#r", 2)
+    first = warm.acquire(["cat"], None, reus3, "/dev/null")
+    assert warm.reusable(first)
+    warm.put_back(first)
+    second = warm.acquire(["cat"], None, reus3, "/dev/null")
+    assert warm.proc(second) is warm.proc(first)
+    assert not warm.reusable(second)
+    other = warm.acquire(["cat"], None, None, "/dev/null")
+    assert warm.proc(other) is not warm.proc(first)
+    assert not warm.reusable(other)
+    warm.release([second, other], False)
+    warm.clear()
+    assert warm.proc(second).returncode == 0
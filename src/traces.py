@@ -0,0 +1,75 @@
+"""
+Binary output trace store. The output lines of a binary on a test case are
+stored zlib-compressed in the ``traces`` sub-directory of the cache directory,
+under a key hashing the binary command, the files it mentions and the test
+case (see ``cache.key``). The oracle is not part of the key: traces can be
+replayed into a new oracle without running the binary again.
+
+A trace is complete if the binary answered every input of the test case, an
+execution stopping at the first failure stores a partial trace. Reading a
+trace refreshes its modification time, eviction removes the least recently
+used traces first, with the same bound as the result cache.
+"""
+
+import hashlib, os, zlib
+
+import binary as b
+import testcase as tc
+import testexec as te
+import job as j
+import cache
+import iolib
+
+_header = "teas trace 1"
+
+def dir_of(cache_dir):
+  """The directory of the trace store in a cache directory."""
+  return iolib.join_path(cache_dir, "traces")
+
+def key(job, memo):
+  """The key of the trace of a job, ``memo`` memoizes file hashes across
+  jobs."""
+  execution = j.execution(job)
+  wdir = te.wdir(execution)
+  if wdir == None: wdir = os.getcwd()
+  cmd = b.cmd( te.binary(execution) )
+  sha = hashlib.sha1()
+  sha.update( repr(cmd) )
+  for path in cache.command_files(cmd, wdir):
+    sha.update( cache.file_hash(path, memo) )
+  sha.update( cache.file_hash( tc.path(te.testcase(execution)), memo ) )
+  return sha.hexdigest()
+
+def path(cache_dir, k3y):
+  """The path of the trace with some key."""
+  return iolib.join_path( dir_of(cache_dir), "{}.trace".format(k3y) )
+
+def write(fil3_path, outputs, complete):
+  """Stores the output lines of a binary. ``complete`` indicates whether the
+  binary answered all the inputs of the test case."""
+  content = "\n".join( [ _header, "1" if complete else "0" ] + outputs )
+  tmp = iolib.tmp_path(fil3_path)
+  fil3 = open(tmp, "wb")
+  try: fil3.write( zlib.compress(content) )
+  finally: fil3.close()
+  os.rename(tmp, fil3_path)
+
+def read(fil3_path):
+  """Loads a trace, returns the output lines of the binary and whether the
+  trace is complete. Returns ``None`` if there is no such trace or if it is
+  ill-formed."""
+  if not iolib.is_path_a_file(fil3_path): return None
+  fil3 = open(fil3_path, "rb")
+  try: content = zlib.decompress( fil3.read() )
+  except zlib.error: return None
+  finally: fil3.close()
+  lines = content.split("\n")
+  if len(lines) < 2 or lines[0] != _header: return None
+  # Refreshing the trace for eviction.
+  os.utime(fil3_path, None)
+  return ( lines[2:], lines[1] == "1" )
+
+def evict(cache_dir, max_traces):
+  """Removes the least recently used traces until there are at most
+  ``max_traces`` of them. Returns the number of traces removed."""
+  return cache.evict_dir( dir_of(cache_dir), max_traces )
@@ -7,7 +7,7 @@ Sequences of named and typed values contains
 - ``"seq"``: the sequence of ``count``-tuples of ``len`` values.
 """
 
-import csv
+import csv, itertools, mmap, os
 
 from stdout import log, error, new_line
 
@@ -57,6 +57,16 @@ def mk(count, length, ids, types, seq):
     "count": count, "length": length, "ids": ids, "types": types, "seq": seq
   }
 
+def length_of_csv(path):
+  """The length of the sequences of values in a csv file, computed from the
+  width of its first row only."""
+  fil3 = open(path, "rb")
+  try:
+    row = next( csv.reader(fil3, delimiter=","), [] )
+  finally:
+    fil3.close()
+  return max(len(row) - 2, 0)
+
 def of_csv(path):
   """Creates a sequence of values from a csv file."""
   fil3 = open(path, "rb")
@@ -81,4 +91,140 @@ def of_csv(path):
     for row in vals:
       vec.append(row[i])
     seq.append(vec)
-  return mk(count, length, ids, types, seq)
\ No newline at end of file
+  return mk(count, length, ids, types, seq)
+
+# Size in bytes of the chunks the rows of csv files are read in, see
+# ``iter_csv``.
+_chunk_size = 1 << 16
+
+def _count(mapping, sub, start, stop):
+  """The number of occurrences of ``sub`` in a slice of a mapped file,
+  counted by chunks."""
+  res = 0
+  chunk = 1 << 20
+  while start < stop:
+    res += mapping[ start:min(start + chunk, stop) ].count(sub)
+    start += chunk
+  return res
+
+def _row_bounds(mapping):
+  """The start and end offsets of the non-empty rows of a mapped csv file,
+  line breaks excluded."""
+  bounds = []
+  start = 0
+  size = len(mapping)
+  while start < size:
+    end = mapping.find("\n", start)
+    if end == -1: end = size
+    stop = end
+    if stop > start and mapping[stop - 1] == "\r": stop -= 1
+    if stop > start: bounds.append( (start, stop) )
+    start = end + 1
+  return bounds
+
+def _row_values(mapping, start, stop):
+  """Yields the values of a row of a mapped csv file, from offset ``start``
+  to ``stop``, as lists of consecutive values read in chunks of
+  ``_chunk_size`` bytes."""
+  tail = ""
+  while start < stop:
+    end = min(start + _chunk_size, stop)
+    vals = ( tail + mapping[start:end] ).split(",")
+    tail = vals.pop()
+    yield vals
+    start = end
+  yield [tail]
+
+def iter_csv(path):
+  """Lazy version of ``seq(of_csv(path))``, yields the vectors of values one
+  at a time. The rows of the file are read in chunks through a memory-mapped
+  view of the file, so memory only grows with the number of sequences, not
+  with their length."""
+  fil3 = open(path, "rb")
+  try:
+    mapping = None
+    if os.fstat( fil3.fileno() ).st_size > 0:
+      mapping = mmap.mmap( fil3.fileno(), 0, access=mmap.ACCESS_READ )
+  finally:
+    fil3.close()
+  # Quoted values need the actual csv parser.
+  if mapping == None or mapping.find("\"") != -1:
+    if mapping != None: mapping.close()
+    for vec in seq( of_csv(path) ): yield vec
+    return
+  try:
+    bounds = _row_bounds(mapping)
+    widths = map(
+      lambda bound: _count(mapping, ",", bound[0], bound[1]) + 1, bounds
+    )
+    for width in widths:
+      if width != widths[0]: raise Exception(
+        "file \"{}\" is ill-formed: value sequences are inconsistent".format(
+          path
+        )
+      )
+    rows = []
+    for (start, stop) in bounds:
+      # Skipping ids and types.
+      pos = mapping.find(",", start, stop) + 1
+      pos = mapping.find(",", pos, stop) + 1
+      rows.append( itertools.chain.from_iterable(
+        _row_values(mapping, pos, stop)
+      ) )
+    for vec in itertools.islice(
+      itertools.imap( list, itertools.izip(*rows) ), max(widths[0] - 3, 0)
+    ): yield vec
+  finally:
+    mapping.close()
+
+def _drop_last(iterable):
+  """Yields all the elements of an iterable but the last one."""
+  previous = None
+  first = True
+  for elm in iterable:
+    if not first: yield previous
+    previous = elm
+    first = False
+
+def _step_rows(path):
+  """Yields the rows of a step-major csv file one at a time."""
+  fil3 = open(path, "rb")
+  try:
+    for row in csv.reader(fil3, delimiter=","):
+      if len(row) > 0: yield row
+  finally:
+    fil3.close()
+
+def iter_step_csv(path):
+  """Yields the vectors of values of a step-major csv file one at a time.
+  A step-major csv file is the transpose of a csv file: a row of ids, a row of
+  types, then a row of values per step. Steps are the columns of a csv file,
+  so the last step is dropped as in ``of_csv``."""
+  rows = _step_rows(path)
+  ids = next(rows, [])
+  next(rows, None)
+  for row in _drop_last(rows):
+    if len(row) != len(ids): raise Exception(
+      "file \"{}\" is ill-formed: steps are inconsistent".format(path)
+    )
+    yield row
+
+def length_of_step_csv(path):
+  """The length of the sequences of values in a step-major csv file."""
+  length = 0
+  for _ in _step_rows(path): length += 1
+  return max(length - 2, 0)
+
+def of_step_csv(path):
+  """Creates a sequence of values from a step-major csv file."""
+  rows = [ row for row in _step_rows(path) ]
+  if len(rows) < 2: raise Exception(
+    "file \"{}\" is ill-formed: missing ids or types".format(path)
+  )
+  ids = rows[0]
+  for row in rows[1:]:
+    if len(row) != len(ids): raise Exception(
+      "file \"{}\" is ill-formed: steps are inconsistent".format(path)
+    )
+  length = len(rows) - 2
+  return mk( len(ids), length, ids, rows[1], rows[2:len(rows) - 1] )
@@ -0,0 +1,89 @@
+"""
+Verdicts over whole traces. Checking the outputs of the oracles one step at a
+time parses every value and decides every step with python code. When many
+oracle outputs are available at once, e.g. when the oracles run ahead of the
+checks in streaming mode or replay a stored trace, they are instead decided
+in one pass over bitsets.
+
+A bitset is an integer the bit ``k`` of which is set iff something is false
+at step ``k`` of a trace. The values of the oracle outputs become one bitset
+per output (``columns``), the outputs of an oracle one bitset of the steps it
+rejects (``rejected``), and the oracles one bitset of the failing steps
+(``failing``) with the global and mode semantics of
+``outcome.first_failure_of_oracles``.
+"""
+
+import oracle as o
+
+# Character of a boolean value in the binary representation of a bitset, see
+# ``lib.bool_of_string``.
+_falsity = {
+  "1": "0", "t": "0", "T": "0", "true": "0", "True": "0",
+  "0": "1", "f": "1", "F": "1", "false": "1", "False": "1"
+}
+
+def _char(value):
+  """The character of a boolean value, raises a ``ValueError`` if it is not
+  one."""
+  try: return _falsity[ value.strip() ]
+  except KeyError: raise ValueError(
+    "expected bool but found \"{}\"".format(value.strip())
+  )
+
+def column(values):
+  """The bitset of the false values of a sequence of boolean values."""
+  return int( "0" + "".join( _char(value) for value in reversed(values) ), 2 )
+
+def pack(rows):
+  """The bitsets of the columns of some rows of ``0`` (true) and ``1``
+  (false) characters."""
+  rows = list(rows)
+  rows.reverse()
+  return [ int( "0" + "".join(col), 2 ) for col in zip(*rows) ]
+
+def columns(lines, width):
+  """The bitsets of the false values of the first ``width`` columns of some
+  CSV lines. Raises a ``ValueError`` if a line has less than ``width``
+  values or if one of them is not a boolean."""
+  rows = []
+  for line in lines:
+    values = line.split(",", width)[:width]
+    if len(values) < width: raise ValueError(
+      "expected {} values but found {}".format(width, len(values))
+    )
+    try: rows.append( "".join(
+      map( _falsity.__getitem__, map(str.strip, values) )
+    ) )
+    except KeyError: rows.append( "".join( map(_char, values) ) )
+  return pack(rows)
+
+def rejected(orcl, lines):
+  """The bitset of the steps an oracle rejects given its output lines, i.e.
+  the steps at which one of its outputs is false, see
+  ``oracle.check_values``."""
+  width = len( o.outputs(orcl) )
+  return reduce( lambda acc, col: acc | col, columns(lines, width), 0 )
+
+def failing(oracles, rejections, length):
+  """The bitset of the failing steps of ``length`` steps given the bitsets of
+  the steps some oracles reject. A step fails if a global oracle rejects it,
+  or if there are non-global oracles and they all reject it."""
+  res = 0
+  modes = (1 << length) - 1
+  mode_count = 0
+  for (orcl, bits) in zip(oracles, rejections):
+    if o.is_global(orcl): res |= bits
+    else:
+      modes &= bits
+      mode_count += 1
+  if mode_count > 0: res |= modes
+  return res
+
+def first(bits):
+  """The first step of a bitset, ``None`` if it is empty."""
+  if bits == 0: return None
+  return (bits & -bits).bit_length() - 1
+
+def counts(cols):
+  """The number of false values of some bitsets."""
+  return [ bin(col).count("1") for col in cols ]
@@ -0,0 +1,128 @@
+"""
+Warm processes. A binary or an oracle declaring a reset line in the context
+can run several test cases: after a test case teas writes the reset line to
+it, and it must reset its state and write the same line back. The processes
+of such programs are kept in a pool of idle processes of the worker, by
+command and directory, and reused by later test executions.
+
+A reuse contains
+- ``"reset"``: the reset line,
+- ``"recycle"``: the number of test cases after which a process is replaced
+  by a fresh one.
+
+A process is also recycled on any protocol error: a wrong or missing
+acknowledgement of the reset line, a failure or a timeout. A process
+without reuse is released after each test case.
+
+An entry of the pool contains
+- ``"proc"``: the process,
+- ``"drain"``: the drain of its stderr, see ``drain``,
+- ``"reuse"``: the reuse of its program, ``None`` if it cannot be reused,
+- ``"key"``: the command and directory of the process,
+- ``"runs"``: the number of test cases it started.
+"""
+
+import threading
+
+import lib, iolib
+import drain
+import procs
+
+# Number of test cases after which a process is recycled by default.
+recycle_default = 100
+
+# Seconds a process has to acknowledge a reset line, unless the step timeout
+# is shorter.
+ack_timeout = 5.0
+
+_lock = threading.Lock()
+# Idle entries by key.
+_idle = {}
+
+def reset(t):
+  """The reset line of a reuse."""
+  return t["reset"]
+
+def recycle(t):
+  """The number of test cases after which a process is recycled."""
+  return t["recycle"]
+
+def mk(reset, recycle=recycle_default):
+  """Creates a reuse."""
+  return { "reset": reset, "recycle": recycle }
+
+def of_xml(tree):
+  """Creates the reuse of an xml tree from its ``reset`` and ``recycle``
+  attributes. Returns ``None`` if there is no ``reset`` attribute."""
+  if "reset" not in tree.attrib.keys(): return None
+  count = recycle_default
+  if "recycle" in tree.attrib.keys():
+    count = lib.int_of_string( tree.attrib["recycle"] )
+    if count < 1: raise Exception(
+      "illegal recycle attribute \"{}\", expected a positive integer".format(
+        tree.attrib["recycle"]
+      )
+    )
+  return mk( tree.attrib["reset"], count )
+
+def proc(entry):
+  """The process of an entry."""
+  return entry["proc"]
+
+def drain_of(entry):
+  """The drain of the stderr of the process of an entry."""
+  return entry["drain"]
+
+def reuse(entry):
+  """The reuse of the program of an entry, ``None`` if it cannot be
+  reused."""
+  return entry["reuse"]
+
+def acquire(cmd, cwd, reus3, spill_path):
+  """An entry for a process running ``cmd`` in ``cwd``, idle if there is
+  one, spawned otherwise. Its stderr is spilled to ``spill_path``."""
+  k3y = ( repr(cmd), cwd )
+  entry = None
+  if reus3 != None:
+    with _lock:
+      if len( _idle.get(k3y, []) ) > 0: entry = _idle[k3y].pop()
+  if entry != None:
+    procs.reuse()
+    drain.rebind( drain_of(entry), spill_path )
+  else:
+    process = procs.spawn(cmd, cwd)
+    if reus3 != None:
+      # Idle processes would otherwise not see the end of their stdin while
+      # processes spawned after them are alive.
+      iolib.cloexec( process.stdin.fileno() )
+    entry = {
+      "proc": process, "drain": drain.mk(process, spill_path),
+      "reuse": reus3, "key": k3y, "runs": 0
+    }
+  entry["runs"] += 1
+  return entry
+
+def reusable(entry):
+  """True iff the process of an entry can run another test case after this
+  one, provided it acknowledges the reset line."""
+  return reuse(entry) != None and entry["runs"] < recycle( reuse(entry) )
+
+def put_back(entry):
+  """Puts an entry the process of which acknowledged the reset line back in
+  the pool."""
+  with _lock: _idle.setdefault( entry["key"], [] ).append(entry)
+
+def release(entries, force):
+  """Releases the processes of some entries, see ``procs.release``, and
+  waits for their drains to reach the end of their stderr. ``None`` entries
+  are ignored."""
+  entries = [ entry for entry in entries if entry != None ]
+  procs.release( map(proc, entries), force )
+  for entry in entries: drain.wait( drain_of(entry), procs.reap_timeout )
+
+def clear():
+  """Releases all the idle processes of the pool."""
+  with _lock:
+    entries = [ entry for idle in _idle.values() for entry in idle ]
+    _idle.clear()
+  release(entries, False)